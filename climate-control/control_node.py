@@ -1,10 +1,6 @@
 import logging
 import paho.mqtt.client as mqtt
-
-BROKER = "test.mosquitto.org"
-PORT = 1883
-TOPIC_TEMPERATURE = "home/temperature"
-TOPIC_COMMAND = "home/heater_command"
+from mqtt_config import BROKER, PORT, TOPIC_TEMPERATURE, TOPIC_COMMAND
 
 logging.basicConfig(level=logging.INFO)
 
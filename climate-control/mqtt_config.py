@@ -1,7 +1,10 @@
 # mqtt_config.py
 
-BROKER = 'test.mosquitto.org'
-PORT = 1883
+import os
+
+# MQTT_BROKER / MQTT_PORT point the nodes at another broker, e.g. a local one
+BROKER = os.environ.get('MQTT_BROKER', 'test.mosquitto.org')
+PORT = int(os.environ.get('MQTT_PORT', 1883))
 TOPIC_TEMPERATURE = 'home/temperature'
 TOPIC_COMMAND = 'home/heater_command'
 QOS = 1
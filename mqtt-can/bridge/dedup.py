@@ -0,0 +1,103 @@
+# bridge/dedup.py
+
+import logging
+
+from settings import config
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("bridge.dedup")
+
+
+class Policy:
+    """
+    Publishing policy for one ID: only on data change, at most `max_rate`
+    times per second, and/or re-publish unchanged data every `heartbeat`
+    seconds.
+    """
+    __slots__ = ('on_change', 'min_interval', 'heartbeat')
+
+    def __init__(self, on_change=True, max_rate=0.0, heartbeat=0.0):
+        self.on_change = on_change
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.heartbeat = heartbeat
+
+
+class ChangeFilter:
+    """
+    Per-ID last-value cache that suppresses redundant publishes of cyclic
+    frames. Uses the frames' own timestamps, so it is deterministic when
+    replaying captures.
+    """
+    def __init__(self, default, overrides=None):
+        self.default = default
+        self.overrides = dict(overrides or {})
+        # ID → [last published data, last publish timestamp]
+        self._last = {}
+        self._policies = {}
+        self.suppressed_unchanged = 0
+        self.suppressed_rate = 0
+        self.heartbeats = 0
+        self.suppressed_by_id = {}
+
+    @classmethod
+    def from_config(cls, cfg=config):
+        """
+        Build the filter from [dedup] and [dedup:<id>] sections, or None if disabled.
+        """
+        if not cfg.has_section('dedup') or not cfg['dedup'].getboolean('enabled', False):
+            return None
+        def policy(sec, base=None):
+            base = base or Policy()
+            return Policy(
+                on_change=sec.getboolean('on_change', base.on_change),
+                max_rate=sec.getfloat('max_rate', 1.0 / base.min_interval if base.min_interval else 0.0),
+                heartbeat=sec.getfloat('heartbeat', base.heartbeat))
+        default = policy(cfg['dedup'])
+        overrides = {int(name[len('dedup:'):], 0): policy(cfg[name], default)
+                     for name in cfg.sections() if name.startswith('dedup:')}
+        logger.info(f"Change-only publishing enabled ({len(overrides)} per-ID override(s))")
+        return cls(default, overrides)
+
+    def should_publish(self, msg):
+        can_id = msg.arbitration_id
+        policy = self._policies.get(can_id)
+        if policy is None:
+            policy = self._policies[can_id] = self.overrides.get(can_id, self.default)
+        now = msg.timestamp
+        data = msg.data
+        last = self._last.get(can_id)
+        if last is None:
+            self._last[can_id] = [bytes(data), now]
+            return True
+
+        since = now - last[1]
+        if policy.min_interval and since < policy.min_interval:
+            self.suppressed_rate += 1
+            self.suppressed_by_id[can_id] = self.suppressed_by_id.get(can_id, 0) + 1
+            return False
+        if policy.on_change and data == last[0]:
+            if not (policy.heartbeat and since >= policy.heartbeat):
+                self.suppressed_unchanged += 1
+                self.suppressed_by_id[can_id] = self.suppressed_by_id.get(can_id, 0) + 1
+                return False
+            self.heartbeats += 1
+        else:
+            last[0] = bytes(data)
+        last[1] = now
+        return True
+
+    def forget(self, can_id):
+        """
+        Drop the cached value of an ID whose last accepted frame never made it
+        out (e.g. the publish queue was full), so the next frame is published
+        instead of being suppressed as unchanged.
+        """
+        self._last.pop(can_id, None)
+
+    def snapshot(self):
+        return {
+            "suppressed_unchanged": self.suppressed_unchanged,
+            "suppressed_rate":      self.suppressed_rate,
+            "heartbeats":           self.heartbeats,
+            "tracked_ids":          len(self._last),
+        }
@@ -0,0 +1,208 @@
+# bridge/forwarder.py
+
+import collections
+import logging
+import queue
+import threading
+import time
+
+import can
+
+from bridge.translator import can_to_mqtt, encode_batch, BATCH_MAX_FRAMES
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("bridge.forwarder")
+
+
+def percentile(samples, pct):
+    """
+    Return the `pct` percentile (0–100) of an already sorted sequence.
+    """
+    if not samples:
+        return 0.0
+    idx = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[idx]
+
+
+class ForwarderStats:
+    """
+    Counters and a rolling window of per-frame latencies (bus timestamp →
+    publish returned) for a CanForwarder.
+    """
+    def __init__(self, window=10000):
+        self.received  = 0
+        self.published = 0
+        self.dropped   = 0
+        self.filtered  = 0   # rejected by the routing table (deny list / rate limit)
+        self.suppressed = 0  # unchanged or too frequent (change-only publishing)
+        self.messages  = 0   # MQTT publishes (≤ published when batching)
+        self._latencies = collections.deque(maxlen=window)
+
+    def record_latency(self, seconds):
+        self._latencies.append(seconds)
+
+    def snapshot(self):
+        lat = sorted(self._latencies)
+        return {
+            "received":  self.received,
+            "published": self.published,
+            "dropped":   self.dropped,
+            "filtered":  self.filtered,
+            "suppressed": self.suppressed,
+            "messages":  self.messages,
+            "latency_p50_ms": percentile(lat, 50) * 1e3,
+            "latency_p99_ms": percentile(lat, 99) * 1e3,
+            "latency_max_ms": (lat[-1] if lat else 0.0) * 1e3,
+        }
+
+
+class CanForwarder(can.Listener):
+    """
+    Event-driven CAN→MQTT forwarder.
+
+    A can.Notifier calls on_message_received() from its reader thread for every
+    frame as soon as it arrives. Frames are handed to a publisher thread through
+    a bounded queue, so a slow broker never blocks the bus reader; frames that
+    do not fit are dropped and counted instead.
+
+    With batch_topic set, frames are coalesced into one MQTT payload (see
+    translator.encode_batch) once batch_max_frames have been collected or
+    batch_window seconds have passed since the first frame of the batch.
+
+    With a `routing` table, frames it rejects (deny list, rate limit) are
+    counted as filtered on the reader thread and never queued.
+
+    With a `dedup` filter (bridge.dedup.ChangeFilter), repeated cyclic frames
+    are suppressed on the reader thread as well.
+
+    With a `decoder` (bridge.signals.SignalDecoder), physical signal values are
+    published as well; publish_raw=False publishes only the decoded values.
+    """
+    def __init__(self, publish, queue_size=10000, stats_interval=10.0,
+                 batch_topic=None, batch_max_frames=100, batch_window=0.01, routing=None,
+                 decoder=None, publish_raw=True, dedup=None):
+        self._publish = publish
+        self._routing = routing
+        self._dedup = dedup
+        self._decoder = decoder
+        self._publish_raw = publish_raw or decoder is None
+        self._batch_topic = batch_topic
+        self._batch_max = max(1, min(batch_max_frames, BATCH_MAX_FRAMES))
+        self._batch_window = batch_window
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats_interval = stats_interval
+        self.stats = ForwarderStats()
+
+    # ——— can.Listener ———————————————————————————————————————————
+    def on_message_received(self, msg):
+        self.stats.received += 1
+        if self._routing is not None and not self._routing.accept(msg.arbitration_id):
+            self.stats.filtered += 1
+            return
+        if self._dedup is not None and not self._dedup.should_publish(msg):
+            self.stats.suppressed += 1
+            return
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            self.stats.dropped += 1
+            if self._dedup is not None:
+                self._dedup.forget(msg.arbitration_id)
+
+    def on_error(self, exc):
+        logger.error(f"CAN reader error: {exc}")
+
+    # ——— Publisher Thread ————————————————————————————————————————
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="can-forwarder", daemon=True)
+        self._thread.start()
+        mode = f"batch → {self._batch_topic}" if self._batch_topic else "per-frame"
+        logger.info(f"Forwarder started (queue_size={self._queue.maxsize}, mode={mode})")
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the publisher thread after it has drained frames already queued.
+        Also called by can.Notifier.stop(), so repeated calls are a no-op.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(f"Forwarder stopped: {self.stats.snapshot()}")
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _publish_decoded(self, msg):
+        for topic, payload in self._decoder.publications(msg):
+            self._publish(topic, payload)
+            self.stats.messages += 1
+
+    def _publish_frame(self, msg):
+        if self._publish_raw:
+            topic, payload = can_to_mqtt(msg)
+            self._publish(topic, payload)
+            self.stats.messages += 1
+        if self._decoder is not None:
+            self._publish_decoded(msg)
+        self.stats.published += 1
+        self.stats.record_latency(time.time() - msg.timestamp)
+
+    def _publish_batch(self, batch):
+        if self._publish_raw:
+            self._publish(self._batch_topic, encode_batch(batch))
+            self.stats.messages += 1
+        if self._decoder is not None:
+            for msg in batch:
+                self._publish_decoded(msg)
+        self.stats.published += len(batch)
+        now = time.time()
+        for msg in batch:
+            self.stats.record_latency(now - msg.timestamp)
+
+    def _run(self):
+        last_report = time.monotonic()
+        last_dropped = 0
+        batch = []
+        batch_deadline = 0.0
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            timeout = 0.2
+            if batch:
+                timeout = max(0.0, batch_deadline - time.monotonic())
+            try:
+                msg = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                msg = None
+
+            try:
+                if self._batch_topic is None:
+                    if msg is not None:
+                        self._publish_frame(msg)
+                else:
+                    if msg is not None:
+                        if not batch:
+                            batch_deadline = time.monotonic() + self._batch_window
+                        batch.append(msg)
+                    if batch and (len(batch) >= self._batch_max or time.monotonic() >= batch_deadline):
+                        self._publish_batch(batch)
+                        batch = []
+            except Exception as e:
+                logger.exception(f"Error forwarding CAN frame: {e}")
+                batch = []
+
+            now = time.monotonic()
+            if self._stats_interval and now - last_report >= self._stats_interval:
+                dropped = self.stats.dropped
+                if dropped > last_dropped:
+                    logger.warning(f"Hand-off queue overflow: dropped {dropped - last_dropped} frames "
+                                   f"in the last {now - last_report:.1f}s")
+                logger.info(f"Forwarder stats: {self.stats.snapshot()}, depth={self.queue_depth()}"
+                            + (f", dedup={self._dedup.snapshot()}" if self._dedup is not None else ""))
+                last_report, last_dropped = now, dropped
+
+        if batch:
+            self._publish_batch(batch)
@@ -0,0 +1,228 @@
+# bridge/gateway.py
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from settings import config, section, PROJECT_ROOT
+from canbus.can_interface import bus_names, bus_settings, create_bus, bus as default_bus, start_notifier
+from canbus.capture import open_recorder
+from bridge.forwarder import CanForwarder
+from bridge.routing import RoutingTable
+from bridge.translator import can_to_mqtt
+from bridge.signals import load_decoder
+from bridge.dedup import ChangeFilter
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("bridge.gateway")
+
+WORKER_MODES = ('thread', 'process')
+
+
+def capture_path(name):
+    """
+    Capture file for bus `name` from [capture] path ({bus} expands to the
+    bus name), or None when recording is off.
+    """
+    path = section('capture').get('path', '').strip()
+    if not path:
+        return None
+    return os.path.join(PROJECT_ROOT, path.format(bus=name))
+
+
+def forwarder_options():
+    """
+    CanForwarder keyword arguments from the [gateway] and [signals] sections.
+    """
+    gw = section('gateway')
+    return {
+        "queue_size":       gw.getint('queue_size', 10000),
+        "stats_interval":   gw.getfloat('stats_interval', 10.0),
+        "batch_topic":      gw.get('batch_topic', 'can/out/batch') if gw.getboolean('batch', False) else None,
+        "batch_max_frames": gw.getint('batch_max_frames', 100),
+        "batch_window":     gw.getfloat('batch_window_ms', 10.0) / 1000.0,
+        "publish_raw":      section('signals').getboolean('raw', True),
+    }
+
+
+class ThreadBusWorker:
+    """
+    Reads one bus in this process: a Notifier thread feeds a CanForwarder whose
+    publisher thread prefixes every topic with the bus's topic_prefix.
+    """
+    def __init__(self, name, publish, forwarder_kwargs=None, decoder=None):
+        self.name = name
+        self.prefix = bus_settings(name)[3]
+        self.routing = RoutingTable.from_config(config)
+        self.bus = default_bus if name == 'default' else create_bus(name, self.routing.can_filters())
+        kwargs = dict(forwarder_kwargs or {})
+        if kwargs.get('batch_topic'):
+            kwargs['batch_topic'] = self.prefix + kwargs['batch_topic']
+        prefix = self.prefix
+        self.forwarder = CanForwarder(
+            (lambda topic, payload: publish(prefix + topic, payload)) if prefix else publish,
+            routing=self.routing, decoder=decoder, dedup=ChangeFilter.from_config(config), **kwargs)
+        self._notifier = None
+
+    def start(self):
+        self.forwarder.start()
+        listeners = [self.forwarder]
+        path = capture_path(self.name)
+        if path:
+            listeners.append(open_recorder(path))
+        self._notifier = start_notifier(listeners, on_bus=self.bus)
+        logger.info(f"Thread worker for bus '{self.name}' started (prefix='{self.prefix}')")
+
+    def stop(self):
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
+        self.forwarder.stop()
+
+    def stats(self):
+        return self.forwarder.stats.snapshot()
+
+
+def _process_reader(name, out_q, stop_event, dropped, batch_max, batch_window):
+    """
+    Child-process body: read, filter and translate frames from one bus, and
+    ship (topic, payload) lists to the parent, which owns the MQTT connection.
+    """
+    routing = RoutingTable.from_config(config)
+    dedup = ChangeFilter.from_config(config)
+    decoder = load_decoder()
+    publish_raw = section('signals').getboolean('raw', True) or decoder is None
+    prefix = bus_settings(name)[3]
+    reader = create_bus(name, routing.can_filters())
+    path = capture_path(name)
+    recorder = open_recorder(path) if path else None
+    pending = []
+    pending_ids = set()
+    deadline = 0.0
+    try:
+        while not stop_event.is_set():
+            msg = reader.recv(batch_window if pending else 0.2)
+            if msg is not None and recorder is not None:
+                recorder.on_message_received(msg)
+            if msg is not None and routing.accept(msg.arbitration_id) \
+                    and (dedup is None or dedup.should_publish(msg)):
+                if not pending:
+                    deadline = time.monotonic() + batch_window
+                pending_ids.add(msg.arbitration_id)
+                if publish_raw:
+                    topic, payload = can_to_mqtt(msg)
+                    pending.append((prefix + topic, payload))
+                if decoder is not None:
+                    pending.extend((prefix + t, p) for t, p in decoder.publications(msg))
+            if pending and (len(pending) >= batch_max or msg is None or time.monotonic() >= deadline):
+                try:
+                    out_q.put_nowait(pending)
+                except queue.Full:
+                    with dropped.get_lock():
+                        dropped.value += len(pending)
+                    if dedup is not None:
+                        for can_id in pending_ids:
+                            dedup.forget(can_id)
+                pending = []
+                pending_ids.clear()
+    finally:
+        if recorder is not None:
+            recorder.stop()
+        reader.shutdown()
+
+
+class ProcessBusWorker:
+    """
+    Reads one bus in a child process, so reading, filtering and translation
+    run outside this interpreter's GIL. A relay thread here publishes the
+    translated messages over the shared MQTT connection.
+    Note: the 'virtual' interface is process-local, so this mode needs a real
+    (e.g. socketcan) or udp_multicast interface.
+    """
+    def __init__(self, name, publish, queue_size=1000, batch_max=64, batch_window=0.005):
+        self.name = name
+        self.prefix = bus_settings(name)[3]
+        self._publish = publish
+        self._queue = multiprocessing.Queue(maxsize=queue_size)
+        self._stop_event = multiprocessing.Event()
+        self._dropped = multiprocessing.Value('L', 0)
+        self._args = (batch_max, batch_window)
+        self._process = None
+        self._relay = None
+        self.published = 0
+
+    def start(self):
+        self._stop_event.clear()
+        self._process = multiprocessing.Process(
+            target=_process_reader, name=f"can-reader-{self.name}", daemon=True,
+            args=(self.name, self._queue, self._stop_event, self._dropped) + self._args)
+        self._process.start()
+        self._relay = threading.Thread(target=self._run_relay, name=f"can-relay-{self.name}", daemon=True)
+        self._relay.start()
+        logger.info(f"Process worker for bus '{self.name}' started (pid={self._process.pid}, prefix='{self.prefix}')")
+
+    def _run_relay(self):
+        while not self._stop_event.is_set() or not self._queue.empty():
+            try:
+                chunk = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            for topic, payload in chunk:
+                self._publish(topic, payload)
+            self.published += len(chunk)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._process is not None:
+            self._process.join(5.0)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        if self._relay is not None:
+            self._relay.join(5.0)
+            self._relay = None
+        logger.info(f"Process worker for bus '{self.name}' stopped: {self.stats()}")
+
+    def stats(self):
+        return {"published": self.published, "dropped": self._dropped.value}
+
+
+class Gateway:
+    """
+    One reader worker per configured bus, all publishing through a single
+    shared MQTT client (paho's publish() is thread-safe).
+    `stats_interval` overrides [gateway] stats_interval for thread workers
+    (0 disables their periodic stats line).
+    """
+    def __init__(self, publish, mode='thread', names=None, stats_interval=None):
+        if mode not in WORKER_MODES:
+            raise ValueError(f"Unknown worker mode '{mode}', expected one of {WORKER_MODES}")
+        self.mode = mode
+        names = names or bus_names()
+        if mode == 'thread':
+            opts = forwarder_options()
+            if stats_interval is not None:
+                opts['stats_interval'] = stats_interval
+            decoder = load_decoder()   # signal database is loaded once and shared
+            self.workers = [ThreadBusWorker(n, publish, opts, decoder) for n in names]
+        else:
+            opts = forwarder_options()
+            self.workers = [ProcessBusWorker(n, publish,
+                                             batch_max=min(opts['batch_max_frames'], 256),
+                                             batch_window=opts['batch_window'])
+                            for n in names]
+
+    def start(self):
+        for w in self.workers:
+            w.start()
+        logger.info(f"Gateway started: {len(self.workers)} bus(es), {self.mode} workers")
+
+    def stop(self):
+        for w in self.workers:
+            w.stop()
+
+    def stats(self):
+        return {w.name: w.stats() for w in self.workers}
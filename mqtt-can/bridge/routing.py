@@ -0,0 +1,215 @@
+# bridge/routing.py
+
+import logging
+import time
+
+from settings import config
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("bridge.routing")
+
+STD_MASK = 0x7FF
+EXT_MASK = 0x1FFFFFFF
+IN_CACHE_MAX = 4096
+
+
+def parse_id_spec(spec):
+    """
+    Parse '0x123' or '0x100/0x7F0' into (can_id, mask, extended).
+    """
+    if '/' in spec:
+        id_str, mask_str = spec.split('/', 1)
+        can_id, mask = int(id_str, 0), int(mask_str, 0)
+    else:
+        can_id, mask = int(spec, 0), None
+    extended = can_id > STD_MASK
+    if mask is None:
+        mask = EXT_MASK if extended else STD_MASK
+    return can_id, mask, extended
+
+
+def parse_id_list(value):
+    return [parse_id_spec(s.strip()) for s in (value or '').split(',') if s.strip()]
+
+
+def _matches(can_id, specs):
+    for spec_id, mask, _ext in specs:
+        if can_id & mask == spec_id & mask:
+            return True
+    return False
+
+
+class Route:
+    """
+    One [route:<name>] section: frames whose ID matches id/mask are published
+    on `topic` ({id} expands to the hex ID) at most `rate_limit` times per second.
+    An exact-ID route may `remap` its bus ID to a different ID on the MQTT side.
+    """
+    def __init__(self, name, can_id, mask, extended, topic, rate_limit=0.0, remap=None, in_topic=None):
+        self.name = name
+        self.can_id = can_id
+        self.mask = mask
+        self.extended = extended
+        self.topic = topic
+        self.rate_limit = rate_limit
+        self.remap = remap
+        self.in_topic = in_topic
+
+    def matches(self, can_id):
+        return can_id & self.mask == self.can_id & self.mask
+
+
+class RoutingTable:
+    """
+    Maps CAN IDs to MQTT topics and back, applying allow/deny lists and
+    per-ID rate limits.
+
+    Every decision is resolved once per ID (or inbound topic) and cached, so
+    the per-frame cost is a dict lookup plus, for rate-limited IDs, one clock
+    read.
+    """
+    def __init__(self, routes=(), allow=(), deny=(), topic='can/out/{id}', rate_limit=0.0):
+        self.routes = list(routes)
+        self.allow = list(allow)
+        self.deny = list(deny)
+        self.topic = topic
+        self.rate_limit = rate_limit
+        # bus ID → (topic, min_interval, permitted)
+        self._out = {}
+        # inbound topic → bus ID or None when filtered
+        self._in = {}
+        self._last_sent = {}
+        # logical (MQTT-side) ID → bus ID for remapped routes
+        self._unmap = {}
+        for r in self.routes:
+            if r.remap is not None:
+                if r.mask not in (STD_MASK, EXT_MASK):
+                    logger.warning(f"Route '{r.name}': remap ignored on masked route")
+                    r.remap = None
+                else:
+                    self._unmap[r.remap] = r.can_id
+            if r.in_topic:
+                # Explicit inbound topics still honour the deny list
+                self._in[r.in_topic] = r.can_id if self._permitted(r.can_id, r) else None
+
+    @classmethod
+    def from_config(cls, cfg):
+        sec = cfg['routing'] if cfg.has_section('routing') else {}
+        routes = []
+        for name in cfg.sections():
+            if not name.startswith('route:'):
+                continue
+            rs = cfg[name]
+            can_id, mask, extended = parse_id_spec(rs.get('id', '0x0'))
+            if 'mask' in rs:
+                mask = int(rs['mask'], 0)
+            remap = rs.get('remap')
+            routes.append(Route(
+                name[len('route:'):], can_id, mask, extended,
+                topic=rs.get('topic', sec.get('topic', 'can/out/{id}')),
+                rate_limit=float(rs.get('rate_limit', 0)),
+                remap=int(remap, 0) if remap else None,
+                in_topic=rs.get('in_topic'),
+            ))
+        table = cls(
+            routes,
+            allow=parse_id_list(sec.get('allow')),
+            deny=parse_id_list(sec.get('deny')),
+            topic=sec.get('topic', 'can/out/{id}'),
+            rate_limit=float(sec.get('rate_limit', 0)),
+        )
+        logger.debug(f"Routing table loaded: {len(routes)} route(s), "
+                     f"{len(table.allow)} allow, {len(table.deny)} deny")
+        return table
+
+    # ——— Filtering ——————————————————————————————————————————————————
+    def _permitted(self, can_id, route):
+        if _matches(can_id, self.deny):
+            return False
+        if self.allow and route is None and not _matches(can_id, self.allow):
+            return False
+        return True
+
+    def _route_for(self, can_id):
+        for r in self.routes:
+            if r.matches(can_id):
+                return r
+        return None
+
+    def can_filters(self):
+        """
+        python-can `can_filters` for the Bus, or None to receive every frame.
+        Only allow-listing can be pushed down to the driver/kernel; deny
+        entries are always applied in Python.
+        """
+        if not self.allow:
+            return None
+        specs = self.allow + [(r.can_id, r.mask, r.extended) for r in self.routes]
+        return [{"can_id": i, "can_mask": m, "extended": e} for i, m, e in specs]
+
+    # ——— CAN → MQTT ——————————————————————————————————————————————————
+    def _resolve_out(self, can_id):
+        route = self._route_for(can_id)
+        logical = route.remap if route is not None and route.remap is not None else can_id
+        template = route.topic if route is not None else self.topic
+        rate = route.rate_limit if route is not None and route.rate_limit else self.rate_limit
+        entry = (template.format(id=hex(logical)),
+                 1.0 / rate if rate > 0 else 0.0,
+                 self._permitted(can_id, route))
+        self._out[can_id] = entry
+        return entry
+
+    def topic_for(self, can_id):
+        """
+        Cached MQTT topic for a bus ID.
+        """
+        try:
+            return self._out[can_id][0]
+        except KeyError:
+            return self._resolve_out(can_id)[0]
+
+    def accept(self, can_id):
+        """
+        True if a frame with this ID should be forwarded now (passes the
+        allow/deny lists and its rate limit).
+        """
+        try:
+            entry = self._out[can_id]
+        except KeyError:
+            entry = self._resolve_out(can_id)
+        topic, min_interval, permitted = entry
+        if not permitted:
+            return False
+        if min_interval:
+            now = time.monotonic()
+            if now - self._last_sent.get(can_id, -min_interval) < min_interval:
+                return False
+            self._last_sent[can_id] = now
+        return True
+
+    # ——— MQTT → CAN ——————————————————————————————————————————————————
+    def can_id_for(self, topic):
+        """
+        Cached bus ID for an inbound topic, or None if it is filtered.
+        """
+        try:
+            return self._in[topic]
+        except KeyError:
+            pass
+        logical = int(topic.rsplit('/', 1)[-1], 16)
+        can_id = self._unmap.get(logical, logical)
+        result = can_id if self._permitted(can_id, self._route_for(can_id)) else None
+        if len(self._in) < IN_CACHE_MAX:
+            self._in[topic] = result
+        return result
+
+    def inbound_id(self, logical_id):
+        """
+        Bus ID for an ID carried inside a payload, or None if it is filtered.
+        """
+        can_id = self._unmap.get(logical_id, logical_id)
+        return can_id if self._permitted(can_id, self._route_for(can_id)) else None
+
+
+# Module-wide table built from can_config.ini
+ROUTES = RoutingTable.from_config(config)
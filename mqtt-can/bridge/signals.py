@@ -0,0 +1,222 @@
+# bridge/signals.py
+
+import json
+import logging
+import os
+import struct
+
+from settings import config, PROJECT_ROOT
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("bridge.signals")
+
+try:
+    import cantools
+except ImportError:  # optional: only needed for DBC files
+    cantools = None
+
+MODES = ('signal', 'record')
+
+
+class SignalDef:
+    """
+    One signal as the decoder needs it: bit position in the little- or
+    big-endian integer of the payload, width, sign and linear conversion.
+    A multiplexed signal carries the multiplexer switch values (`mux_ids`)
+    under which it is present; the switch itself has is_multiplexer set.
+    """
+    def __init__(self, name, start, length, little_endian=True, signed=False,
+                 scale=1.0, offset=0.0, is_float=False, mux_ids=None, is_multiplexer=False):
+        self.name = name
+        self.start = start
+        self.length = length
+        self.little_endian = little_endian
+        self.signed = signed
+        self.scale = scale
+        self.offset = offset
+        self.is_float = is_float
+        self.mux_ids = mux_ids
+        self.is_multiplexer = is_multiplexer
+
+    def shift(self, frame_len):
+        """
+        Right-shift that brings the signal's LSB to bit 0 of the payload integer.
+        Big-endian (Motorola) start bits follow DBC numbering and point at the MSB.
+        """
+        if self.little_endian:
+            return self.start
+        msb = (frame_len - 1 - self.start // 8) * 8 + self.start % 8
+        return msb - self.length + 1
+
+
+class FrameDecoder:
+    """
+    Precompiled decoder for one arbitration ID. All offsets, masks and
+    conversions are fixed at build time; decoding is a table walk over the
+    payload converted to an integer once per byte order.
+
+    Multiplexed signals are grouped by switch value at build time and only
+    decoded when the frame's multiplexer switch selects them.
+    """
+    def __init__(self, name, frame_len, signals, topic_base):
+        self.name = name
+        self.frame_len = frame_len
+        self.record_topic = f"{topic_base}/{name}"
+        self._le = []
+        self._be = []
+        # switch value → ([little-endian entries], [big-endian entries])
+        self._muxed = {}
+        self._switch = None   # (shift, mask, little_endian) of the multiplexer
+        self.signal_count = 0
+        for sig in signals:
+            if sig.is_multiplexer and sig.mux_ids is None:
+                self._switch = (sig.shift(frame_len), (1 << sig.length) - 1, sig.little_endian)
+        for sig in signals:
+            entry = self._entry(sig, topic_base)
+            if sig.mux_ids is None:
+                (self._le if sig.little_endian else self._be).append(entry)
+            elif self._switch is None:
+                logger.warning(f"{name}.{sig.name}: multiplexed signal without a multiplexer switch; skipped")
+                continue
+            else:
+                for mux_id in sig.mux_ids:
+                    tables = self._muxed.setdefault(mux_id, ([], []))
+                    tables[0 if sig.little_endian else 1].append(entry)
+            self.signal_count += 1
+
+    def _entry(self, sig, topic_base):
+        mask = (1 << sig.length) - 1
+        sign_bit = 1 << (sig.length - 1) if sig.signed else 0
+        fmt = None
+        if sig.is_float:
+            fmt = struct.Struct('<f' if sig.length == 32 else '<d')
+        return (sig.name, sig.shift(self.frame_len), mask, sign_bit, sig.scale, sig.offset, fmt,
+                f"{topic_base}/{self.name}/{sig.name}")
+
+    def decode(self, data):
+        """
+        Return a list of (signal_name, physical_value, signal_topic).
+        """
+        out = []
+        # Bytes past the declared length would shift big-endian signals
+        data = bytes(data[:self.frame_len]).ljust(self.frame_len, b'\0')
+        le, be = self._le, self._be
+        if self._switch is not None:
+            shift, mask, little = self._switch
+            switch = (int.from_bytes(data, 'little' if little else 'big') >> shift) & mask
+            muxed = self._muxed.get(switch)
+            if muxed is not None:
+                le, be = le + muxed[0], be + muxed[1]
+        if le:
+            raw_all = int.from_bytes(data, 'little')
+            self._walk(raw_all, le, out)
+        if be:
+            raw_all = int.from_bytes(data, 'big')
+            self._walk(raw_all, be, out)
+        return out
+
+    @staticmethod
+    def _walk(raw_all, table, out):
+        for name, shift, mask, sign_bit, scale, offset, fmt, topic in table:
+            raw = (raw_all >> shift) & mask
+            if fmt is not None:
+                value = fmt.unpack(raw.to_bytes(fmt.size, 'little'))[0] * scale + offset
+            else:
+                if sign_bit and raw & sign_bit:
+                    raw -= mask + 1
+                value = raw * scale + offset
+            out.append((name, value, topic))
+
+
+class SignalDecoder:
+    """
+    Maps arbitration IDs to FrameDecoders and turns frames into MQTT
+    publications, either one topic per signal or one JSON record per frame.
+    """
+    def __init__(self, decoders, mode='record'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown signal mode '{mode}', expected one of {MODES}")
+        self.decoders = decoders
+        self.mode = mode
+        self.decoded_signals = 0
+
+    def __len__(self):
+        return len(self.decoders)
+
+    def publications(self, msg):
+        """
+        (topic, payload) pairs for a frame, or an empty list if its ID has no decoder.
+        """
+        dec = self.decoders.get(msg.arbitration_id)
+        if dec is None:
+            return []
+        values = dec.decode(msg.data)
+        self.decoded_signals += len(values)
+        if self.mode == 'signal':
+            return [(topic, repr(value)) for _name, value, topic in values]
+        record = {name: value for name, value, _topic in values}
+        record['t'] = msg.timestamp
+        return [(dec.record_topic, json.dumps(record, separators=(',', ':')))]
+
+
+def _from_dbc(path, topic_base):
+    if cantools is None:
+        raise RuntimeError("cantools is required to load DBC files (pip install cantools)")
+    db = cantools.database.load_file(path)
+    decoders = {}
+    for m in db.messages:
+        switches = {s.name for s in m.signals if s.is_multiplexer and s.multiplexer_ids is None}
+        sigs = []
+        for s in m.signals:
+            if s.multiplexer_ids is not None and s.multiplexer_signal not in switches:
+                # Extended (nested) multiplexing is not supported
+                logger.warning(f"{m.name}.{s.name}: nested multiplexing is not supported; skipped")
+                continue
+            sigs.append(SignalDef(s.name, s.start, s.length,
+                                  little_endian=(s.byte_order == 'little_endian'),
+                                  signed=s.is_signed, scale=s.scale, offset=s.offset,
+                                  is_float=s.is_float,
+                                  mux_ids=frozenset(s.multiplexer_ids) if s.multiplexer_ids is not None else None,
+                                  is_multiplexer=s.is_multiplexer))
+        decoders[m.frame_id] = FrameDecoder(m.name, m.length, sigs, topic_base)
+    return decoders
+
+
+def _from_config(cfg, topic_base):
+    """
+    [signal:<message>.<signal>] sections: id, start, length, byte_order
+    (little|big), signed, scale, offset, frame_length (default 8).
+    """
+    grouped = {}
+    for name in cfg.sections():
+        if not name.startswith('signal:'):
+            continue
+        sec = cfg[name]
+        msg_name, _, sig_name = name[len('signal:'):].partition('.')
+        can_id = int(sec.get('id'), 0)
+        entry = grouped.setdefault(can_id, (msg_name, sec.getint('frame_length', 8), []))
+        entry[2].append(SignalDef(
+            sig_name or msg_name, sec.getint('start'), sec.getint('length'),
+            little_endian=sec.get('byte_order', 'little') == 'little',
+            signed=sec.getboolean('signed', False),
+            scale=sec.getfloat('scale', 1.0), offset=sec.getfloat('offset', 0.0)))
+    return {can_id: FrameDecoder(m, n, sigs, topic_base) for can_id, (m, n, sigs) in grouped.items()}
+
+
+def load_decoder(cfg=config):
+    """
+    Build the SignalDecoder configured in [signals], or None if decoding is off.
+    """
+    if not cfg.has_section('signals') or not cfg['signals'].getboolean('enabled', False):
+        return None
+    sec = cfg['signals']
+    topic_base = sec.get('topic', 'can/signal')
+    dbc = sec.get('dbc')
+    if dbc:
+        decoders = _from_dbc(os.path.join(PROJECT_ROOT, dbc), topic_base)
+    else:
+        decoders = _from_config(cfg, topic_base)
+    decoder = SignalDecoder(decoders, mode=sec.get('mode', 'record'))
+    logger.info(f"Signal decoding enabled: {len(decoders)} message(s), "
+                f"{sum(d.signal_count for d in decoders.values())} signal(s), mode={decoder.mode}")
+    return decoder
@@ -1,24 +1,126 @@
 import logging
+import struct
+
+from settings import section
+from bridge.routing import ROUTES
+from framelog import FrameLog, LazyHex
 
 logger = logging.getLogger("bridge.translator")
+flog = FrameLog(logger)
+
+# Wire formats for single-frame payloads:
+#   hex    – data bytes as a hex string (original format, kept for compatibility)
+#   binary – FRAME header (arbitration ID, flags, DLC, timestamp) + raw data bytes
+FORMATS = ('hex', 'binary')
+FRAME   = struct.Struct('<IBBd')
+FLAG_EXTENDED = 0x01
+FLAG_RTR      = 0x02
+FLAG_FD       = 0x04
+FLAG_ERROR    = 0x08
+
+PAYLOAD_FORMAT = section('bridge').get('payload_format', 'hex').strip().lower()
+if PAYLOAD_FORMAT not in FORMATS:
+    logger.warning(f"Unknown payload_format '{PAYLOAD_FORMAT}'; falling back to hex")
+    PAYLOAD_FORMAT = 'hex'
+
+# Batch payload: header (version, frame count) followed by one record per frame
+# (timestamp, arbitration ID, DLC) and exactly DLC data bytes.
+BATCH_VERSION = 1
+BATCH_HEADER  = struct.Struct('<BH')
+BATCH_FRAME   = struct.Struct('<dIB')
+BATCH_MAX_FRAMES = 0xFFFF
+
+def pack_frame(can_msg):
+    """
+    Pack a can.Message into the binary wire format.
+    """
+    flags = ((FLAG_EXTENDED if can_msg.is_extended_id else 0)
+             | (FLAG_RTR if can_msg.is_remote_frame else 0)
+             | (FLAG_FD if can_msg.is_fd else 0)
+             | (FLAG_ERROR if can_msg.is_error_frame else 0))
+    data = bytes(can_msg.data)
+    return FRAME.pack(can_msg.arbitration_id, flags, len(data), can_msg.timestamp) + data
+
+def unpack_frame(payload):
+    """
+    Unpack a binary wire-format payload into (can_id, flags, timestamp, data_bytes).
+    """
+    can_id, flags, dlc, timestamp = FRAME.unpack_from(payload, 0)
+    data = bytes(payload[FRAME.size:FRAME.size + dlc])
+    if len(data) != dlc:
+        raise ValueError("Truncated binary CAN payload")
+    return can_id, flags, timestamp, data
 
-def can_to_mqtt(can_msg):
+def can_to_mqtt(can_msg, fmt=None):
     """
     Translate a can.Message into an MQTT topic+payload.
+    `fmt` overrides the configured payload_format ('hex' or 'binary').
     """
-    topic   = f"can/out/{hex(can_msg.arbitration_id)}"
-    payload = can_msg.data.hex()
-    logger.debug(f"Translating CAN→MQTT: ID=0x{can_msg.arbitration_id:X} → ({topic}, {payload})")
+    topic = ROUTES.topic_for(can_msg.arbitration_id)
+    if (fmt or PAYLOAD_FORMAT) == 'binary':
+        payload = pack_frame(can_msg)
+    else:
+        payload = can_msg.data.hex()
+    flog(can_msg.arbitration_id, "Translating CAN→MQTT: ID=0x%X → (%s, %r)",
+         can_msg.arbitration_id, topic, payload)
     return topic, payload
 
-def mqtt_to_can(topic, payload):
+def mqtt_to_can(topic, payload, fmt=None):
+    """
+    Translate an MQTT topic+payload into (can_id, data_bytes, flags), or None
+    if the routing table filters the ID. Binary payloads carry their own
+    arbitration ID and FLAG_* bits; hex payloads take the ID from the last
+    topic level and are marked extended only if it does not fit in 11 bits.
+    """
+    if (fmt or PAYLOAD_FORMAT) == 'binary':
+        can_id, flags, _ts, data = unpack_frame(payload)
+        can_id = ROUTES.inbound_id(can_id)
+    else:
+        can_id = ROUTES.can_id_for(topic)
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        data = bytes.fromhex(payload)
+        flags = None
+    if can_id is None:
+        flog(topic, "MQTT→CAN filtered by routing table: %s", topic)
+        return None
+    if flags is None:
+        flags = FLAG_EXTENDED if can_id > 0x7FF else 0
+    flog(can_id, "Translating MQTT→CAN: (%s, %r) → ID=0x%X, data=%s", topic, payload, can_id, LazyHex(data))
+    return can_id, data, flags
+
+def encode_batch(can_msgs):
+    """
+    Pack a sequence of can.Message objects into a single batch payload.
+    """
+    parts = [BATCH_HEADER.pack(BATCH_VERSION, len(can_msgs))]
+    pack = BATCH_FRAME.pack
+    for m in can_msgs:
+        data = bytes(m.data)
+        parts.append(pack(m.timestamp, m.arbitration_id, len(data)))
+        parts.append(data)
+    payload = b''.join(parts)
+    flog('batch', "Encoded batch of %d frames (%d bytes)", len(can_msgs), len(payload))
+    return payload
+
+def decode_batch(payload):
     """
-    Translate an MQTT topic+payload into (can_id, data_bytes).
+    Unpack a batch payload into a list of (timestamp, can_id, dlc, data_bytes).
     """
-    hex_id = topic.rsplit('/', 1)[-1]
-    can_id = int(hex_id, 16)
-    if isinstance(payload, bytes):
-        payload = payload.decode()
-    data = bytes.fromhex(payload)
-    logger.debug(f"Translating MQTT→CAN: ({topic}, {payload}) → ID=0x{can_id:X}, data={data.hex()}")
-    return can_id, data
+    version, count = BATCH_HEADER.unpack_from(payload, 0)
+    if version != BATCH_VERSION:
+        raise ValueError(f"Unsupported batch version {version}")
+    frames = []
+    offset = BATCH_HEADER.size
+    unpack = BATCH_FRAME.unpack_from
+    size = BATCH_FRAME.size
+    for _ in range(count):
+        ts, can_id, dlc = unpack(payload, offset)
+        offset += size
+        data = bytes(payload[offset:offset + dlc])
+        if len(data) != dlc:
+            raise ValueError("Truncated batch payload")
+        offset += dlc
+        frames.append((ts, can_id, dlc, data))
+    flog('batch', "Decoded batch of %d frames", count)
+    return frames
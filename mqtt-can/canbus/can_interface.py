@@ -1,49 +1,67 @@
 # canbus/can_interface.py
 
 import can
-import configparser
-import os
 import logging
 
+from settings import config, section, CONFIG_PATH
+from bridge.routing import ROUTES
+from framelog import FrameLog, LazyHex
+
 # ——— Logger Setup ———————————————————————————————————————————————
 logger = logging.getLogger("canbus.can_interface")
+flog = FrameLog(logger)
 
-# ——— Compute Config Path ———————————————————————————————————————————
-THIS_DIR    = os.path.dirname(__file__)
-PROJECT_ROOT= os.path.abspath(os.path.join(THIS_DIR, os.pardir))
-CONFIG_PATH = os.path.join(PROJECT_ROOT, 'can_config.ini')
+# ——— Load CAN Bus Configuration ————————————————————————————————————
+# [default] is the primary bus; each [bus:<name>] section adds another channel.
+def bus_names():
+    """
+    Names of all configured buses, 'default' first.
+    """
+    return ['default'] + [s[len('bus:'):] for s in config.sections() if s.startswith('bus:')]
 
-logger.debug(f"Looking for CAN config at: {CONFIG_PATH}")
+def bus_settings(name='default'):
+    """
+    Return (interface, channel, bitrate, topic_prefix) for a configured bus.
+    The default bus keeps the un-prefixed topics; others default to '<name>/'.
+    """
+    key = 'default' if name == 'default' else f'bus:{name}'
+    if key not in config:
+        logger.warning(f"'{key}' section missing in CAN config; using defaults")
+    sec = section(key)
+    return (sec.get('interface', 'virtual'),
+            sec.get('channel',   'vcan0'),
+            int(sec.get('bitrate', 500000)),
+            sec.get('topic_prefix', '' if name == 'default' else f'{name}/'))
 
-# ——— Load CAN Bus Configuration ————————————————————————————————————
-config = configparser.ConfigParser()
-read_files = config.read(CONFIG_PATH)
-if not read_files:
-    logger.warning(f"No config file read. Checked paths: {read_files}")
-if 'default' not in config:
-    logger.warning(f"'default' section missing in CAN config; using defaults")
-    iface, channel, bitrate = 'virtual', 'vcan0', 500000
-else:
-    sec = config['default']
-    iface   = sec.get('interface', 'virtual')
-    channel = sec.get('channel',   'vcan0')
-    bitrate = int(sec.get('bitrate', 500000))
-    logger.debug(f"Config loaded: interface={iface}, channel={channel}, bitrate={bitrate}")
-
-# ——— Initialize Virtual CAN Bus —————————————————————————————————————
-try:
-    bus = can.Bus(interface=iface, channel=channel, bitrate=bitrate)
-    logger.info(f"Initialized CAN bus on {iface}/{channel} @ {bitrate}bps")
-except Exception as e:
-    logger.error(f"Failed to initialize CAN bus: {e}")
-    raise
+def create_bus(name='default', can_filters=None):
+    """
+    Open the configured bus `name`. Allow-listed IDs from the routing table
+    are filtered by the driver/kernel where supported.
+    """
+    b_iface, b_channel, b_bitrate, _prefix = bus_settings(name)
+    if can_filters is None:
+        can_filters = ROUTES.can_filters()
+    try:
+        new_bus = can.Bus(interface=b_iface, channel=b_channel, bitrate=b_bitrate, can_filters=can_filters)
+    except Exception as e:
+        logger.error(f"Failed to initialize CAN bus '{name}': {e}")
+        raise
+    logger.info(f"Initialized CAN bus '{name}' on {b_iface}/{b_channel} @ {b_bitrate}bps"
+                + (f" with {len(can_filters)} filter(s)" if can_filters else ""))
+    return new_bus
+
+iface, channel, bitrate, _ = bus_settings('default')
+logger.debug(f"Config loaded from {CONFIG_PATH}: interface={iface}, channel={channel}, bitrate={bitrate}")
+
+# ——— Initialize Default CAN Bus ————————————————————————————————————
+bus = create_bus('default')
 
 # ——— API ———————————————————————————————————————————————————————
 def read_can(timeout=1.0):
     try:
         msg = bus.recv(timeout)
         if msg:
-            logger.debug(f"Received CAN: ID=0x{msg.arbitration_id:X}, data={msg.data.hex()}")
+            flog(msg.arbitration_id, "Received CAN: ID=0x%X, data=%s", msg.arbitration_id, LazyHex(msg.data))
         return msg
     except can.CanError as e:
         logger.error(f"CAN read error: {e}")
@@ -51,8 +69,17 @@ def read_can(timeout=1.0):
 
 def write_can(arbitration_id, data):
     try:
-        msg = can.Message(arbitration_id=arbitration_id, data=data, is_extended_id=False)
+        msg = can.Message(arbitration_id=arbitration_id, data=data, is_extended_id=arbitration_id > 0x7FF)
         bus.send(msg)
-        logger.debug(f"Sent CAN: ID=0x{arbitration_id:X}, data={msg.data.hex()}")
+        flog(arbitration_id, "Sent CAN: ID=0x%X, data=%s", arbitration_id, LazyHex(msg.data))
     except can.CanError as e:
         logger.error(f"CAN write error: {e}")
+
+def start_notifier(listeners, timeout=1.0, on_bus=None):
+    """
+    Dispatch every received frame to `listeners` from a python-can Notifier
+    thread as soon as it arrives. Call .stop() on the result to shut down.
+    """
+    notifier = can.Notifier(on_bus or bus, listeners, timeout=timeout)
+    logger.info(f"CAN notifier started with {len(listeners)} listener(s)")
+    return notifier
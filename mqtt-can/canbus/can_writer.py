@@ -0,0 +1,146 @@
+# canbus/can_writer.py
+
+import collections
+import itertools
+import logging
+import queue
+import threading
+import time
+
+import can
+
+from bridge.translator import FLAG_EXTENDED, FLAG_RTR, FLAG_FD
+from framelog import FrameLog, LazyHex
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("canbus.can_writer")
+flog = FrameLog(logger)
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+
+class WriterStats:
+    """
+    Counters and a rolling window of enqueue → bus.send() latencies.
+    """
+    def __init__(self, window=10000):
+        self.enqueued  = 0
+        self.sent      = 0
+        self.dropped   = 0   # queue full
+        self.failed    = 0   # gave up after retries
+        self.retries   = 0
+        self.max_depth = 0
+        self._latencies = collections.deque(maxlen=window)
+
+    def record_latency(self, seconds):
+        self._latencies.append(seconds)
+
+    def snapshot(self):
+        lat = sorted(self._latencies)
+        return {
+            "enqueued":  self.enqueued,
+            "sent":      self.sent,
+            "dropped":   self.dropped,
+            "failed":    self.failed,
+            "retries":   self.retries,
+            "max_depth": self.max_depth,
+            "write_p50_ms": _percentile(lat, 50) * 1e3,
+            "write_p99_ms": _percentile(lat, 99) * 1e3,
+        }
+
+
+class CanWriter:
+    """
+    Dedicated CAN transmit thread fed by a bounded priority queue.
+
+    submit() never blocks, so it is safe to call from paho's network-loop
+    thread. Frames are sent lowest arbitration ID first (as CAN arbitration
+    would), FIFO within one ID. A can.CanError (e.g. full TX buffer) is retried
+    with exponential backoff before the frame is counted as failed.
+    """
+    def __init__(self, bus, queue_size=1000, retries=3, backoff=0.001, backoff_max=0.1, send_timeout=0.1):
+        self._bus = bus
+        self._queue = queue.PriorityQueue(maxsize=queue_size)
+        self._seq = itertools.count()
+        self._retries = retries
+        self._backoff = backoff
+        self._backoff_max = backoff_max
+        self._send_timeout = send_timeout
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.stats = WriterStats()
+
+    def submit(self, arbitration_id, data, flags=None):
+        """
+        Queue a frame for transmission. `flags` are translator FLAG_* bits;
+        without them the frame is extended only if the ID needs 29 bits.
+        Returns False if the queue is full.
+        """
+        if flags is None:
+            flags = FLAG_EXTENDED if arbitration_id > 0x7FF else 0
+        try:
+            self._queue.put_nowait((arbitration_id, next(self._seq), data, flags, time.perf_counter()))
+        except queue.Full:
+            self.stats.dropped += 1
+            return False
+        self.stats.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.stats.max_depth:
+            self.stats.max_depth = depth
+        return True
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="can-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"CAN writer started (queue_size={self._queue.maxsize}, retries={self._retries})")
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the writer after frames already queued have been sent.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(f"CAN writer stopped: {self.stats.snapshot()}")
+
+    def _send(self, arbitration_id, data, flags):
+        msg = can.Message(arbitration_id=arbitration_id, data=data,
+                          is_extended_id=bool(flags & FLAG_EXTENDED),
+                          is_remote_frame=bool(flags & FLAG_RTR),
+                          is_fd=bool(flags & FLAG_FD))
+        delay = self._backoff
+        for attempt in range(self._retries + 1):
+            try:
+                self._bus.send(msg, timeout=self._send_timeout)
+                return True
+            except can.CanError as e:
+                if attempt == self._retries:
+                    logger.error(f"CAN write error after {attempt + 1} attempt(s): {e}")
+                    return False
+                self.stats.retries += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self._backoff_max)
+        return False
+
+    def _run(self):
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            try:
+                arbitration_id, _seq, data, flags, t_in = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if self._send(arbitration_id, data, flags):
+                self.stats.sent += 1
+                self.stats.record_latency(time.perf_counter() - t_in)
+                flog(arbitration_id, "Sent CAN: ID=0x%X, data=%s", arbitration_id, LazyHex(data))
+            else:
+                self.stats.failed += 1
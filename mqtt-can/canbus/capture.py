@@ -0,0 +1,96 @@
+# canbus/capture.py
+
+import logging
+import os
+import struct
+
+import can
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("canbus.capture")
+
+# Compact append-only capture: MAGIC once, then per frame a RECORD header
+# (timestamp, arbitration ID, flags, DLC) followed by DLC data bytes.
+MAGIC  = b'CANCAP1\n'
+RECORD = struct.Struct('<dIBB')
+FLAG_EXTENDED = 0x01
+FLAG_RTR      = 0x02
+FLAG_FD       = 0x04
+FLAG_ERROR    = 0x08
+FLAG_RX       = 0x10
+
+# Extensions handled by python-can's own writers/readers
+PYTHON_CAN_FORMATS = ('.blf', '.asc', '.log', '.csv', '.trc', '.mf4')
+
+
+class CaptureWriter(can.Listener):
+    """
+    Listener that appends every frame to a compact binary capture through a
+    large write buffer, so recording costs one struct.pack per frame.
+    """
+    def __init__(self, path, buffer_size=1 << 20):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.path = path
+        self._file = open(path, 'ab', buffering=buffer_size)
+        if new_file:
+            self._file.write(MAGIC)
+        self.frames = 0
+
+    def on_message_received(self, msg):
+        flags = ((FLAG_EXTENDED if msg.is_extended_id else 0)
+                 | (FLAG_RTR if msg.is_remote_frame else 0)
+                 | (FLAG_FD if msg.is_fd else 0)
+                 | (FLAG_ERROR if msg.is_error_frame else 0)
+                 | (FLAG_RX if msg.is_rx else 0))
+        data = msg.data
+        self._file.write(RECORD.pack(msg.timestamp, msg.arbitration_id, flags, len(data)))
+        self._file.write(data)
+        self.frames += 1
+
+    def stop(self):
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"Capture closed: {self.frames} frame(s) written to {self.path}")
+
+
+def open_recorder(path):
+    """
+    Listener recording to `path`: python-can's writer for BLF/ASC/... extensions,
+    the compact binary format otherwise.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.lower().endswith(PYTHON_CAN_FORMATS):
+        recorder = can.Logger(path)
+    else:
+        recorder = CaptureWriter(path)
+    logger.info(f"Recording CAN traffic to {path}")
+    return recorder
+
+
+def read_capture(path):
+    """
+    Yield can.Message objects from a capture in any supported format.
+    """
+    if path.lower().endswith(PYTHON_CAN_FORMATS):
+        yield from can.LogReader(path)
+        return
+    with open(path, 'rb', buffering=1 << 20) as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a CAN capture file")
+        size = RECORD.size
+        while True:
+            header = f.read(size)
+            if len(header) < size:
+                return
+            ts, can_id, flags, dlc = RECORD.unpack(header)
+            data = f.read(dlc)
+            if len(data) < dlc:
+                logger.warning(f"Truncated record at end of {path}")
+                return
+            yield can.Message(timestamp=ts, arbitration_id=can_id, data=data,
+                              is_extended_id=bool(flags & FLAG_EXTENDED),
+                              is_remote_frame=bool(flags & FLAG_RTR),
+                              is_fd=bool(flags & FLAG_FD),
+                              is_error_frame=bool(flags & FLAG_ERROR),
+                              is_rx=bool(flags & FLAG_RX),
+                              dlc=dlc)
@@ -0,0 +1,83 @@
+# framelog.py
+
+import logging
+import time
+
+from settings import section
+
+# ——— Per-Frame Log Modes ——————————————————————————————————————————
+#   off     – per-frame debug lines are never emitted (stats lines only)
+#   sampled – 1 in `sample_every` frames plus the first `first_per_id` per ID per second
+#   full    – every frame (the original behaviour)
+MODES = ('off', 'sampled', 'full')
+
+
+class LazyHex:
+    """
+    Defers bytes.hex() until a log record is actually formatted.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return bytes(self.data).hex()
+
+
+class FrameLog:
+    """
+    Sampling front end for per-frame DEBUG logging on hot paths.
+
+    Call it as flog(key, fmt, *args) with %-style arguments. Nothing is
+    formatted unless the line is actually emitted. `key` (usually the CAN ID)
+    is used for the first-K-per-second sampling.
+    """
+    def __init__(self, logger, mode=None, sample_every=None, first_per_id=None):
+        sec = section('logging')
+        self.logger = logger
+        self.mode = (mode or sec.get('frame_log', 'sampled')).strip().lower()
+        if self.mode not in MODES:
+            logger.warning(f"Unknown frame_log mode '{self.mode}'; using sampled")
+            self.mode = 'sampled'
+        self.sample_every = sec.getint('sample_every', 1000) if sample_every is None else sample_every
+        self.first_per_id = sec.getint('first_per_id', 3) if first_per_id is None else first_per_id
+        self.seen = 0
+        self.emitted = 0
+        self._second = 0
+        self._per_key = {}
+
+    def __call__(self, key, fmt, *args):
+        self.seen += 1
+        if self.mode == 'off' or not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        if self.mode == 'sampled' and not self._sample(key):
+            return
+        self.emitted += 1
+        self.logger.debug(fmt, *args)
+
+    def _sample(self, key):
+        if self.sample_every and (self.seen - 1) % self.sample_every == 0:
+            return True
+        if self.first_per_id:
+            now = int(time.monotonic())
+            if now != self._second:
+                self._second = now
+                self._per_key.clear()
+            count = self._per_key.get(key, 0)
+            if count < self.first_per_id:
+                self._per_key[key] = count + 1
+                return True
+        return False
+
+
+def configure_logging():
+    """
+    Root logger setup from the [logging] section (level, default INFO).
+    """
+    level = section('logging').get('level', 'INFO').strip().upper()
+    logging.basicConfig(
+        level=getattr(logging, level, logging.INFO),
+        format='[%(asctime)s] %(levelname)s:%(name)s: %(message)s',
+        datefmt='%H:%M:%S'
+    )
@@ -1,32 +1,69 @@
 import time
 import logging
-from canbus.can_interface import read_can
-from mqtt.mqtt_client import connect, client
-from bridge.translator import can_to_mqtt
+from framelog import configure_logging
 
-# Global logger & config
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='[%(asctime)s] %(levelname)s:%(name)s: %(message)s',
-    datefmt='%H:%M:%S'
-)
+# Global logger & config (level and per-frame sampling from [logging])
+configure_logging()
 logger = logging.getLogger("main")
 
-def main_loop(poll_interval=0.1):
+from canbus.can_interface import create_bus
+from mqtt.mqtt_client import connect, client, add_bus_writer, writer, bus_writers
+from bridge.gateway import Gateway
+from settings import section
+
+def log_stats(gateway, previous, interval):
+    """
+    One aggregated line for all buses and writers: totals plus rates since
+    the previous call. Returns the totals for the next call.
+    """
+    per_bus = gateway.stats()
+    totals = {
+        "fwd":     sum(s.get("published", 0) for s in per_bus.values()),
+        "dropped": sum(s.get("dropped", 0) for s in per_bus.values()),
+        "suppressed": sum(s.get("suppressed", 0) for s in per_bus.values()),
+        "tx":      sum(w.stats.sent for w in [writer] + list(bus_writers.values())),
+        "tx_drop": sum(w.stats.dropped + w.stats.failed for w in [writer] + list(bus_writers.values())),
+    }
+    rate = lambda k: (totals[k] - previous.get(k, 0)) / interval
+    p99 = max((s.get("latency_p99_ms", 0.0) for s in per_bus.values()), default=0.0)
+    logger.info("Gateway: CAN→MQTT %.0f/s (total %d, dropped %d, suppressed %d, p99 %.2f ms) | "
+                "MQTT→CAN %.0f/s (total %d, dropped/failed %d)",
+                rate("fwd"), totals["fwd"], totals["dropped"], totals["suppressed"], p99,
+                rate("tx"), totals["tx"], totals["tx_drop"])
+    return totals
+
+def main_loop(gateway):
     """
     Main gateway loop:
-      - read from CAN → publish to MQTT
+      - each bus has a reader worker that forwards frames → published to MQTT
       - incoming MQTT handled in mqtt_client.on_message()
     """
-    while True:
-        msg = read_can(timeout=1.0)
-        if msg:
-            topic, payload = can_to_mqtt(msg)
-            logger.info(f"Publishing to MQTT: {topic} → {payload}")
-            client.publish(topic, payload)
-        time.sleep(poll_interval)
+    gateway.start()
+    interval = section('logging').getfloat('stats_interval', 10.0)
+    totals = {}
+    last = time.monotonic()
+    try:
+        while True:
+            time.sleep(1.0)
+            now = time.monotonic()
+            if interval and now - last >= interval:
+                totals = log_stats(gateway, totals, now - last)
+                last = now
+    except KeyboardInterrupt:
+        logger.info("Stopping MQTT–CAN gateway")
+    finally:
+        gateway.stop()
 
 if __name__ == "__main__":
     logger.info("Starting MQTT–CAN gateway")
+    # With the aggregated stats line on, the forwarders' own per-bus lines
+    # ([gateway] stats_interval) are switched off so there is one stats stream
+    aggregated = section('logging').getfloat('stats_interval', 10.0) > 0
+    gateway = Gateway(client.publish, mode=section('gateway').get('workers', 'thread'),
+                      stats_interval=0 if aggregated else None)
+    # Namespaced buses also get their own MQTT→CAN writer
+    for w in gateway.workers:
+        if w.name != 'default':
+            add_bus_writer(w.prefix, getattr(w, 'bus', None) or create_bus(w.name))
     connect()
-    main_loop()
+    main_loop(gateway)
@@ -1,24 +1,66 @@
 import paho.mqtt.client as mqtt
 import logging
 from bridge.translator import mqtt_to_can
-from canbus.can_interface import write_can
+from canbus.can_interface import bus
+from canbus.can_writer import CanWriter
+from settings import section
+from framelog import FrameLog
 
 logger = logging.getLogger("mqtt.client")
+flog = FrameLog(logger)
 client = mqtt.Client()
 
+# CAN writes run on their own thread so a slow TX buffer never stalls paho's loop
+def make_writer(can_bus):
+    wcfg = section('writer')
+    return CanWriter(
+        can_bus,
+        queue_size=wcfg.getint('queue_size', 1000),
+        retries=wcfg.getint('retries', 3),
+        backoff=wcfg.getfloat('backoff_ms', 1.0) / 1000.0,
+        backoff_max=wcfg.getfloat('backoff_max_ms', 100.0) / 1000.0,
+    )
+
+writer = make_writer(bus)
+
+# Topic prefix → CanWriter for additional buses; everything else goes to `writer`
+bus_writers = {}
+
+def add_bus_writer(prefix, can_bus):
+    """
+    Route '<prefix>can/in/#' to its own CAN writer for a namespaced bus.
+    Call before connect().
+    """
+    bus_writers[prefix] = make_writer(can_bus)
+    return bus_writers[prefix]
+
+def _writer_for(topic):
+    for prefix, w in bus_writers.items():
+        if topic.startswith(prefix):
+            return w
+    return writer
+
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         logger.info("Connected to MQTT broker")
-        client.subscribe("can/in/#")
-        logger.info("Subscribed to topic: can/in/#")
+        for prefix in [''] + list(bus_writers):
+            client.subscribe(f"{prefix}can/in/#")
+            logger.info(f"Subscribed to topic: {prefix}can/in/#")
     else:
         logger.error(f"Failed to connect to MQTT broker, rc={rc}")
 
 def on_message(client, userdata, msg):
-    logger.debug(f"MQTT message received: topic={msg.topic}, payload={msg.payload}")
+    flog(msg.topic, "MQTT message received: topic=%s, payload=%r", msg.topic, msg.payload)
     try:
-        can_id, data = mqtt_to_can(msg.topic, msg.payload)
-        write_can(can_id, data)
+        frame = mqtt_to_can(msg.topic, msg.payload)
+        if frame is None:
+            return
+        w = _writer_for(msg.topic) if bus_writers else writer
+        if not w.submit(*frame):
+            # Log the first drop of every hundred; the writer keeps the exact count
+            if w.stats.dropped % 100 == 1:
+                logger.warning(f"CAN send queue full, dropped frame for {msg.topic} "
+                               f"({w.stats.dropped} dropped so far)")
     except Exception as e:
         logger.exception(f"Error processing MQTT message: {e}")
 
@@ -26,5 +68,8 @@ def connect(broker_host="broker.hivemq.com", broker_port=1883):
     logger.info(f"Connecting to MQTT broker at {broker_host}:{broker_port}")
     client.on_connect = on_connect
     client.on_message = on_message
+    writer.start()
+    for w in bus_writers.values():
+        w.start()
     client.connect(broker_host, broker_port)
     client.loop_start()
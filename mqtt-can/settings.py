@@ -0,0 +1,26 @@
+# settings.py
+
+import configparser
+import os
+import logging
+
+# ——— Logger Setup ———————————————————————————————————————————————
+logger = logging.getLogger("settings")
+
+# ——— Compute Config Path ———————————————————————————————————————————
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH  = os.path.join(PROJECT_ROOT, 'can_config.ini')
+
+# ——— Load Gateway Configuration ————————————————————————————————————
+config = configparser.ConfigParser()
+if not config.read(CONFIG_PATH):
+    logger.warning(f"No config file read from {CONFIG_PATH}; using defaults")
+
+def section(name):
+    """
+    Return the config section `name`, creating it empty if it is missing,
+    so callers can always use .get()/.getint() with a fallback.
+    """
+    if not config.has_section(name):
+        config.add_section(name)
+    return config[name]
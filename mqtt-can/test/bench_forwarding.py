@@ -0,0 +1,126 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import logging
+import time
+
+import can
+
+from canbus.can_interface import start_notifier, iface, channel
+from bridge.forwarder import CanForwarder
+from bridge.routing import ROUTES
+
+# ——— Logging Setup ———————————————————————————————————————————————
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] %(levelname)s:%(name)s: %(message)s',
+    datefmt='%H:%M:%S'
+)
+logger = logging.getLogger("test.bench_forwarding")
+
+
+class PublishCounter:
+    """
+    Stand-in for client.publish() so the benchmark measures the gateway,
+    not the broker.
+    """
+    def __init__(self, publish=None):
+        self.count = 0
+        self._publish = publish
+
+    def __call__(self, topic, payload):
+        self.count += 1
+        if self._publish is not None:
+            self._publish(topic, payload)
+
+
+def run(frames, rate, queue_size, batch_topic=None, batch_max=100, batch_window=0.01, publish=None):
+    counter = PublishCounter(publish)
+    forwarder = CanForwarder(counter, queue_size=queue_size, stats_interval=0,
+                             batch_topic=batch_topic, batch_max_frames=batch_max,
+                             batch_window=batch_window, routing=ROUTES)
+    forwarder.start()
+    notifier = start_notifier([forwarder], timeout=0.1)
+    sender = can.Bus(interface=iface, channel=channel)
+
+    period = 1.0 / rate if rate else 0.0
+    logger.info(f"Sending {frames} frames on {iface}/{channel} "
+                f"({'max' if not rate else f'{rate:.0f}/s'})")
+    t_start = time.perf_counter()
+    next_send = t_start
+    for i in range(frames):
+        msg = can.Message(arbitration_id=0x100 + (i & 0xFF),
+                          data=i.to_bytes(4, 'little'),
+                          is_extended_id=False,
+                          timestamp=time.time())
+        sender.send(msg)
+        if period:
+            next_send += period
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    t_sent = time.perf_counter()
+
+    # Wait for the forwarder to catch up (or give up after 10 s)
+    deadline = time.monotonic() + 10.0
+    st = forwarder.stats
+    while st.published + st.dropped + st.filtered < frames and time.monotonic() < deadline:
+        time.sleep(0.01)
+    t_done = time.perf_counter()
+
+    notifier.stop()
+    forwarder.stop()
+    sender.shutdown()
+
+    stats = forwarder.stats.snapshot()
+    elapsed = t_done - t_start
+    print()
+    print(f"mode               : {'batch → ' + batch_topic if batch_topic else 'per-frame'}")
+    print(f"frames sent        : {frames} in {t_sent - t_start:.3f}s "
+          f"({frames / (t_sent - t_start):,.0f} frames/s offered)")
+    print(f"frames forwarded   : {stats['published']} ({stats['published'] / elapsed:,.0f} frames/s sustained)")
+    print(f"broker messages    : {counter.count} ({counter.count / elapsed:,.0f} msgs/s)")
+    print(f"frames dropped     : {stats['dropped']} (queue_size={queue_size})")
+    print(f"frames filtered    : {stats['filtered']} (routing table)")
+    print(f"latency p50/p99/max: {stats['latency_p50_ms']:.3f} / "
+          f"{stats['latency_p99_ms']:.3f} / {stats['latency_max_ms']:.3f} ms")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CAN→MQTT forwarding throughput/latency benchmark")
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--rate", type=float, default=0, help="frames/s to offer (0 = as fast as possible)")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--batch", action="store_true", help="coalesce frames onto can/out/batch")
+    parser.add_argument("--batch-max", type=int, default=100, help="max frames per batch")
+    parser.add_argument("--batch-window-ms", type=float, default=10.0, help="max batch age in ms")
+    parser.add_argument("--compare", action="store_true", help="run per-frame and batch mode back to back")
+    parser.add_argument("--broker", help="publish to this MQTT broker instead of a counting stub")
+    args = parser.parse_args()
+
+    publish = None
+    if args.broker:
+        import paho.mqtt.client as mqtt
+        mqtt_client = mqtt.Client()
+        mqtt_client.connect(args.broker, 1883)
+        mqtt_client.loop_start()
+        publish = mqtt_client.publish
+
+    modes = [False, True] if args.compare else [args.batch]
+    for batched in modes:
+        run(args.frames, args.rate, args.queue_size,
+            batch_topic="can/out/batch" if batched else None,
+            batch_max=args.batch_max,
+            batch_window=args.batch_window_ms / 1000.0,
+            publish=publish)
+
+    if args.broker:
+        mqtt_client.loop_stop()
+        mqtt_client.disconnect()
@@ -0,0 +1,77 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import logging
+import time
+
+import can
+
+from bridge import translator
+from bridge.translator import can_to_mqtt, mqtt_to_can
+
+# ——— Logging Setup ———————————————————————————————————————————————
+# Root at DEBUG with a real formatter writing to /dev/null: emitted lines pay
+# the full formatting + I/O cost without flooding the terminal.
+devnull = open(os.devnull, 'w')
+handler = logging.StreamHandler(devnull)
+handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s:%(name)s: %(message)s', '%H:%M:%S'))
+logging.basicConfig(level=logging.DEBUG, handlers=[handler])
+logger = logging.getLogger("test.bench_logging")
+
+
+def legacy_round_trip(msg):
+    """
+    The original hot path: an eagerly formatted f-string debug line per frame
+    in each direction, whatever the log level.
+    """
+    topic, payload = can_to_mqtt(msg)
+    translator.logger.debug(f"Translating CAN→MQTT: ID=0x{msg.arbitration_id:X} → ({topic}, {payload})")
+    result = mqtt_to_can(topic, payload)
+    translator.logger.debug(f"Translating MQTT→CAN: ({topic}, {payload}) → ID=0x{result[0]:X}, data={result[1].hex()}")
+
+
+def run(frames, mode, level):
+    msgs = [can.Message(arbitration_id=0x100 + (i & 0x3F), data=i.to_bytes(8, 'little'),
+                        is_extended_id=False, timestamp=time.time()) for i in range(1024)]
+    logging.getLogger().setLevel(level)
+    translator.flog.mode = 'off' if mode == 'legacy' else mode
+    flog_before = translator.flog.emitted
+
+    t0 = time.perf_counter()
+    for i in range(frames):
+        msg = msgs[i & 1023]
+        if mode == 'legacy':
+            legacy_round_trip(msg)
+        else:
+            topic, payload = can_to_mqtt(msg)
+            mqtt_to_can(topic, payload)
+    elapsed = time.perf_counter() - t0
+    emitted = translator.flog.emitted - flog_before if mode != 'legacy' else 2 * frames
+    return frames / elapsed, emitted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-frame logging overhead on the translator round trip")
+    parser.add_argument("--frames", type=int, default=200000)
+    args = parser.parse_args()
+
+    cases = [
+        ("legacy f-string, DEBUG", 'legacy', logging.DEBUG),
+        ("full, DEBUG",            'full',    logging.DEBUG),
+        ("sampled, DEBUG",         'sampled', logging.DEBUG),
+        ("off, DEBUG",             'off',     logging.DEBUG),
+        ("any mode, INFO",         'full',    logging.INFO),
+    ]
+    print()
+    print(f"{'case':<24} {'frames/s':>12} {'lines emitted':>14}")
+    baseline = None
+    for label, mode, level in cases:
+        rate, emitted = run(args.frames, mode, level)
+        baseline = baseline or rate
+        print(f"{label:<24} {rate:>12,.0f} {emitted:>14}   ({rate / baseline:.1f}× legacy)")
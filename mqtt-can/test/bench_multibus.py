@@ -0,0 +1,98 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import logging
+import threading
+import time
+
+import can
+
+from settings import config
+from bridge.gateway import Gateway
+
+# ——— Logging Setup ———————————————————————————————————————————————
+logging.basicConfig(
+    level=logging.WARNING,
+    format='[%(asctime)s] %(levelname)s:%(name)s: %(message)s',
+    datefmt='%H:%M:%S'
+)
+logger = logging.getLogger("test.bench_multibus")
+
+
+class PublishCounter:
+    """
+    Thread-safe stand-in for the shared client.publish().
+    """
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, topic, payload):
+        with self._lock:
+            self.count += 1
+
+
+def run(channels, frames, interface, mode, channel_fmt):
+    names = []
+    for i in range(channels):
+        name = f"bench{i}"
+        config[f"bus:{name}"] = {"interface": interface, "channel": channel_fmt.format(i=i)}
+        names.append(name)
+
+    counter = PublishCounter()
+    gateway = Gateway(counter, mode=mode, names=names, stats_interval=0)
+    gateway.start()
+    time.sleep(0.5 if mode == 'process' else 0.0)
+
+    senders = [can.Bus(interface=interface, channel=channel_fmt.format(i=i)) for i in range(channels)]
+
+    def send_all(sender):
+        for i in range(frames):
+            sender.send(can.Message(arbitration_id=0x100 + (i & 0xFF), data=i.to_bytes(4, 'little'),
+                                    is_extended_id=False))
+
+    threads = [threading.Thread(target=send_all, args=(s,)) for s in senders]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = frames * channels
+    deadline = time.monotonic() + 30.0
+    while time.monotonic() < deadline:
+        dropped = sum(w.stats()["dropped"] for w in gateway.workers)
+        if counter.count + dropped >= total:
+            break
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - t0
+
+    gateway.stop()
+    for s in senders:
+        s.shutdown()
+    for name in names:
+        config.remove_section(f"bus:{name}")
+    return counter.count / elapsed, dropped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway throughput vs. number of CAN channels")
+    parser.add_argument("--max-channels", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=20000, help="frames per channel")
+    parser.add_argument("--interface", default="virtual")
+    parser.add_argument("--channel-fmt", default="vbench{i}", help="channel name per bus, e.g. vcan{i} for socketcan")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread",
+                        help="process mode needs a non-virtual interface such as socketcan")
+    args = parser.parse_args()
+
+    print(f"{'channels':>8} {'frames/s':>12} {'per channel':>12} {'scaling':>8} {'dropped':>8}")
+    base = None
+    for n in range(1, args.max_channels + 1):
+        rate, dropped = run(n, args.frames, args.interface, args.mode, args.channel_fmt)
+        base = base or rate
+        print(f"{n:>8} {rate:>12,.0f} {rate / n:>12,.0f} {rate / base:>7.2f}x {dropped:>8}")
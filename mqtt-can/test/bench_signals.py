@@ -0,0 +1,134 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import math
+import random
+import time
+
+import can
+
+from bridge.signals import FrameDecoder, SignalDecoder, SignalDef, _from_dbc, cantools
+
+
+def synthetic_decoders(messages, signals):
+    """
+    `messages` IDs with `signals` equal-width signals each, alternating byte order.
+    """
+    width = 64 // signals
+    decoders = {}
+    for m in range(messages):
+        sigs = []
+        for s in range(signals):
+            little = s % 2 == 0
+            start = s * width if little else _motorola_start(s * width)
+            sigs.append(SignalDef(f"S{s}", start,
+                                  width, little_endian=little, signed=s % 3 == 0,
+                                  scale=0.1, offset=-40.0))
+        decoders[0x100 + m] = FrameDecoder(f"M{m}", 8, sigs, "can/signal")
+    return decoders
+
+
+def _motorola_start(msb_offset):
+    """
+    DBC start bit for a big-endian signal whose MSB sits `msb_offset` bits
+    into the frame, counting from the first byte's MSB.
+    """
+    byte, bit = divmod(msb_offset, 8)
+    return byte * 8 + (7 - bit)
+
+
+def _rate(label, frames, signals, elapsed):
+    print(f"{label:<20}: {frames / elapsed:>12,.0f} frames/s {signals / elapsed:>14,.0f} signals/s")
+
+
+def run(frames, messages, signals, dbc):
+    if dbc:
+        decoders = _from_dbc(dbc, "can/signal")
+    else:
+        decoders = synthetic_decoders(messages, signals)
+    ids = list(decoders)
+    db = cantools.database.load_file(dbc) if dbc and cantools is not None else None
+    pool = []
+    rejected = 0
+    while len(pool) < 1024:
+        can_id = random.choice(ids)
+        msg = can.Message(arbitration_id=can_id, timestamp=time.time(),
+                          data=bytes(random.randrange(256) for _ in range(decoders[can_id].frame_len)))
+        if db is not None:
+            # cantools rejects frames whose multiplexer value the DBC does
+            # not define; keep the pool decodable by both
+            try:
+                db.decode_message(can_id, msg.data, decode_choices=False)
+            except cantools.database.DecodeError:
+                rejected += 1
+                if rejected > 100000:
+                    raise SystemExit("cantools rejects nearly every random frame of this DBC")
+                continue
+        pool.append(msg)
+
+    n = 0
+    t0 = time.perf_counter()
+    for i in range(frames):
+        msg = pool[i & 1023]
+        n += len(decoders[msg.arbitration_id].decode(msg.data))
+    _rate("decode only", frames, n, time.perf_counter() - t0)
+
+    for mode in ("signal", "record"):
+        decoder = SignalDecoder(decoders, mode=mode)
+        t0 = time.perf_counter()
+        for i in range(frames):
+            decoder.publications(pool[i & 1023])
+        _rate(f"decode + {mode}", frames, decoder.decoded_signals, time.perf_counter() - t0)
+
+    if db is not None:
+        n = 0
+        t0 = time.perf_counter()
+        for i in range(frames):
+            msg = pool[i & 1023]
+            n += len(db.decode_message(msg.arbitration_id, msg.data, decode_choices=False))
+        _rate("cantools reference", frames, n, time.perf_counter() - t0)
+        check_against_cantools(decoders, db, pool)
+
+
+def check_against_cantools(decoders, db, pool):
+    """
+    Compare every signal of the frame pool with cantools.decode_message.
+    Signals only one side decodes (e.g. a multiplexed signal the switch
+    does not select) count as mismatches.
+    """
+    checked = mismatched = 0
+
+    def mismatch(can_id, name, ours, theirs):
+        nonlocal mismatched
+        mismatched += 1
+        if mismatched <= 10:
+            print(f"  mismatch 0x{can_id:X} {name}: {ours!r} != cantools {theirs!r}")
+
+    for msg in pool:
+        expected = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
+        decoded = {name: value for name, value, _topic in decoders[msg.arbitration_id].decode(msg.data)}
+        for name in decoded.keys() | expected.keys():
+            checked += 1
+            value, reference = decoded.get(name), expected.get(name)
+            if value is None or reference is None:
+                mismatch(msg.arbitration_id, name, value, reference)
+            elif not math.isclose(value, reference, rel_tol=1e-9, abs_tol=1e-9) \
+                    and not (math.isnan(value) and math.isnan(reference)):
+                mismatch(msg.arbitration_id, name, value, reference)
+    print(f"{'cantools check':<20}: {checked:,} signal values, {mismatched:,} mismatched")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Signal decoding throughput (decoded signals per second)")
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--messages", type=int, default=50, help="synthetic message count")
+    parser.add_argument("--signals", type=int, default=8, help="synthetic signals per message")
+    parser.add_argument("--dbc", help="benchmark a real DBC (and compare with cantools.decode_message)")
+    args = parser.parse_args()
+    run(args.frames, args.messages, args.signals, args.dbc)
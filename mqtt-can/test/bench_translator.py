@@ -0,0 +1,41 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import time
+
+import can
+
+from bridge.translator import can_to_mqtt, mqtt_to_can, FORMATS
+
+
+def bench(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+def run(n):
+    msg = can.Message(arbitration_id=0x123, data=bytes(range(8)),
+                      is_extended_id=False, timestamp=time.time())
+    print(f"{'format':<8} {'bytes':>6} {'CAN→MQTT/s':>14} {'MQTT→CAN/s':>14}")
+    for fmt in FORMATS:
+        topic, payload = can_to_mqtt(msg, fmt)
+        wire = payload if isinstance(payload, bytes) else payload.encode()
+        in_topic = topic.replace('can/out/', 'can/in/')
+        out_rate = bench(lambda: can_to_mqtt(msg, fmt), n)
+        in_rate  = bench(lambda: mqtt_to_can(in_topic, wire, fmt), n)
+        print(f"{fmt:<8} {len(wire):>6} {out_rate:>14,.0f} {in_rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Translator microbenchmark (translations per second)")
+    parser.add_argument("-n", type=int, default=200000, help="iterations per measurement")
+    args = parser.parse_args()
+    run(args.n)
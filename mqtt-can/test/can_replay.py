@@ -0,0 +1,118 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import logging
+import threading
+import time
+
+import can
+
+from canbus.can_interface import iface, channel
+from canbus.capture import read_capture
+from bridge.gateway import Gateway
+
+# ——— Logging Setup ———————————————————————————————————————————————
+logging.basicConfig(
+    level=logging.WARNING,
+    format='[%(asctime)s] %(levelname)s:%(name)s: %(message)s',
+    datefmt='%H:%M:%S'
+)
+logger = logging.getLogger("test.replay")
+
+
+class PublishCounter:
+    """
+    Stand-in for client.publish() so the load test measures the gateway,
+    not the broker.
+    """
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, topic, payload):
+        with self._lock:
+            self.count += 1
+
+
+def replay(path, speed, bus):
+    """
+    Send a capture on `bus`, preserving inter-frame gaps divided by `speed`
+    (speed 0 = as fast as possible). Returns (frames, seconds).
+    """
+    frames = 0
+    first_ts = None
+    t0 = time.perf_counter()
+    for msg in read_capture(path):
+        if speed and first_ts is None:
+            first_ts = msg.timestamp
+        if speed:
+            delay = (msg.timestamp - first_ts) / speed - (time.perf_counter() - t0)
+            if delay > 0:
+                time.sleep(delay)
+        bus.send(can.Message(arbitration_id=msg.arbitration_id, data=msg.data,
+                             is_extended_id=msg.is_extended_id, is_fd=msg.is_fd,
+                             is_remote_frame=msg.is_remote_frame))
+        frames += 1
+    return frames, time.perf_counter() - t0
+
+
+def run(path, speed, external):
+    counter = None
+    gateway = None
+    if not external:
+        counter = PublishCounter()
+        gateway = Gateway(counter, mode='thread', names=['default'])
+        gateway.start()
+
+    sender = can.Bus(interface=iface, channel=channel)
+    frames, sent_in = replay(path, speed, sender)
+    t_sent = time.perf_counter()
+
+    if gateway is not None:
+        fwd = gateway.workers[0].forwarder
+        deadline = time.monotonic() + 10.0
+        st = fwd.stats
+        while st.received < frames or fwd.queue_depth():
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        drained = time.perf_counter() - t_sent
+        gateway.stop()
+        stats = fwd.stats.snapshot()
+    sender.shutdown()
+
+    label = "max" if not speed else f"{speed:g}x"
+    print()
+    print(f"replayed           : {frames} frames at {label} in {sent_in:.3f}s ({frames / sent_in:,.0f} frames/s)")
+    if gateway is None:
+        print("gateway            : external (watch its stats log for throughput and drops)")
+        return
+    total = sent_in + drained
+    print(f"gateway received   : {stats['received']} (lost before gateway: {frames - stats['received']})")
+    print(f"forwarded          : {stats['published']} ({stats['published'] / total:,.0f} frames/s sustained)")
+    print(f"mqtt messages      : {counter.count}")
+    print(f"dropped/filtered/suppressed: {stats['dropped']} / {stats['filtered']} / {stats['suppressed']}")
+    print(f"latency p50/p99/max: {stats['latency_p50_ms']:.3f} / {stats['latency_p99_ms']:.3f} / "
+          f"{stats['latency_max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a CAN capture into the gateway as a load test")
+    parser.add_argument("path", help="capture file (.blf/.asc/... or compact binary)")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale: 1 = real time, N = N× faster, 0 = max")
+    parser.add_argument("--external", action="store_true",
+                        help="only inject frames; measure a gateway already running on the same bus "
+                             "(needs a shared interface such as socketcan or udp_multicast)")
+    args = parser.parse_args()
+    if args.external and iface == 'virtual':
+        # A virtual bus only exists inside one process: a gateway running
+        # elsewhere would never see the injected frames
+        parser.error("--external cannot reach another process over the 'virtual' interface; "
+                     "configure socketcan (e.g. vcan0) or udp_multicast in can_config.ini")
+    run(args.path, args.speed, args.external)
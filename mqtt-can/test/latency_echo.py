@@ -0,0 +1,67 @@
+"""
+Gateway under test for the latency suite (sensor-data-logger-visualizer/
+verify_mqtt.py bench): the real gateway, wired as main.py does, plus an echo
+node on a second handle of the same virtual bus. A frame the gateway writes
+for can/in/<in-id> comes straight back as <out-id>, which the gateway reads
+and publishes on its can/out topic, so one probe crosses MQTT→CAN→MQTT.
+Runs until stdin closes.
+"""
+
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import logging
+import threading
+
+import can
+
+from framelog import configure_logging
+from canbus.can_interface import iface, channel
+from mqtt.mqtt_client import connect, client
+from bridge.gateway import Gateway
+
+configure_logging()
+logger = logging.getLogger("test.latency_echo")
+
+
+def echo(bus, in_id, out_id, stop):
+    while not stop.is_set():
+        msg = bus.recv(0.2)
+        if msg is not None and msg.arbitration_id == in_id:
+            bus.send(can.Message(arbitration_id=out_id, data=msg.data, is_extended_id=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway with a CAN echo node for latency probes")
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--in-id", type=lambda v: int(v, 0), default=0x7A0, help="probe ID written by the gateway")
+    parser.add_argument("--out-id", type=lambda v: int(v, 0), default=0x7A1, help="ID echoed back to it")
+    args = parser.parse_args()
+
+    echo_bus = can.Bus(interface=iface, channel=channel)
+    stop = threading.Event()
+    echo_thread = threading.Thread(target=echo, args=(echo_bus, args.in_id, args.out_id, stop), daemon=True)
+    echo_thread.start()
+
+    gateway = Gateway(client.publish, mode='thread')
+    connect(args.broker, args.port)
+    gateway.start()
+    logger.info(f"Echoing 0x{args.in_id:X} as 0x{args.out_id:X} on {iface}/{channel}")
+    try:
+        sys.stdin.read()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        echo_thread.join()
+        gateway.stop()
+        client.loop_stop()
+        client.disconnect()
+        echo_bus.shutdown()
@@ -0,0 +1,121 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import logging
+import random
+import threading
+import time
+
+import can
+import paho.mqtt.client as mqtt
+
+import mqtt.mqtt_client as mqtt_client
+from canbus.can_interface import bus, iface, channel
+from canbus.can_writer import CanWriter
+
+# ——— Logging Setup ———————————————————————————————————————————————
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] %(levelname)s:%(name)s: %(message)s',
+    datefmt='%H:%M:%S'
+)
+logger = logging.getLogger("test.stress")
+
+
+class SlowBus:
+    """
+    Wraps a python-can bus to emulate a congested TX buffer: every send()
+    takes `delay` seconds and fails with can.CanError at `error_rate`.
+    """
+    def __init__(self, bus, delay=0.0, error_rate=0.0):
+        self._bus = bus
+        self._delay = delay
+        self._error_rate = error_rate
+
+    def send(self, msg, timeout=None):
+        if self._delay:
+            time.sleep(self._delay)
+        if self._error_rate and random.random() < self._error_rate:
+            raise can.CanOperationError("Transmit buffer full (simulated)")
+        self._bus.send(msg, timeout)
+
+
+class LocalBroker:
+    """
+    Broker stand-in: delivers PUBLISH packets to the gateway's on_message()
+    from a single thread, exactly as paho's network loop would, and records
+    how long each callback blocks that loop.
+    """
+    def __init__(self):
+        self.callback_times = []
+
+    def deliver(self, topic, payload):
+        msg = mqtt.MQTTMessage(topic=topic.encode())
+        msg.payload = payload
+        t0 = time.perf_counter()
+        mqtt_client.on_message(mqtt_client.client, None, msg)
+        self.callback_times.append(time.perf_counter() - t0)
+
+
+def run(bursts, burst_size, gap, tx_delay, error_rate, queue_size):
+    writer = CanWriter(SlowBus(bus, tx_delay, error_rate), queue_size=queue_size)
+    mqtt_client.writer = writer
+    writer.start()
+
+    received = []
+    sniffer = can.Bus(interface=iface, channel=channel)
+    notifier = can.Notifier(sniffer, [received.append], timeout=0.1)
+
+    broker = LocalBroker()
+    ids = [0x080, 0x100, 0x200, 0x300, 0x7FF]
+
+    def network_loop():
+        for _ in range(bursts):
+            for i in range(burst_size):
+                can_id = random.choice(ids)
+                broker.deliver(f"can/in/{hex(can_id)}", i.to_bytes(4, 'big').hex().encode())
+            time.sleep(gap)
+
+    logger.info(f"Injecting {bursts} bursts × {burst_size} msgs over can/in/# "
+                f"(tx_delay={tx_delay * 1e6:.0f}µs, error_rate={error_rate:.1%})")
+    t0 = time.perf_counter()
+    loop = threading.Thread(target=network_loop, name="paho-loop-standin")
+    loop.start()
+    loop.join()
+    t_injected = time.perf_counter() - t0
+    writer.stop(timeout=60.0)
+    t_total = time.perf_counter() - t0
+    time.sleep(0.2)
+    notifier.stop()
+    sniffer.shutdown()
+
+    cb = sorted(broker.callback_times)
+    pick = lambda p: cb[min(len(cb) - 1, int(p / 100.0 * (len(cb) - 1)))] * 1e6
+    st = writer.stats.snapshot()
+    total = bursts * burst_size
+    print()
+    print(f"messages injected   : {total} in {t_injected:.3f}s")
+    print(f"on_message p50/p99/max: {pick(50):.1f} / {pick(99):.1f} / {cb[-1] * 1e6:.1f} µs (network loop blocked)")
+    print(f"writer              : sent={st['sent']} dropped={st['dropped']} failed={st['failed']} "
+          f"retries={st['retries']} max_depth={st['max_depth']}")
+    print(f"write latency p50/p99: {st['write_p50_ms']:.3f} / {st['write_p99_ms']:.3f} ms")
+    print(f"frames on bus       : {len(received)} ({len(received) / t_total:,.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Burst stress test for the MQTT→CAN write path")
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=500)
+    parser.add_argument("--gap-ms", type=float, default=50.0)
+    parser.add_argument("--tx-delay-us", type=float, default=50.0, help="simulated per-frame TX time")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="fraction of sends raising CanError")
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.bursts, args.burst_size, args.gap_ms / 1000.0,
+        args.tx_delay_us / 1e6, args.error_rate, args.queue_size)
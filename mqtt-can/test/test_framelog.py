@@ -0,0 +1,34 @@
+import os
+import sys
+
+# ── Ensure project root is on sys.path so imports resolve correctly ─────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import logging
+
+from framelog import FrameLog
+
+
+def _flog(sample_every):
+    logger = logging.getLogger(f"test.framelog.{sample_every}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    # first_per_id=0: only the 1-in-N sampling decides
+    return FrameLog(logger, mode='sampled', sample_every=sample_every, first_per_id=0)
+
+
+def test_sample_every_one_logs_every_frame():
+    flog = _flog(1)
+    for i in range(10):
+        flog(0x100, "frame %d", i)
+    assert flog.emitted == 10
+
+
+def test_sample_every_n_logs_first_and_every_nth():
+    flog = _flog(4)
+    for i in range(10):
+        flog(0x100, "frame %d", i)
+    # Frames 1, 5 and 9
+    assert flog.emitted == 3
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Append rate and get_series() latency: NumPy ring buffer vs. the original
+deque-based CircularBuffer, at several capacities.
+"""
+
+import argparse
+import collections
+import statistics
+import threading
+import time
+from typing import Deque, Tuple
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+
+
+class DequeBuffer:
+    """The original deque-backed CircularBuffer, kept here as the baseline."""
+    def __init__(self, maxlen: int = 1000):
+        self._lock = threading.Lock()
+        self._times: Deque[float] = collections.deque(maxlen=maxlen)
+        self._values: Deque[float] = collections.deque(maxlen=maxlen)
+
+    def append(self, timestamp: float, value: float):
+        with self._lock:
+            self._times.append(timestamp)
+            self._values.append(value)
+
+    def get_series(self) -> Tuple[list[float], list[float]]:
+        with self._lock:
+            return list(self._times), list(self._values)
+
+
+def fill(buf, n: int):
+    for i in range(n):
+        buf.append(float(i), float(i))
+
+
+def bench_append(cls, maxlen: int, n: int) -> float:
+    buf = cls(maxlen=maxlen)
+    t0 = time.perf_counter()
+    fill(buf, n)
+    return n / (time.perf_counter() - t0)
+
+
+def bench_extend(maxlen: int, n: int, chunk: int) -> float:
+    buf = CircularBuffer(maxlen=maxlen)
+    times = np.arange(chunk, dtype=np.float64)
+    t0 = time.perf_counter()
+    for _ in range(n // chunk):
+        buf.extend(times, times)
+    return (n // chunk) * chunk / (time.perf_counter() - t0)
+
+
+def bench_read(buf, read, repeats: int) -> float:
+    """Median latency in ms of read(buf), which includes the relative-time
+    transform done by PlotView.update_plot."""
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        read(buf)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e3
+
+
+def read_deque(buf):
+    times, values = buf.get_series()
+    if times:
+        t0 = times[0]
+        return [t - t0 for t in times]
+
+
+def read_numpy(buf):
+    times, values = buf.get_series()
+    if len(times):
+        return times - times[0]
+
+
+def read_view(buf):
+    times, values = buf.view()
+    if len(times):
+        return times - times[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--appends", type=int, default=500000)
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"\nappend rate ({args.appends} samples)")
+    for maxlen in (1000, 1000000):
+        print(f"  maxlen={maxlen:<9} deque {bench_append(DequeBuffer, maxlen, args.appends):>12,.0f}/s"
+              f"   numpy {bench_append(CircularBuffer, maxlen, args.appends):>12,.0f}/s"
+              f"   numpy extend(100) {bench_extend(maxlen, args.appends, 100):>14,.0f}/s")
+
+    print("\nget_series + relative time (median ms)")
+    print(f"  {'maxlen':>9} {'deque':>10} {'numpy copy':>11} {'numpy view':>11}")
+    for maxlen in (int(s) for s in args.sizes.split(",")):
+        old, new = DequeBuffer(maxlen), CircularBuffer(maxlen)
+        fill(old, maxlen)
+        new.extend(np.arange(maxlen, dtype=np.float64), np.arange(maxlen, dtype=np.float64))
+        print(f"  {maxlen:>9} {bench_read(old, read_deque, args.repeats):>10.3f}"
+              f" {bench_read(new, read_numpy, args.repeats):>11.3f}"
+              f" {bench_read(new, read_view, args.repeats):>11.3f}")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Cost of preparing one plot refresh from a full buffer: all raw points vs.
+one-shot min/max decimation vs. the incremental Decimator cache, each after
+a burst of new samples. Also checks that peaks survive decimation.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+from decimate import Decimator, minmax_decimate
+
+
+def median_ms(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000,4000000")
+    parser.add_argument("--width", type=int, default=1000, help="plot width in pixels")
+    parser.add_argument("--burst", type=int, default=100, help="new samples between refreshes")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    target = 2 * args.width
+    rng = np.random.default_rng(0)
+
+    print(f"\nper-refresh cost in ms (target {target} points, {args.burst} new samples per refresh)")
+    print(f"  {'maxlen':>9} {'raw':>9} {'one-shot':>9} {'cached':>9} {'points':>7} {'peaks kept':>10}")
+    for maxlen in (int(s) for s in args.sizes.split(",")):
+        buf = CircularBuffer(maxlen)
+        buf.extend(np.arange(maxlen, dtype=np.float64), rng.normal(size=maxlen))
+        decimator = Decimator(target)
+        decimator.series(buf)      # build the cache once
+        clock = [float(maxlen)]
+
+        def burst():
+            t = np.arange(clock[0], clock[0] + args.burst)
+            clock[0] += args.burst
+            values = rng.normal(size=args.burst)
+            values[args.burst // 2] = 100.0 + clock[0]   # a spike per burst
+            buf.extend(t, values)
+
+        def raw():
+            burst()
+            times, values = buf.get_series()
+            return times - times[0], values
+
+        def one_shot():
+            burst()
+            times, values = buf.get_series()
+            return minmax_decimate(times, values, target)
+
+        def cached():
+            burst()
+            times, values = decimator.series(buf)
+            return times - times[0], values
+
+        r = median_ms(raw, args.repeats)
+        o = median_ms(one_shot, args.repeats)
+        c = median_ms(cached, args.repeats)
+        times, values = decimator.series(buf)
+        all_t, all_v = buf.get_series()
+        kept = values.max() == all_v.max() and values.min() == all_v[all_t >= times[0]].min()
+        print(f"  {maxlen:>9} {r:>9.3f} {o:>9.3f} {c:>9.3f} {len(times):>7} {'yes' if kept else 'NO':>10}")
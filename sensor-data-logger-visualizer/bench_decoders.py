@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Decoded messages per second for each payload format: the decoder alone and
+the full MQTTClient._on_message path (decode + dispatch into a
+CircularBuffer). Batch formats carry --batch samples per message.
+"""
+
+import argparse
+import json
+import struct
+import time
+
+import paho.mqtt.client as mqtt
+
+import numpy as np
+
+import decoders
+from data_buffer import CircularBuffer
+from decoders import JsonDecoder, NumericDecoder, Samples, StructDecoder, make_decoder
+from mqtt_client import MQTTClient
+
+BATCH = 100
+
+
+def payloads(kind: str, count: int) -> list[bytes]:
+    values = [20.0 + (i % 1000) * 0.01 for i in range(count)]
+    if kind == "json-batch":
+        return [json.dumps({"samples": [[1.7e9 + i + j * 0.01, v] for j in range(BATCH)]}).encode()
+                for i, v in enumerate(values)]
+    if kind == "binary-batch":
+        block = np.column_stack((1.7e9 + np.arange(BATCH) * 0.01, np.full(BATCH, 21.5)))
+        return [block.tobytes()] * count
+    if kind in ("json", "json-stdlib"):
+        return [json.dumps({"value": v}).encode() for v in values]
+    if kind == "json-nested":
+        return [json.dumps({"sensor": {"id": 7, "readings": [{"value": v, "unit": "C"}]}}).encode()
+                for v in values]
+    if kind == "numeric":
+        return [repr(v).encode() for v in values]
+    if kind == "struct":
+        return [struct.pack("<Qd", i, v) for i, v in enumerate(values)]
+    if kind == "msgpack":
+        import msgpack
+        return [msgpack.packb({"value": v}) for v in values]
+    if kind == "cbor":
+        import cbor2
+        return [cbor2.dumps({"value": v}) for v in values]
+    raise ValueError(kind)
+
+
+def decoder_for(kind: str):
+    if kind == "json":
+        return JsonDecoder("value")
+    if kind == "json-stdlib":
+        return JsonDecoder("value", loads=json.loads)
+    if kind == "json-nested":
+        return JsonDecoder("sensor.readings.0.value")
+    if kind == "numeric":
+        return NumericDecoder()
+    if kind == "struct":
+        return StructDecoder("<Qd", 1)
+    return make_decoder(kind)
+
+
+def buffer_handler(buf: CircularBuffer):
+    def handler(topic, value):
+        if isinstance(value, Samples):
+            buf.extend(value.times, value.values)
+        else:
+            buf.append(0.0, value)
+    return handler
+
+
+def rate(fn, items: list, repeats: int) -> float:
+    best = 0.0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = max(best, len(items) / (time.perf_counter() - started))
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=BATCH, help="samples per batch message")
+    args = parser.parse_args()
+    BATCH = args.batch
+
+    print(f"\nJSON backend: {decoders.JSON_BACKEND}")
+    print(f"{'format':<13} {'bytes':>6} {'decode/s':>12} {'on_message/s':>13} {'samples/s':>12}")
+    for kind in ("json-stdlib", "json", "json-nested", "numeric", "struct", "msgpack", "cbor",
+                 "json-batch", "binary-batch"):
+        try:
+            decoder = decoder_for(kind)
+            data = payloads(kind, args.messages)
+        except (ImportError, RuntimeError) as e:
+            print(f"{kind:<13} skipped ({e})")
+            continue
+        client = MQTTClient(broker="localhost")
+        client.register_handler("bench/topic", buffer_handler(CircularBuffer(100000)), decoder=decoder)
+        messages = []
+        for payload in data:
+            msg = mqtt.MQTTMessage(topic=b"bench/topic")
+            msg.payload = payload
+            messages.append(msg)
+        on_message = client._on_message
+        decode_rate = rate(decoder, data, args.repeats)
+        dispatch_rate = rate(lambda m: on_message(None, None, m), messages, args.repeats)
+        assert client.bad_payloads == 0 and client.errors == 0
+        per_message = BATCH if kind.endswith("batch") else 1
+        print(f"{kind:<13} {len(data[0]):>6} {decode_rate:>12,.0f} {dispatch_rate:>13,.0f} "
+              f"{dispatch_rate * per_message:>12,.0f}")
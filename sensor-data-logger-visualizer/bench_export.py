@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Streaming export benchmark: rows/s and peak RSS of export_merged() from a
+SampleStore, for growing history sizes. Each size runs in a fresh process;
+peak memory should stay flat while the export size grows.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from export import Source, export_merged
+from storage import SampleStore
+
+
+def fill(store: SampleStore, topics: list[str], samples: int, t0: float):
+    """
+    Write `samples` per topic at slightly different rates so the as-of
+    merge has to interleave them.
+    """
+    rng = np.random.default_rng(0)
+    conn = store._connect()
+    block = 20000
+    for n, topic in enumerate(topics):
+        step = 1.0 + 0.1 * n
+        for i in range(0, samples, block):
+            k = min(block, samples - i)
+            times = t0 + (i + np.arange(k)) * step
+            store._write(conn, list(zip([topic] * k, times.tolist(), rng.normal(size=k).tolist())))
+
+
+def run_one(size: int, topics: list[str], fmt: str, workdir: str):
+    store = SampleStore(os.path.join(workdir, f"{size}.db"))
+    fill(store, topics, size, 0.0)
+    out = os.path.join(workdir, f"{size}.{fmt}")
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    sources = [Source.from_store(t, store, 0.0, float("inf")) for t in topics]
+    rows = export_merged(sources, out, fmt)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss   # KiB on Linux
+    print(f"{size:>13} {rows:>10} {elapsed:>8.2f} {rows / elapsed:>10,.0f} "
+          f"{peak / 1024:>8.1f} {(peak - before) / 1024:>9.1f} {os.path.getsize(out) / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,400000,1600000", help="samples per topic")
+    parser.add_argument("--topics", type=int, default=3)
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    topics = [f"sensor/t{i}" for i in range(args.topics)]
+
+    if args.one:
+        run_one(args.one, topics, args.format, args.workdir)
+        sys.exit(0)
+
+    workdir = tempfile.mkdtemp()
+    print(f"\n{'samples/topic':>13} {'rows':>10} {'seconds':>8} {'rows/s':>10} "
+          f"{'peak MB':>8} {'export MB':>9} {'file MB':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        subprocess.run([sys.executable, __file__, "--one", str(size), "--topics", str(args.topics),
+                        "--format", args.format, "--workdir", workdir], check=True)
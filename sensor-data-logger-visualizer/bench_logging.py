@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Per-message logging overhead on the ingest path (MQTTClient._on_message →
+handler → CircularBuffer.append), without a broker or a GUI.
+
+Compares full per-message DEBUG logging, sampled logging and logging off.
+Log output goes through a real formatter to /dev/null.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+import paho.mqtt.client as mqtt
+
+import mqtt_client
+from mqtt_client import MQTTClient
+from data_buffer import CircularBuffer
+from log_sampling import LOG_FORMAT, SampledLogger
+
+handler = logging.StreamHandler(open(os.devnull, "w"))
+handler.setFormatter(logging.Formatter(LOG_FORMAT))
+logging.basicConfig(level=logging.DEBUG, handlers=[handler])
+logger = logging.getLogger("bench_logging")
+
+
+def make_messages(topics: list[str], count: int) -> list[mqtt.MQTTMessage]:
+    msgs = []
+    for i in range(count):
+        msg = mqtt.MQTTMessage(topic=topics[i % len(topics)].encode())
+        msg.payload = json.dumps({"value": 20.0 + (i % 100) * 0.1}).encode()
+        msgs.append(msg)
+    return msgs
+
+
+def run(messages: int, mode: str, level: int, topics: list[str]) -> tuple[float, int]:
+    logging.getLogger().setLevel(level)
+    mqtt_client.slog.mode = mode
+    handler_log = SampledLogger(logging.getLogger("ui"), mode=mode)
+
+    client = MQTTClient(broker="localhost")
+    buffers = {t: CircularBuffer(maxlen=1000) for t in topics}
+
+    def on_value(topic: str, value: float):
+        ts = time.time()
+        buffers[topic].append(ts, value)
+        handler_log(topic, "MainWindow: Buffered value %s for topic %s at %s", value, topic, ts)
+    for topic in topics:
+        client.register_handler(topic, on_value)
+
+    msgs = make_messages(topics, 4096)
+    before = mqtt_client.slog.emitted
+    t0 = time.perf_counter()
+    for i in range(messages):
+        client._on_message(None, None, msgs[i & 4095])
+    elapsed = time.perf_counter() - t0
+    emitted = mqtt_client.slog.emitted - before + handler_log.emitted
+    return messages / elapsed, emitted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=3)
+    args = parser.parse_args()
+    topics = [f"sensor/t{i}" for i in range(args.topics)]
+
+    cases = [
+        ("full, DEBUG", "full", logging.DEBUG),
+        ("sampled, DEBUG", "sampled", logging.DEBUG),
+        ("off, DEBUG", "off", logging.DEBUG),
+        ("any mode, INFO", "full", logging.INFO),
+    ]
+    print(f"\n{'case':<18} {'msgs/s':>12} {'lines emitted':>14}")
+    baseline = None
+    for label, mode, level in cases:
+        rate, emitted = run(args.messages, mode, level, topics)
+        baseline = baseline or rate
+        print(f"{label:<18} {rate:>12,.0f} {emitted:>14}   ({rate / baseline:.1f}× full)")
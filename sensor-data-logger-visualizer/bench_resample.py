@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Aligned-frame cost per plot refresh: Resampler fed only the new samples of
+two topics (plus a derived dew point) versus resampling the whole window of
+both buffers with resample(), for each mode and growing windows.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+from resample import MODES, Resampler, dew_point, resample
+
+TOPICS = ("sensor/temperature", "sensor/humidity")
+
+
+def one_shot(buffers, step, window, mode):
+    series = {t: buf.get_series() for t, buf in buffers.items()}
+    newest = max(times[-1] for times, _ in series.values())
+    last = int(np.floor(newest / step))
+    grid = np.arange(last - int(np.ceil(window / step)) + 1, last + 1) * step
+    columns = {t: resample(times, values, grid, mode) for t, (times, values) in series.items()}
+    columns["dew point"] = dew_point(*(columns[t] for t in TOPICS))
+    return grid, columns
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100.0, help="samples per second per topic")
+    parser.add_argument("--step", type=float, default=1.0, help="grid step in seconds")
+    parser.add_argument("--windows", default="600,3600,36000", help="window lengths in seconds")
+    parser.add_argument("--batch", type=int, default=5, help="new samples per topic per refresh")
+    parser.add_argument("--refreshes", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"\n{args.rate:g} samples/s per topic, {args.batch} new samples per refresh, "
+          f"{args.step:g} s grid")
+    print(f"{'mode':>6} {'window s':>8} {'samples':>9} {'one-shot ms':>12} {'incremental ms':>15} "
+          f"{'speedup':>8} {'max diff':>9}")
+    for window in (float(w) for w in args.windows.split(",")):
+        size = int(window * args.rate)
+        total = size + args.batch * args.refreshes
+        times = np.sort(rng.uniform(0, total / args.rate, (len(TOPICS), total)), axis=1)
+        values = np.stack((20 + 5 * np.sin(times[0] / 300) + rng.normal(0, 0.2, total),
+                           55 + 10 * np.cos(times[1] / 500) + rng.normal(0, 1, total)))
+        for mode in MODES:
+            buffers = {t: CircularBuffer(maxlen=size) for t in TOPICS}
+            resampler = Resampler([], args.step, window, mode)
+            resampler.add_derived("dew point", dew_point, TOPICS)
+            for i, buf in enumerate(buffers.values()):
+                buf.extend(times[i, :size], values[i, :size])
+            resampler.update(buffers)
+            resampler.frame()
+
+            started = time.perf_counter()
+            for r in range(args.refreshes):
+                lo = size + r * args.batch
+                for i, buf in enumerate(buffers.values()):
+                    buf.extend(times[i, lo:lo + args.batch], values[i, lo:lo + args.batch])
+                if resampler.update(buffers):
+                    grid, columns = resampler.frame()
+            incremental = (time.perf_counter() - started) / args.refreshes
+
+            refreshes = max(5, args.refreshes // 100)
+            started = time.perf_counter()
+            for _ in range(refreshes):
+                full_grid, full = one_shot(buffers, args.step, window, mode)
+            full_time = (time.perf_counter() - started) / refreshes
+
+            # Compare the bins both cover, past the oldest one the buffers
+            # have partly overwritten (the incremental frame still has it whole)
+            oldest = max(buf.get_series()[0][0] for buf in buffers.values())
+            common, a, b = np.intersect1d(grid, full_grid, return_indices=True)
+            a, b = a[common >= oldest], b[common >= oldest]
+            diff = max(np.nanmax(np.abs(columns[n][a] - full[n][b]), initial=0.0) for n in columns)
+            print(f"{mode:>6} {window:>8g} {size:>9,} {full_time * 1e3:>12.3f} "
+                  f"{incremental * 1e3:>15.3f} {full_time / incremental:>7.0f}× {diff:>9.2g}")
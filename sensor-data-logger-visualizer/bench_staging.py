@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Network-thread stalls with direct buffer appends versus per-topic staging
+queues: a producer thread feeds MQTTClient._on_message at a fixed message
+rate across many topics while a "GUI" thread refreshes every frame.
+
+direct:  the handler appends to the CircularBuffer under its lock, while
+         the GUI thread copies every buffer with get_series() each frame
+staged:  the handler only enqueues (StagingQueue); the GUI thread drains
+         each topic with one extend(), then copies the buffers the same way
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+import paho.mqtt.client as mqtt
+
+from data_buffer import CircularBuffer
+from mqtt_client import MQTTClient
+from staging import StagingQueue
+
+
+def percentiles(samples_ns: list) -> str:
+    us = np.asarray(samples_ns) / 1e3
+    p50, p99, p999 = np.percentile(us, [50, 99, 99.9])
+    return f"{p50:>7.1f} {p99:>8.1f} {p999:>9.1f} {us.max():>9.0f}"
+
+
+def run(mode: str, topics: list[str], rate: int, seconds: float, burst: int,
+        frame_ms: float, maxlen: int) -> tuple[str, str, float]:
+    buffers = {t: CircularBuffer(maxlen=maxlen) for t in topics}
+    staging = {t: StagingQueue() for t in topics}
+
+    if mode == "direct":
+        def handler(topic: str, value: float):
+            buffers[topic].append(time.time(), value)
+    else:
+        def handler(topic: str, value: float):
+            staging[topic].put(time.time(), value)
+
+    client = MQTTClient(broker="localhost")
+    client.register_handler("bench/#", handler)
+    messages = []
+    for i in range(rate):
+        msg = mqtt.MQTTMessage(topic=topics[i % len(topics)].encode())
+        msg.payload = b'{"value": %d}' % i
+        messages.append(msg)
+
+    stop = threading.Event()
+    frames = []
+
+    def gui():
+        while not stop.is_set():
+            started = time.perf_counter_ns()
+            if mode == "staged":
+                for topic, queue in staging.items():
+                    batch = queue.drain()
+                    if batch is not None:
+                        buffers[topic].extend(*batch)
+            for buf in buffers.values():
+                buf.get_series()
+            frames.append(time.perf_counter_ns() - started)
+            time.sleep(frame_ms / 1000)
+
+    gui_thread = threading.Thread(target=gui, daemon=True)
+    gui_thread.start()
+
+    on_message = client._on_message
+    latencies = []
+    interval = burst / rate
+    sent = 0
+    begin = time.perf_counter()
+    next_burst = begin
+    while next_burst - begin < seconds:
+        delay = next_burst - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        for _ in range(burst):
+            msg = messages[sent % rate]
+            started = time.perf_counter_ns()
+            on_message(None, None, msg)
+            latencies.append(time.perf_counter_ns() - started)
+            sent += 1
+        next_burst += interval
+    elapsed = time.perf_counter() - begin
+    stop.set()
+    gui_thread.join()
+    assert client.errors == 0 and client.unhandled == 0
+    return percentiles(latencies), percentiles(frames), sent / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=int, default=10000, help="messages per second")
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--burst", type=int, default=100, help="messages sent back to back")
+    parser.add_argument("--frame-ms", type=float, default=10.0)
+    parser.add_argument("--maxlen", type=int, default=20000, help="buffer capacity per topic")
+    args = parser.parse_args()
+    topics = [f"bench/sensor{i}" for i in range(args.topics)]
+
+    print(f"\n{args.rate:,} msgs/s across {args.topics} topics, bursts of {args.burst}, "
+          f"frame every {args.frame_ms:g} ms, {args.maxlen:,} samples per buffer")
+    columns = f"{'p50':>7} {'p99':>8} {'p99.9':>9} {'max':>9}"
+    print(f"{'':8} {'':>9} | {'on_message (µs)':^36} | {'GUI frame (µs)':^36}")
+    print(f"{'mode':8} {'msgs/s':>9} | {columns} | {columns}")
+    for mode in ("direct", "staged"):
+        handler_stats, frame_stats, achieved = run(
+            mode, topics, args.rate, args.seconds, args.burst, args.frame_ms, args.maxlen
+        )
+        print(f"{mode:8} {achieved:>9,.0f} | {handler_stats} | {frame_stats}")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark of main.py: wall-clock time from process launch to
+MQTT ingest running, to the first sample staged, to the GUI modules loaded
+and to the window shown, plus the heaviest imports of each phase from
+`python -X importtime`. Needs a broker; a publisher keeps one topic busy
+(and retains a sample) so the first sample arrives as soon as the
+subscription is in place. Append --json results to track them over releases.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from shared_buffer import remove_stale_segments
+
+TOPIC = "sensor/temperature"
+MILESTONES = {
+    "Startup: ingest started": "ingest",
+    "First sample staged": "first sample",
+    "Startup: GUI modules loaded": "gui loaded",
+    "Startup: window shown": "window",
+}
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+class Publisher(threading.Thread):
+    def __init__(self, host: str, port: int, rate: float):
+        super().__init__(daemon=True)
+        self.client = mqtt.Client(client_id="bench-startup")
+        self.client.connect(host, port)
+        self.client.loop_start()
+        self.client.publish(TOPIC, json.dumps({"value": 20.0}), qos=1, retain=True).wait_for_publish()
+        self.interval = 1.0 / rate
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.client.publish(TOPIC, json.dumps({"value": 20.0 + time.time() % 1}))
+
+    def stop(self):
+        self.stopped.set()
+        self.client.publish(TOPIC, b"", qos=1, retain=True).wait_for_publish()
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def launch(args) -> tuple:
+    """
+    One cold start; returns ({milestone: ms since launch}, [(phase, module, cumulative µs)]).
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM=args.qpa, SENSOR_DB="", SENSOR_FRAME_LOG="off",
+               SENSOR_LOG_LEVEL="INFO", SENSOR_INGEST=args.ingest, SENSOR_LOG_STATS_INTERVAL="0")
+    here = os.path.dirname(os.path.abspath(__file__))
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-X", "importtime", "main.py"], cwd=here, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, bufsize=1)
+    timer = threading.Timer(args.timeout, proc.kill)
+    timer.start()
+    times, imports, phase, tail = {}, [], "ingest", []
+    try:
+        for line in proc.stderr:
+            now = (time.perf_counter() - started) * 1000
+            match = IMPORT_LINE.match(line)
+            if match:
+                if not match.group(3):   # top-level import
+                    imports.append((phase, match.group(4), int(match.group(2))))
+                continue
+            tail = (tail + [line.rstrip()])[-5:]
+            for text, name in MILESTONES.items():
+                if text in line and name not in times:
+                    times[name] = now
+                    if name == "ingest":
+                        phase = "gui"
+            if "window" in times and "first sample" in times:
+                break
+    finally:
+        timer.cancel()
+        proc.terminate()
+        proc.wait()
+        if args.ingest == "process":
+            # Terminated before it could unlink its shared buffers
+            time.sleep(1.5)
+            remove_stale_segments()
+    if "window" not in times and args.verbose:
+        print("  main.py stopped early:\n    " + "\n    ".join(tail))
+    return times, imports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=100.0, help="publisher messages per second")
+    parser.add_argument("--ingest", choices=("thread", "process"), default="thread")
+    parser.add_argument("--qpa", default="offscreen", help="QT_QPA_PLATFORM for the runs")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds per run")
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports listed per phase")
+    parser.add_argument("--json", metavar="FILE", help="append the medians as one JSON line")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        publisher = Publisher(args.broker, args.port, args.rate)
+    except OSError as e:
+        sys.exit(f"Cannot reach the broker at {args.broker}:{args.port}: {e}")
+    publisher.start()
+
+    results, imports = [], []
+    names = list(MILESTONES.values())
+    print(f"\nmain.py cold start, SENSOR_INGEST={args.ingest}, ms since launch")
+    print(f"{'run':>4} " + " ".join(f"{n:>13}" for n in names))
+    try:
+        for run in range(1, args.runs + 1):
+            times, imports = launch(args)
+            results.append(times)
+            print(f"{run:>4} " + " ".join(f"{times[n]:>13.1f}" if n in times else f"{'-':>13}"
+                                          for n in names))
+    finally:
+        publisher.stop()
+
+    medians = {n: statistics.median(r[n] for r in results if n in r)
+               for n in names if any(n in r for r in results)}
+    print(f"{'med':>4} " + " ".join(f"{medians[n]:>13.1f}" if n in medians else f"{'-':>13}"
+                                   for n in names))
+
+    # Imports of the last run, split at the "ingest started" milestone
+    for phase, title in (("ingest", "before ingest starts"), ("gui", "after ingest starts")):
+        phase_imports = sorted((i for i in imports if i[0] == phase), key=lambda i: -i[2])
+        total = sum(i[2] for i in phase_imports)
+        print(f"\nTop-level imports {title}: {total / 1000:.1f} ms in {len(phase_imports)} modules")
+        for _phase, module, cumulative in phase_imports[:args.top]:
+            print(f"  {cumulative / 1000:>8.1f} ms  {module}")
+
+    if args.json:
+        with open(args.json, "a") as f:
+            f.write(json.dumps({"time": time.time(), "ingest_mode": args.ingest,
+                                "runs": len(results), "median_ms": medians}) + "\n")
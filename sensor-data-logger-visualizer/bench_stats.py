@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Rolling statistics cost per plot refresh: RollingStats fed only the new
+samples versus rescanning the whole window with NumPy (mean, std, min, max,
+percentiles), for growing windows. Also reports the quantile error.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from rolling_stats import RollingStats
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def rescan(values: np.ndarray):
+    return (values.mean(), values.std(ddof=1), values.min(), values.max(),
+            *np.quantile(values, QUANTILES))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=1000.0, help="samples per second")
+    parser.add_argument("--windows", default="60,600,3600", help="window lengths in seconds")
+    parser.add_argument("--batch", type=int, default=16, help="new samples per refresh")
+    parser.add_argument("--refreshes", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"\n{args.rate:g} samples/s, {args.batch} new samples per refresh")
+    print(f"{'window s':>8} {'samples':>9} {'rescan ms':>10} {'rolling ms':>11} {'speedup':>8} "
+          f"{'µs/sample':>10} {'max q err':>10}")
+    for window in (float(w) for w in args.windows.split(",")):
+        size = int(window * args.rate)
+        total = size + args.batch * args.refreshes
+        times = np.arange(total) / args.rate
+        values = 20 + 5 * np.sin(times / 30) + rng.normal(0, 1, total)
+
+        stats = RollingStats(window)
+        stats.update(times[:size], values[:size])
+        started = time.perf_counter()
+        for i in range(args.refreshes):
+            lo = size + i * args.batch
+            stats.update(times[lo:lo + args.batch], values[lo:lo + args.batch])
+            stats.summary()
+        rolling = (time.perf_counter() - started) / args.refreshes
+
+        refreshes = max(5, args.refreshes // 100)
+        started = time.perf_counter()
+        for i in range(refreshes):
+            end = size + (i + 1) * args.batch
+            rescan(values[end - size:end])
+        full = (time.perf_counter() - started) / refreshes
+
+        window_values = values[total - len(stats):]
+        exact = np.quantile(window_values, QUANTILES)
+        error = max(abs(stats.quantile(q) - e) / abs(e) for q, e in zip(QUANTILES, exact))
+        print(f"{window:>8g} {len(stats):>9,} {full * 1e3:>10.3f} {rolling * 1e3:>11.3f} "
+              f"{full / rolling:>7.0f}× {rolling / args.batch * 1e6:>10.2f} {error:>10.4f}")
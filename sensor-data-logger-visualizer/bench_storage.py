@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+SampleStore benchmark: sustained ingest rate through add() (the path the
+MQTT handler uses) and range-query latency over a synthetic 24 h history.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from decimate import minmax_decimate
+from storage import SampleStore
+
+DAY = 24 * 3600
+
+
+def ingest(store: SampleStore, topics: list[str], rate_hz: float, seconds: float) -> tuple[int, float, float]:
+    """
+    Feed `seconds` of history at `rate_hz` per topic as fast as possible.
+    Returns (samples, seconds spent in add(), seconds until all committed).
+    """
+    step = 1.0 / rate_hz
+    t0 = time.time() - seconds
+    per_topic = int(seconds * rate_hz)
+    values = np.random.default_rng(0).normal(20.0, 2.0, size=per_topic).tolist()
+    add = store.add
+    limit = store._queue.maxsize * 3 // 4
+    started = time.perf_counter()
+    for i in range(per_topic):
+        ts = t0 + i * step
+        value = values[i]
+        for topic in topics:
+            add(topic, ts, value)
+        if i % 10000 == 0:
+            # Back off instead of overflowing: this measures sustained ingest, not drops
+            while store.queue_depth() > limit:
+                time.sleep(0.001)
+    enqueued = time.perf_counter() - started
+    while store.queue_depth() or store.written + store.dropped < per_topic * len(topics):
+        time.sleep(0.01)
+    return per_topic * len(topics), enqueued, time.perf_counter() - started
+
+
+def query_ms(store: SampleStore, topic: str, t_start: float, t_end: float, repeats: int) -> tuple[float, int]:
+    samples = []
+    rows = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        times, values = store.query(topic, t_start, t_end)
+        minmax_decimate(times, values, 2000)
+        samples.append(time.perf_counter() - started)
+        rows = len(times)
+    return statistics.median(samples) * 1e3, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topics", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=5.0, help="samples/s per topic in the synthetic history")
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--db", help="database path (default: temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    topics = [f"sensor/t{i}" for i in range(args.topics)]
+    store = SampleStore(path, queue_size=1_000_000)
+    store.start()
+    samples, enqueued, committed = ingest(store, topics, args.rate, args.hours * 3600)
+    store.close()
+    size = os.path.getsize(path) + (os.path.getsize(path + "-wal") if os.path.exists(path + "-wal") else 0)
+
+    print(f"\ningest: {samples} samples ({args.topics} topics × {args.hours:g} h at {args.rate:g} Hz)")
+    print(f"  add()     : {samples / enqueued:>12,.0f} samples/s (caller side, never blocks)")
+    print(f"  committed : {samples / committed:>12,.0f} samples/s sustained, "
+          f"{store.batches} batches, {store.dropped} dropped, {size / 1e6:.1f} MB on disk")
+
+    reader = SampleStore(path)
+    now = time.time()
+    print("\nrange query + decimation to 2000 points (median ms)")
+    for label, span in (("last 1 h", 3600), ("last 6 h", 6 * 3600), ("last 24 h", DAY)):
+        ms, rows = query_ms(reader, topics[0], now - span, now, args.repeats)
+        print(f"  {label:<10} {ms:>9.1f} ms  ({rows} rows)")
+
+    # A slow sensor flushed once per second leaves one tiny chunk per flush
+    # until compaction merges them
+    small = SampleStore(os.path.join(os.path.dirname(path), "small.db"))
+    rng = np.random.default_rng(1)
+    for second in range(DAY):
+        ts = now - DAY + second
+        small._write(small._connect(), [(topics[0], ts, float(rng.normal()))])
+    before, rows = query_ms(small, topics[0], now - DAY, now, args.repeats)
+    started = time.perf_counter()
+    small.compact(older_than=0)
+    compact_s = time.perf_counter() - started
+    after, _ = query_ms(small, topics[0], now - DAY, now, args.repeats)
+    print(f"\n1 Hz topic, one chunk per flush: last 24 h {before:.1f} ms ({rows} rows); "
+          f"after compaction ({compact_s:.1f} s) {after:.1f} ms")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Topic resolution cost versus the number of registered filters: a linear scan
+with paho's topic_matches_sub(), the TopicTrie alone, and the full
+MQTTClient._on_message path with its resolved-topic cache.
+"""
+
+import argparse
+import random
+import time
+
+import paho.mqtt.client as mqtt
+
+from decoders import NumericDecoder
+from mqtt_client import MQTTClient
+from topic_trie import TopicTrie
+
+
+def make_filters(count: int) -> list[str]:
+    """
+    Per-site wildcards plus a few exact topics, like a large deployment.
+    """
+    filters = [f"site/{i}/+/temperature" for i in range(count - count // 10)]
+    filters += [f"site/{i}/room0/humidity" for i in range(count // 10)]
+    return filters
+
+
+def make_topics(count: int, sites: int) -> list[str]:
+    rng = random.Random(0)
+    return [f"site/{rng.randrange(sites)}/room{rng.randrange(8)}/temperature" for _ in range(count)]
+
+
+def rate(fn, items: list, repeats: int) -> float:
+    best = 0.0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = max(best, len(items) / (time.perf_counter() - started))
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filters", default="10,100,1000,10000")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"\n{'filters':>8} {'linear/s':>12} {'trie/s':>12} {'on_message/s':>13}")
+    for count in (int(n) for n in args.filters.split(",")):
+        filters = make_filters(count)
+        topics = make_topics(args.messages, count - count // 10)
+
+        trie = TopicTrie()
+        for f in filters:
+            trie.insert(f, f)
+        # The linear scan is slow with many filters; time fewer messages
+        sample = topics[:max(200, args.messages * 10 // count)]
+        linear = rate(lambda t: [f for f in filters if mqtt.topic_matches_sub(f, t)], sample, 1)
+        trie_rate = rate(trie.match, topics, args.repeats)
+        assert trie.match(topics[0]) and len(trie.match(topics[0])) == 1
+
+        client = MQTTClient(broker="localhost")
+        client.set_decoder("#", NumericDecoder())
+        for f in filters:
+            client.register_handler(f, lambda topic, value: None)
+        messages = []
+        for topic in topics:
+            msg = mqtt.MQTTMessage(topic=topic.encode())
+            msg.payload = b"21.5"
+            messages.append(msg)
+        on_message = client._on_message
+        dispatch_rate = rate(lambda m: on_message(None, None, m), messages, args.repeats)
+        assert client.unhandled == 0
+        print(f"{count:>8} {linear:>12,.0f} {trie_rate:>12,.0f} {dispatch_rate:>13,.0f}")
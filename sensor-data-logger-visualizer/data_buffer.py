@@ -1,28 +1,145 @@
-import collections
 import threading
 import logging
-from typing import Deque, Tuple
+from typing import Sequence, Tuple
+
+import numpy as np
 
 # Module-level logger
 logger = logging.getLogger(__name__)
 
 class CircularBuffer:
-    """Thread-safe circular buffer for time-series data with debug logging."""
+    """
+    Thread-safe ring buffer for time-series data, backed by preallocated
+    float64 NumPy arrays.
+
+    Every sample is written twice, at `i` and `i + maxlen`, so the newest
+    `n <= maxlen` samples are always one contiguous slice of the backing
+    arrays. Appends are O(1), and a window is either a zero-copy view
+    (`view()`) or a single copy (`get_series()`, `get_range()`), never a
+    Python-level loop over the samples. Memory use is 32 bytes per sample of
+    capacity.
+
+    `version` counts every sample ever added. Readers compare it with the
+    value they last saw to skip unchanged buffers and to measure data rate.
+    """
     def __init__(self, maxlen: int = 1000):
+        if maxlen < 1:
+            raise ValueError("maxlen must be positive")
         self._lock = threading.Lock()
-        self._times: Deque[float] = collections.deque(maxlen=maxlen)
-        self._values: Deque[float] = collections.deque(maxlen=maxlen)
+        self._maxlen = maxlen
+        self._times = np.zeros(2 * maxlen, dtype=np.float64)
+        self._values = np.zeros(2 * maxlen, dtype=np.float64)
+        self._head = 0     # next write position in [0, maxlen)
+        self._count = 0    # valid samples, ≤ maxlen
+        self._version = 0  # samples ever added (monotonic)
         logger.debug("CircularBuffer created with maxlen=%d", maxlen)
 
+    @property
+    def maxlen(self) -> int:
+        return self._maxlen
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return self._count
+
     def append(self, timestamp: float, value: float):
         with self._lock:
-            self._times.append(timestamp)
-            self._values.append(value)
-        logger.debug("Appended value %s at time %s", value, timestamp)
+            h = self._head
+            m = h + self._maxlen
+            self._times[h] = self._times[m] = timestamp
+            self._values[h] = self._values[m] = value
+            self._head = h + 1 if h + 1 < self._maxlen else 0
+            if self._count < self._maxlen:
+                self._count += 1
+            self._version += 1
+
+    def extend(self, timestamps: Sequence[float], values: Sequence[float]):
+        """
+        Append many samples at once, under a single lock acquisition.
+        Only the newest `maxlen` samples are kept if more are given.
+        """
+        times = np.asarray(timestamps, dtype=np.float64)
+        vals = np.asarray(values, dtype=np.float64)
+        if times.shape != vals.shape or times.ndim != 1:
+            raise ValueError("timestamps and values must be 1-D sequences of equal length")
+        cap = self._maxlen
+        added = len(times)
+        if added > cap:
+            times, vals = times[-cap:], vals[-cap:]
+        k = len(times)
+        if not k:
+            return
+        with self._lock:
+            h = self._head
+            first = min(k, cap - h)
+            rest = k - first
+            for buf, src in ((self._times, times), (self._values, vals)):
+                buf[h:h + first] = src[:first]
+                buf[h + cap:h + cap + first] = src[:first]
+                if rest:
+                    buf[:rest] = src[first:]
+                    buf[cap:cap + rest] = src[first:]
+            self._head = (h + k) % cap
+            self._count = min(cap, self._count + k)
+            self._version += added
+
+    def _bounds(self, last_n: int = None) -> Tuple[int, int]:
+        n = self._count if last_n is None else max(0, min(last_n, self._count))
+        end = self._head + self._maxlen
+        return end - n, end
+
+    def view(self, last_n: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Zero-copy, read-only views of the newest `last_n` samples (all by
+        default). The views alias the live buffer: a later append overwrites
+        the oldest element, so use them immediately or use get_series().
+        """
+        with self._lock:
+            start, end = self._bounds(last_n)
+            times = self._times[start:end]
+            values = self._values[start:end]
+        times.flags.writeable = False
+        values.flags.writeable = False
+        return times, values
+
+    def get_series(self, last_n: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copies of the newest `last_n` samples (all by default), oldest first.
+        """
+        with self._lock:
+            start, end = self._bounds(last_n)
+            return self._times[start:end].copy(), self._values[start:end].copy()
+
+    def snapshot(self, last_n: int = None) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Like get_series(), plus the version the copies correspond to, taken
+        atomically: the copies hold samples [version - len, version).
+        """
+        with self._lock:
+            start, end = self._bounds(last_n)
+            return self._version, self._times[start:end].copy(), self._values[start:end].copy()
+
+    def snapshot_oldest(self, first_n: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Like snapshot(), but copies the oldest `first_n` samples: they hold
+        samples [version - len(self), version - len(self) + len).
+        """
+        with self._lock:
+            start, end = self._bounds()
+            end = min(end, start + max(0, first_n))
+            return self._version, self._times[start:end].copy(), self._values[start:end].copy()
 
-    def get_series(self) -> Tuple[list[float], list[float]]:
+    def get_range(self, t_start: float, t_end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copies of the samples with t_start <= timestamp < t_end, found by
+        binary search (timestamps are assumed non-decreasing).
+        """
         with self._lock:
-            times_copy = list(self._times)
-            values_copy = list(self._values)
-        logger.debug("get_series returned %d entries", len(times_copy))
-        return times_copy, values_copy
+            start, end = self._bounds()
+            times = self._times[start:end]
+            lo = start + int(np.searchsorted(times, t_start, side='left'))
+            hi = start + int(np.searchsorted(times, t_end, side='left'))
+            return self._times[lo:hi].copy(), self._values[lo:hi].copy()
@@ -0,0 +1,165 @@
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# Extra samples read past the cached point, so a writer appending between
+# reading `version` and taking the snapshot rarely forces a full rebuild
+SNAPSHOT_MARGIN = 1024
+
+
+def minmax_bins(times: np.ndarray, values: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce consecutive bins of `k` samples to their min and max sample, kept
+    in their original order (2 points per bin). len(times) must be a multiple
+    of k. With one bin per pixel column this draws the same line as M4, since
+    first/last points of a column only add segments inside that column.
+    """
+    rows = len(values) // k
+    if not rows:
+        return times[:0], values[:0]
+    block = values[:rows * k].reshape(rows, k)
+    imin = np.argmin(block, axis=1)
+    imax = np.argmax(block, axis=1)
+    base = np.arange(rows) * k
+    idx = np.empty(2 * rows, dtype=np.int64)
+    idx[0::2] = base + np.minimum(imin, imax)
+    idx[1::2] = base + np.maximum(imin, imax)
+    return times[idx], values[idx]
+
+
+def head_points(times: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a leading partial bin to its first, min and max sample, in order.
+    Keeping the first sample pins the curve's start to the oldest sample.
+    """
+    if not len(values):
+        return times, values
+    idx = np.unique([0, int(np.argmin(values)), int(np.argmax(values))])
+    return times[idx], values[idx]
+
+
+def minmax_decimate(times: np.ndarray, values: np.ndarray, target: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One-shot min/max decimation of a whole series to at most ~`target` points.
+    """
+    n = len(values)
+    if n <= target:
+        return times, values
+    k = level_for(n, target)
+    full = (n // k) * k
+    t, y = minmax_bins(times[:full], values[:full], k)
+    tt, ty = minmax_bins(times[full:], values[full:], n - full) if n > full else (times[:0], values[:0])
+    return np.concatenate((t, tt)), np.concatenate((y, ty))
+
+
+def level_for(count: int, target: int) -> int:
+    """
+    Bin size for `count` samples and a `target` point budget: the smallest
+    power of two giving ≤ target/2 bins. Powers of two keep the level stable
+    while a buffer fills, so cached levels are reused instead of rebuilt.
+    """
+    need = -(-count // max(1, target // 2))
+    return 1 << max(0, (need - 1).bit_length())
+
+
+class _Level:
+    """
+    Cached min/max points of one bin size, for bins aligned to absolute
+    sample indices (multiples of k, counted by CircularBuffer.version).
+    """
+    def __init__(self, k: int):
+        self.k = k
+        self.first = 0       # absolute index of the first cached bin
+        self.done = -1       # absolute index up to which bins are complete; -1 = empty
+        self.times = np.empty(0)
+        self.values = np.empty(0)
+
+
+class Decimator:
+    """
+    Incremental min/max decimation of a CircularBuffer to about `target`
+    points (2 per pixel column when target = 2 × widget width).
+
+    Completed bins are cached per bin size. On each call only samples added
+    since the previous call are binned, bins that fell out of the ring buffer
+    are dropped, and the still-filling last bin is reduced on the fly. The
+    oldest samples, whose bin is partly overwritten, are reduced on the fly
+    as well (one small read from the head of the buffer), so no buffered
+    sample is left out. A full rebuild only happens when a level is first
+    used or has fallen behind the buffer.
+    """
+    def __init__(self, target: int = 2000):
+        self.target = target
+        self._levels: Dict[int, _Level] = {}
+        self.rebuilds = 0
+
+    def series(self, buf: CircularBuffer) -> Tuple[np.ndarray, np.ndarray]:
+        version = buf.version
+        count = min(version, buf.maxlen)
+        if count <= self.target:
+            return buf.get_series()
+
+        k = level_for(count, self.target)
+        level = self._levels.get(k)
+        if level is None:
+            level = self._levels[k] = _Level(k)
+            # Levels far finer than this one are left over from filling up
+            for stale in [j for j in self._levels if j < k // 4]:
+                del self._levels[stale]
+
+        oldest = max(0, version - buf.maxlen)
+        if level.done >= oldest:
+            version, times, values = buf.snapshot(version - level.done + SNAPSHOT_MARGIN)
+        else:
+            version, times, values = buf.snapshot()
+        snap_first = version - len(times)
+        oldest = max(0, version - buf.maxlen)
+
+        if snap_first > max(level.done, oldest):
+            # The writer outran the margin: fall back to the whole buffer
+            version, times, values = buf.snapshot()
+            snap_first = oldest = max(0, version - buf.maxlen)
+        if level.done < oldest:
+            self._reset(level, oldest)
+
+        # Bin every sample completed since the last call
+        end = (version // k) * k
+        if end > level.done:
+            a, b = level.done - snap_first, end - snap_first
+            t, y = minmax_bins(times[a:b], values[a:b], k)
+            level.times = np.concatenate((level.times, t))
+            level.values = np.concatenate((level.values, y))
+            level.done = end
+
+        # Drop bins that were (even partly) overwritten in the ring buffer
+        if level.first < oldest:
+            drop = min(-(-(oldest - level.first) // k), len(level.times) // 2)
+            level.times = level.times[2 * drop:]
+            level.values = level.values[2 * drop:]
+            level.first += drop * k
+
+        # Reduce the partial first bin (samples older than the first cached
+        # bin) and the partial last bin fresh each time
+        head_version, ht, hy = buf.snapshot_oldest(max(1, level.first - oldest))
+        head = max(0, level.first - max(0, head_version - buf.maxlen))
+        ht, hy = head_points(ht[:max(1, head)], hy[:max(1, head)])
+        tail = end - snap_first
+        if tail < len(times):
+            tt, ty = minmax_bins(times[tail:], values[tail:], len(times) - tail)
+        else:
+            tt, ty = times[:0], values[:0]
+        return np.concatenate((ht, level.times, tt)), np.concatenate((hy, level.values, ty))
+
+    def _reset(self, level: _Level, oldest: int):
+        k = level.k
+        level.first = level.done = -(-oldest // k) * k
+        level.times = np.empty(0)
+        level.values = np.empty(0)
+        self.rebuilds += 1
+        logger.debug("Decimator: rebuilding level k=%d from sample %d", k, level.first)
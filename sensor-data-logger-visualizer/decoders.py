@@ -0,0 +1,345 @@
+import json
+import logging
+import struct
+import time
+from typing import Any, Callable, Dict, NamedTuple, Tuple, Union
+
+import numpy as np
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# Fastest available JSON parser: orjson and ujson take bytes directly
+try:
+    import orjson
+    json_loads: Callable[[bytes], Any] = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import ujson
+        json_loads = ujson.loads
+        JSON_BACKEND = "ujson"
+    except ImportError:
+        json_loads = json.loads
+        JSON_BACKEND = "json"
+
+
+class Samples(NamedTuple):
+    """
+    Several samples of one series from a single message. Every entry has a
+    timestamp: the publisher's where the payload carries one, else the
+    arrival time.
+    """
+    times: np.ndarray
+    values: np.ndarray
+
+
+# A decoder returns one value (stamped on arrival by the handler), a batch
+# of Samples, or {channel: value-or-Samples} for multi-channel payloads
+Decoded = Union[float, Samples, Dict[str, Union[float, Samples]]]
+Decoder = Callable[[bytes], Decoded]
+
+# Source timestamps above this are taken as milliseconds since the epoch
+MS_EPOCH_THRESHOLD = 1e11
+
+TS_KEYS = ("ts", "t", "time", "timestamp")
+VALUE_KEYS = ("value", "v", "val")
+
+
+class DecodeError(ValueError):
+    """A payload that does not match its topic's decoder."""
+
+
+def _compile_path(path: str) -> Tuple[Union[str, int], ...]:
+    """
+    'data.samples.0.value' -> ('data', 'samples', 0, 'value'). Integer
+    segments index lists; an empty path selects the document itself.
+    """
+    return tuple(int(p) if p.lstrip("-").isdigit() else p for p in path.split(".") if p)
+
+
+def _select(doc: Any, path: Tuple[Union[str, int], ...]) -> float:
+    try:
+        for key in path:
+            doc = doc[key]
+        return float(doc)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise DecodeError(f"no numeric value at '{'.'.join(map(str, path))}'") from e
+
+
+class JsonDecoder:
+    """
+    JSON document; the value is taken from a dotted field path
+    (default 'value', the simulator's {'value': <float>} shape).
+    """
+    def __init__(self, path: str = "value", loads: Callable[[bytes], Any] = None):
+        self.path = _compile_path(path)
+        self._loads = loads or json_loads
+
+    def __call__(self, payload: bytes) -> float:
+        try:
+            doc = self._loads(payload)
+        except ValueError as e:
+            raise DecodeError(f"invalid JSON: {e}") from e
+        if len(self.path) == 1 and type(doc) is dict:
+            # Fast path for the common flat {'value': x} shape
+            try:
+                return float(doc[self.path[0]])
+            except (KeyError, TypeError, ValueError):
+                pass
+        return _select(doc, self.path)
+
+
+class NumericDecoder:
+    """
+    Plain numeric text such as b'21.5', as the climate-control nodes send.
+    """
+    def __call__(self, payload: bytes) -> float:
+        try:
+            return float(payload)
+        except ValueError as e:
+            raise DecodeError(f"not a number: {payload[:32]!r}") from e
+
+
+class StructDecoder:
+    """
+    Fixed binary layout, e.g. '<d' (little-endian float64) or '<Qf' with
+    index=1 (uint64 counter followed by a float32 value).
+    """
+    def __init__(self, fmt: str = "<d", index: int = 0):
+        self._struct = struct.Struct(fmt)
+        fields = len(self._struct.unpack(bytes(self._struct.size)))
+        if not -fields <= index < fields:
+            raise ValueError(f"Field index {index} out of range for '{fmt}' ({fields} fields)")
+        self.index = index
+
+    def __call__(self, payload: bytes) -> float:
+        try:
+            return float(self._struct.unpack_from(payload)[self.index])
+        except struct.error as e:
+            raise DecodeError(f"bad binary payload: {e}") from e
+
+
+class MsgPackDecoder:
+    """
+    MessagePack map; the value is taken from a dotted field path. Needs msgpack.
+    """
+    def __init__(self, path: str = "value"):
+        try:
+            import msgpack
+        except ImportError as e:
+            raise RuntimeError("MessagePack payloads require msgpack (pip install msgpack)") from e
+        self._unpackb = msgpack.unpackb
+        self._error = (ValueError, msgpack.UnpackException)
+        self.path = _compile_path(path)
+
+    def __call__(self, payload: bytes) -> float:
+        try:
+            doc = self._unpackb(payload)
+        except self._error as e:
+            raise DecodeError(f"invalid MessagePack: {e}") from e
+        return _select(doc, self.path)
+
+
+class CborDecoder:
+    """
+    CBOR map; the value is taken from a dotted field path. Needs cbor2.
+    """
+    def __init__(self, path: str = "value"):
+        try:
+            import cbor2
+        except ImportError as e:
+            raise RuntimeError("CBOR payloads require cbor2 (pip install cbor2)") from e
+        self._loads = cbor2.loads
+        self._error = (ValueError, cbor2.CBORDecodeError)
+        self.path = _compile_path(path)
+
+    def __call__(self, payload: bytes) -> float:
+        try:
+            doc = self._loads(payload)
+        except self._error as e:
+            raise DecodeError(f"invalid CBOR: {e}") from e
+        return _select(doc, self.path)
+
+
+def _seconds(times: np.ndarray, arrival: float) -> np.ndarray:
+    times[np.isnan(times)] = arrival
+    ms = times > MS_EPOCH_THRESHOLD
+    if ms.any():
+        times[ms] /= 1000.0
+    return times
+
+
+def _ordered(times: np.ndarray, values: np.ndarray) -> Samples:
+    """
+    Samples sorted by time: buffers, statistics and the decimator all assume
+    timestamps never decrease, and publishers do not always send them in order.
+    """
+    if len(times) > 1 and (times[1:] < times[:-1]).any():
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+    return Samples(times, values)
+
+
+def _first(item: dict, keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        if key in item:
+            return item[key]
+    return None
+
+
+def to_samples(node: Any, arrival: float) -> Samples:
+    """
+    Normalise the batch shapes publishers send into Samples:
+
+        [[ts, value], ...]                      pairs
+        [{"ts": ..., "value": ...}, ...]        records (ts optional)
+        {"ts": [...], "values": [...]}          columns (ts optional)
+        [value, ...] or value                   values only, stamped on arrival
+
+    Missing or null values are rejected rather than recorded as NaN.
+    """
+    try:
+        if isinstance(node, dict):
+            values = np.asarray(node.get("values", node.get("value")), dtype=np.float64).reshape(-1)
+            ts = _first(node, TS_KEYS)
+            times = (np.full(len(values), np.nan) if ts is None
+                     else np.asarray(ts, dtype=np.float64).reshape(-1))
+        elif isinstance(node, list) and node and isinstance(node[0], dict):
+            values = np.array([float(_first(r, VALUE_KEYS)) for r in node])
+            times = np.array([np.nan if (t := _first(r, TS_KEYS)) is None else float(t) for r in node])
+        elif isinstance(node, list) and node and isinstance(node[0], (list, tuple)):
+            pairs = np.asarray(node, dtype=np.float64)
+            times, values = pairs[:, 0].copy(), pairs[:, 1].copy()
+        else:
+            values = np.asarray(node, dtype=np.float64).reshape(-1)
+            times = np.full(len(values), np.nan)
+    except (TypeError, ValueError, IndexError) as e:
+        raise DecodeError(f"unrecognised sample batch: {e}") from e
+    if len(times) != len(values):
+        raise DecodeError(f"{len(times)} timestamps for {len(values)} values")
+    if np.isnan(values).any():
+        raise DecodeError("missing or null value in sample batch")
+    return _ordered(_seconds(times, arrival), values)
+
+
+class JsonBatchDecoder:
+    """
+    JSON document carrying many samples of one series at `path` (default
+    'samples'), in any shape to_samples() accepts.
+    """
+    def __init__(self, path: str = "samples", loads: Callable[[bytes], Any] = None):
+        self.path = _compile_path(path)
+        self._loads = loads or json_loads
+
+    def __call__(self, payload: bytes) -> Samples:
+        arrival = time.time()
+        try:
+            doc = self._loads(payload)
+        except ValueError as e:
+            raise DecodeError(f"invalid JSON: {e}") from e
+        try:
+            for key in self.path:
+                doc = doc[key]
+        except (KeyError, IndexError, TypeError) as e:
+            raise DecodeError(f"no samples at '{'.'.join(map(str, self.path))}'") from e
+        return to_samples(doc, arrival)
+
+
+class JsonChannelsDecoder:
+    """
+    JSON document carrying several channels at `path` (default 'channels'):
+    {"ts": 1700000000.0, "channels": {"temperature": 21.5, "humidity": [[ts, v], ...]}}.
+    A top-level timestamp applies to scalar channel values.
+    """
+    def __init__(self, path: str = "channels", loads: Callable[[bytes], Any] = None):
+        self.path = _compile_path(path)
+        self._loads = loads or json_loads
+
+    def __call__(self, payload: bytes) -> Dict[str, Samples]:
+        arrival = time.time()
+        try:
+            doc = self._loads(payload)
+        except ValueError as e:
+            raise DecodeError(f"invalid JSON: {e}") from e
+        try:
+            ts = _first(doc, TS_KEYS) if isinstance(doc, dict) else None
+            stamp = arrival if ts is None else float(ts)
+        except (TypeError, ValueError) as e:
+            raise DecodeError(f"bad timestamp: {e}") from e
+        try:
+            for key in self.path:
+                doc = doc[key]
+            items = doc.items()
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise DecodeError(f"no channels at '{'.'.join(map(str, self.path))}'") from e
+        return {
+            str(name): to_samples(node, arrival) if isinstance(node, (list, dict))
+            else to_samples({"ts": stamp, "value": node}, arrival)
+            for name, node in items
+        }
+
+
+class BinaryBatchDecoder:
+    """
+    Packed records of (timestamp, value), e.g. '<f8' for float64 pairs, read
+    with one np.frombuffer call. A NaN timestamp means 'use arrival time'.
+    """
+    def __init__(self, dtype: str = "<f8"):
+        self._dtype = np.dtype([("ts", dtype), ("value", dtype)])
+
+    def __call__(self, payload: bytes) -> Samples:
+        arrival = time.time()
+        if len(payload) % self._dtype.itemsize:
+            raise DecodeError(f"payload of {len(payload)} bytes is not a whole number of "
+                              f"{self._dtype.itemsize}-byte records")
+        records = np.frombuffer(payload, dtype=self._dtype)
+        return _ordered(_seconds(records["ts"].astype(np.float64), arrival),
+                        records["value"].astype(np.float64))
+
+
+def make_decoder(spec: str) -> Decoder:
+    """
+    Build a decoder from a short spec string:
+
+        json[:field.path]      JSON, default field 'value'
+        numeric                plain numeric text
+        msgpack[:field.path]   MessagePack
+        cbor[:field.path]      CBOR
+        struct:<fmt>[:index]   struct-packed binary, e.g. struct:<d or struct:<Qf:1
+        json-batch[:path]      many samples of one series, default path 'samples'
+                               ('.' for the whole document, e.g. a top-level list)
+        json-channels[:path]   several channels, default path 'channels'
+        binary-batch[:dtype]   packed (ts, value) records, default '<f8'
+    """
+    kind, _, arg = spec.strip().partition(":")
+    kind = kind.lower()
+    if kind == "json":
+        return JsonDecoder(arg or "value")
+    if kind == "numeric":
+        return NumericDecoder()
+    if kind == "msgpack":
+        return MsgPackDecoder(arg or "value")
+    if kind == "cbor":
+        return CborDecoder(arg or "value")
+    if kind == "json-batch":
+        return JsonBatchDecoder(arg or "samples")
+    if kind == "json-channels":
+        return JsonChannelsDecoder(arg or "channels")
+    if kind == "binary-batch":
+        return BinaryBatchDecoder(arg or "<f8")
+    if kind == "struct":
+        fmt, _, index = arg.partition(":")
+        return StructDecoder(fmt or "<d", int(index or 0))
+    raise ValueError(f"Unknown payload decoder '{spec}'")
+
+
+def parse_decoder_map(text: str) -> dict[str, Decoder]:
+    """
+    'topic=spec;topic=spec' (e.g. from SENSOR_DECODERS) -> {topic: decoder}.
+    """
+    decoders = {}
+    for item in filter(None, (part.strip() for part in text.split(";"))):
+        topic, _, spec = item.partition("=")
+        decoders[topic.strip()] = make_decoder(spec)
+    return decoders
@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+from storage import SampleStore
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# Samples read per source per step; bounds memory use regardless of export size
+CHUNK_ROWS = 50000
+
+FORMATS = ("csv", "parquet")
+
+Chunk = Tuple[np.ndarray, np.ndarray]
+
+
+class ExportCancelled(Exception):
+    """Raised inside export_merged() when its cancel event is set."""
+
+
+class Source:
+    """
+    One column of the export: a topic and an iterator of time-ordered
+    (times, values) chunks, plus the total sample count for progress.
+    """
+    def __init__(self, name: str, chunks: Iterator[Chunk], total: int):
+        self.name = name
+        self.chunks = chunks
+        self.total = total
+
+    @classmethod
+    def from_buffer(cls, name: str, buf: CircularBuffer, chunk_rows: int = CHUNK_ROWS) -> "Source":
+        """
+        The current contents of a ring buffer (one copy, taken now).
+        """
+        times, values = buf.get_series()
+
+        def chunks():
+            for i in range(0, len(times), chunk_rows):
+                yield times[i:i + chunk_rows], values[i:i + chunk_rows]
+        return cls(name, chunks(), len(times))
+
+    @classmethod
+    def from_store(
+        cls,
+        name: str,
+        store: SampleStore,
+        t_start: float,
+        t_end: float,
+        chunk_rows: int = CHUNK_ROWS
+    ) -> "Source":
+        """
+        A stored window, read lazily chunk by chunk.
+        """
+        return cls(name, store.iter_range(name, t_start, t_end, chunk_rows),
+                   store.count(name, t_start, t_end))
+
+
+class _Cursor:
+    """
+    Pending samples of one source plus the last value already emitted, for
+    the as-of lookup across chunk boundaries.
+    """
+    def __init__(self, source: Source):
+        self.source = source
+        self.times = np.empty(0)
+        self.values = np.empty(0)
+        self.last_time = -np.inf
+        self.last_value = np.nan
+        self.exhausted = False
+
+    def fill(self):
+        while not len(self.times) and not self.exhausted:
+            self.more()
+
+    def more(self):
+        """
+        Append the source's next chunk to the pending samples.
+        """
+        try:
+            times, values = next(self.source.chunks)
+        except StopIteration:
+            self.exhausted = True
+            return
+        self.times = np.concatenate((self.times, times))
+        self.values = np.concatenate((self.values, values))
+
+    def final_until(self) -> float:
+        """
+        Pending samples before this time are final. The last timestamp of a
+        chunk may repeat at the start of the next one, so it is held back
+        until the source is exhausted.
+        """
+        return np.inf if self.exhausted else self.times[-1]
+
+
+def merge_asof(
+    sources: Sequence[Source],
+    tolerance: Optional[float] = None,
+    cancel: Optional[threading.Event] = None
+) -> Iterator[Tuple[np.ndarray, np.ndarray, int]]:
+    """
+    Time-sorted as-of merge join of all sources, streamed in blocks.
+
+    Yields (timestamps, columns, consumed): one output row per distinct
+    timestamp across all sources, holding each topic's latest value at or
+    before that time (NaN before its first sample, or when older than
+    `tolerance` seconds), and the number of input samples consumed.
+    Only one chunk per source is held at a time.
+    """
+    cursors = [_Cursor(s) for s in sources]
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled()
+        for c in cursors:
+            c.fill()
+        live = [c for c in cursors if len(c.times)]
+        if not live:
+            return
+        # Everything before the earliest chunk end is final: no source can
+        # still produce an earlier sample (or another at that timestamp)
+        horizon = min(c.final_until() for c in live)
+        if all(c.times[0] >= horizon for c in live):
+            # Only held-back timestamps are pending: read further
+            for c in live:
+                if not c.exhausted and c.times[-1] == horizon:
+                    c.more()
+            continue
+        stamps = np.unique(np.concatenate(
+            [c.times[:int(np.searchsorted(c.times, horizon, side="left"))] for c in live]))
+
+        columns = np.empty((len(stamps), len(cursors)))
+        consumed = 0
+        for col, c in enumerate(cursors):
+            n = int(np.searchsorted(c.times, horizon, side="left")) if len(c.times) else 0
+            times = np.concatenate(([c.last_time], c.times[:n]))
+            values = np.concatenate(([c.last_value], c.values[:n]))
+            idx = np.searchsorted(times, stamps, side="right") - 1
+            out = values[idx]
+            if tolerance is not None:
+                out[stamps - times[idx] > tolerance] = np.nan
+            columns[:, col] = out
+            if n:
+                c.last_time, c.last_value = c.times[n - 1], c.values[n - 1]
+                c.times, c.values = c.times[n:], c.values[n:]
+                consumed += n
+        yield stamps, columns, consumed
+
+
+class _CsvWriter:
+    def __init__(self, path: str, names: List[str]):
+        self._file = open(path, "w", newline="")
+        self._file.write(",".join(["timestamp"] + names) + "\n")
+
+    def write(self, stamps: np.ndarray, columns: np.ndarray):
+        block = np.column_stack((stamps, columns))
+        np.savetxt(self._file, block, delimiter=",", fmt="%.17g")
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, names: List[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self._names = ["timestamp"] + names
+        schema = pa.schema([(n, pa.float64()) for n in self._names])
+        self._writer = pq.ParquetWriter(path, schema)
+
+    def write(self, stamps: np.ndarray, columns: np.ndarray):
+        arrays = [stamps] + [columns[:, i] for i in range(columns.shape[1])]
+        # One row group per merged block
+        self._writer.write_table(self._pa.table(dict(zip(self._names, arrays))))
+
+    def close(self):
+        self._writer.close()
+
+
+def export_merged(
+    sources: Sequence[Source],
+    path: str,
+    fmt: str = "csv",
+    tolerance: Optional[float] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None
+) -> int:
+    """
+    Stream the as-of merge of `sources` to `path` as CSV or Parquet.
+    progress(done, total) is called after every block, with input samples
+    as the unit. Returns the number of rows written.
+
+    The file is written next to `path` and renamed into place on success,
+    so a cancelled or failed export leaves no partial file behind.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    names = [s.name for s in sources]
+    partial = f"{path}.part"
+    writer = (_ParquetWriter if fmt == "parquet" else _CsvWriter)(partial, names)
+    total = sum(s.total for s in sources)
+    done = rows = 0
+    try:
+        try:
+            for stamps, columns, consumed in merge_asof(sources, tolerance, cancel):
+                writer.write(stamps, columns)
+                rows += len(stamps)
+                done += consumed
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            writer.close()
+        os.replace(partial, path)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    logger.info("Exported %d rows (%d samples, %d topics) to %s", rows, done, len(names), path)
+    return rows
@@ -0,0 +1,255 @@
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from mqtt_client import MQTTClient
+from decoders import parse_decoder_map
+from shared_buffer import SEGMENT_PREFIX, SharedRingBuffer, remove_stale_segments
+from staging import MAX_TOPICS, TopicRouter
+from storage import SampleStore
+from log_sampling import configure_logging
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# Ingest process: staged samples are moved into the shared buffers (and the
+# store) every FLUSH_INTERVAL seconds; counters go to the GUI every STATS_INTERVAL
+FLUSH_INTERVAL = 0.01
+STATS_INTERVAL = 1.0
+
+# Restart back-off after the ingest process dies (seconds, doubling)
+RESTART_MIN_DELAY = 1.0
+RESTART_MAX_DELAY = 30.0
+
+STOP_TIMEOUT = 5.0
+
+# (topic, segment name, maxlen)
+Segment = Tuple[str, str, int]
+
+# Counters the ingest process reports as running totals; they restart from
+# 0 with each process, so the GUI side carries the totals of earlier ones
+COUNTERS = ("received", "bad_payloads", "errors", "unhandled", "staging_dropped")
+STORE_COUNTERS = ("store_written", "store_batches", "store_dropped")
+
+
+class IngestConfig(NamedTuple):
+    broker: str
+    port: int
+    topics: List[str]          # plotted from the start
+    subscriptions: List[str]   # wildcard filters
+    decoders: str              # SENSOR_DECODERS syntax
+    buffer_len: int
+    db_path: str               # "" disables the store
+    max_topics: int = MAX_TOPICS
+
+
+class _Ingest:
+    """
+    Ingest process body: MQTTClient -> TopicRouter -> SharedRingBuffers.
+    """
+    def __init__(self, config: IngestConfig, segments: List[Segment], events, stop):
+        self.config = config
+        self.events = events
+        self.stop = stop
+        self.buffers: dict[str, SharedRingBuffer] = {}
+        self._segments = 0
+        self._gui_pid = os.getppid()
+
+        for topic, name, maxlen in segments:
+            # Restarted after a crash: keep writing where the last process stopped
+            self.buffers[topic] = SharedRingBuffer.attach(name, maxlen, writer=True)
+        known = set(self.buffers) | set(config.topics)
+        self.router = TopicRouter(known, config.max_topics)
+        for topic in config.topics:
+            if topic not in self.buffers:
+                self._create(topic)
+
+        self.store: Optional[SampleStore] = None
+        if config.db_path:
+            self.store = SampleStore(config.db_path)
+            self.store.start()
+
+        self.mqtt = MQTTClient(broker=config.broker, port=config.port)
+        for topic_filter, decoder in parse_decoder_map(config.decoders).items():
+            self.mqtt.set_decoder(topic_filter, decoder)
+        for topic in [*config.topics, *config.subscriptions]:
+            self.mqtt.register_handler(topic, self.router)
+
+    def _create(self, topic: str):
+        self._segments += 1
+        name = f"{SEGMENT_PREFIX}_{self._gui_pid}_{os.getpid()}_{self._segments}"
+        self.buffers[topic] = SharedRingBuffer.create(name, self.config.buffer_len)
+        self.events.put(("topic", topic, name, self.config.buffer_len))
+
+    def _flush(self):
+        for topic in self.router.take_discovered():
+            self._create(topic)
+        for topic, buf in self.buffers.items():
+            batch = self.router.queue(topic).drain()
+            if batch is None:
+                continue
+            buf.extend(*batch)
+            if self.store is not None:
+                self.store.add_many(topic, *batch)
+
+    def _stats(self):
+        store = self.store
+        self.events.put(("stats", {
+            "received": self.mqtt.received,
+            "bad_payloads": self.mqtt.bad_payloads,
+            "errors": self.mqtt.errors,
+            "unhandled": self.mqtt.unhandled,
+            "staging_dropped": sum(self.router.queue(t).dropped for t in self.buffers),
+            "store_written": store.written if store else 0,
+            "store_batches": store.batches if store else 0,
+            "store_queued": store.queue_depth() if store else 0,
+            "store_dropped": store.dropped if store else 0,
+        }))
+
+    def run(self):
+        self.mqtt.connect()
+        parent = multiprocessing.parent_process()
+        next_stats = time.monotonic() + STATS_INTERVAL
+        try:
+            while not self.stop.wait(FLUSH_INTERVAL):
+                self._flush()
+                if time.monotonic() >= next_stats:
+                    next_stats += STATS_INTERVAL
+                    self._stats()
+                    if parent is not None and not parent.is_alive():
+                        logger.warning("GUI process is gone; stopping ingest")
+                        break
+        finally:
+            self.mqtt.disconnect()
+            self._flush()
+            self._stats()
+            if self.store is not None:
+                self.store.close()
+            for buf in self.buffers.values():
+                buf.close()
+
+
+def run_ingest(config: IngestConfig, segments: List[Segment], events, stop):
+    """
+    Entry point of the ingest process.
+    """
+    configure_logging()
+    logger.info("Ingest process %d started (%d shared buffers to resume)", os.getpid(), len(segments))
+    _Ingest(config, segments, events, stop).run()
+    logger.info("Ingest process %d stopped", os.getpid())
+
+
+class IngestProcess:
+    """
+    GUI-side handle of the ingest process: starts it, maps the shared
+    buffers it announces read-only, mirrors its counters, restarts it with
+    back-off if it dies, and on stop() shuts it down and unlinks the
+    segments. The counters use MQTTClient's names so the stats line can
+    read either.
+    """
+    def __init__(self, config: IngestConfig):
+        self.config = config
+        self.buffers: dict[str, SharedRingBuffer] = {}
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._process = None
+        self._stopping = False
+        self._restart_at: Optional[float] = None
+        self._restart_delay = RESTART_MIN_DELAY
+        self._started_at = 0.0
+        self.restarts = 0
+
+        self.received = 0
+        self.bad_payloads = 0
+        self.errors = 0
+        self.unhandled = 0
+        self.staging_dropped = 0
+        self.store_stats: dict[str, int] = {}
+        # Totals of earlier (crashed) ingest processes
+        self._carried = dict.fromkeys(COUNTERS + STORE_COUNTERS, 0)
+        remove_stale_segments()
+
+    def start(self):
+        segments = [(topic, buf.name, buf.maxlen) for topic, buf in self.buffers.items()]
+        self._stop.clear()
+        self._process = self._ctx.Process(
+            target=run_ingest, args=(self.config, segments, self._events, self._stop),
+            name="sensor-ingest", daemon=True
+        )
+        self._process.start()
+        self._started_at = time.monotonic()
+        logger.info("Started ingest process %d", self._process.pid)
+
+    def poll(self) -> List[str]:
+        """
+        Handle announcements and counters from the ingest process and
+        restart it if it died. Returns topics whose buffers were just mapped
+        (call from the GUI thread).
+        """
+        new_topics = []
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "topic":
+                _kind, topic, name, maxlen = event
+                if topic not in self.buffers:
+                    self.buffers[topic] = SharedRingBuffer.attach(name, maxlen)
+                    new_topics.append(topic)
+            elif event[0] == "stats":
+                stats = event[1]
+                for key in COUNTERS:
+                    setattr(self, key, self._carried[key] + stats.pop(key))
+                for key in STORE_COUNTERS:
+                    stats[key] += self._carried[key]
+                self.store_stats = stats
+        self._supervise()
+        return new_topics
+
+    def _supervise(self):
+        if self._stopping or self._process is None:
+            return
+        now = time.monotonic()
+        if self._restart_at is None:
+            if self._process.is_alive():
+                if now - self._started_at > RESTART_MAX_DELAY:
+                    self._restart_delay = RESTART_MIN_DELAY
+                return
+            logger.error("Ingest process %d exited with code %s; restarting in %.1f s",
+                         self._process.pid, self._process.exitcode, self._restart_delay)
+            self._restart_at = now + self._restart_delay
+            self._restart_delay = min(RESTART_MAX_DELAY, 2 * self._restart_delay)
+        elif now >= self._restart_at:
+            self._restart_at = None
+            self.restarts += 1
+            for key in COUNTERS:
+                self._carried[key] = getattr(self, key)
+            for key in STORE_COUNTERS:
+                self._carried[key] = self.store_stats.get(key, self._carried[key])
+            self.start()
+
+    def stop(self):
+        """
+        Stop the ingest process (it flushes and disconnects), then unmap and
+        unlink every shared buffer.
+        """
+        self._stopping = True
+        if self._process is not None and self._process.is_alive():
+            self._stop.set()
+            self._process.join(STOP_TIMEOUT)
+            if self._process.is_alive():
+                logger.warning("Ingest process %d did not stop; terminating it", self._process.pid)
+                self._process.terminate()
+                self._process.join(STOP_TIMEOUT)
+        # Announcements still queued name segments to unlink too
+        self.poll()
+        for buf in self.buffers.values():
+            buf.close()
+            buf.unlink()
+        logger.info("Ingest process stopped (%d restarts); %d shared buffers released",
+                    self.restarts, len(self.buffers))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Local MQTT broker stand-in (MQTT 3.1.1 subset, asyncio, no dependencies)
+for benchmarks and development on boxes without Mosquitto:
+
+  * CONNECT / CONNACK, PINGREQ, DISCONNECT; last will on abnormal close
+  * PUBLISH at QoS 0, 1 and 2 in both directions (PUBACK; PUBREC / PUBREL /
+    PUBCOMP), delivered at min(publish QoS, granted QoS)
+  * SUBSCRIBE / UNSUBSCRIBE with + and # wildcards, retained messages
+
+Sessions are always clean and nothing is retransmitted (the transport is a
+local TCP connection). verify_mqtt.py bench starts one on a free port.
+"""
+
+import argparse
+import asyncio
+import logging
+import struct
+from typing import Dict, Optional, Tuple
+
+from topic_trie import TopicTrie
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = range(1, 8)
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = range(8, 15)
+
+
+def _packet(first: int, body: bytes) -> bytes:
+    length = len(body)
+    header = bytearray([first])
+    while True:
+        byte, length = length % 128, length // 128
+        header.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(header) + body
+
+
+def _string(data: bytes, offset: int) -> Tuple[str, int]:
+    (size,) = struct.unpack_from("!H", data, offset)
+    return data[offset + 2:offset + 2 + size].decode(), offset + 2 + size
+
+
+class _Session:
+    def __init__(self, broker: "LocalBroker", writer: asyncio.StreamWriter):
+        self.broker = broker
+        self.writer = writer
+        self.client_id = ""
+        self.filters: Dict[str, int] = {}
+        self.will: Optional[Tuple[str, bytes, int, bool]] = None
+        self._next_id = 0
+
+    def packet_id(self) -> int:
+        self._next_id = self._next_id % 65535 + 1
+        return self._next_id
+
+    def deliver(self, topic: str, payload: bytes, qos: int, retain: bool = False):
+        name = topic.encode()
+        header = struct.pack("!H", len(name)) + name
+        if qos:
+            header += struct.pack("!H", self.packet_id())
+        self.writer.write(_packet((PUBLISH << 4) | (qos << 1) | int(retain), header + payload))
+
+
+class LocalBroker:
+    """
+    Subscriptions live in a TopicTrie of filter -> {session: granted QoS},
+    so routing a publish costs a trie match, not a scan of every client.
+    """
+    def __init__(self):
+        self._subscriptions = TopicTrie()
+        self._retained: Dict[str, Tuple[bytes, int]] = {}
+        self._sessions: Dict[str, _Session] = {}
+        self.published = 0
+
+    def publish(self, topic: str, payload: bytes, qos: int, retain: bool):
+        self.published += 1
+        if retain:
+            if payload:
+                self._retained[topic] = (payload, qos)
+            else:
+                self._retained.pop(topic, None)
+        granted: Dict[_Session, int] = {}
+        for _filter, sessions in self._subscriptions.match(topic):
+            for session, sub_qos in sessions.items():
+                granted[session] = max(granted.get(session, 0), sub_qos)
+        for session, sub_qos in granted.items():
+            session.deliver(topic, payload, min(qos, sub_qos))
+
+    def _subscribe(self, session: _Session, topic_filter: str, qos: int):
+        sessions = self._subscriptions.get(topic_filter)
+        if sessions is None:
+            sessions = {}
+            self._subscriptions.insert(topic_filter, sessions)
+        sessions[session] = qos
+        session.filters[topic_filter] = qos
+
+    def _unsubscribe(self, session: _Session, topic_filter: str):
+        sessions = self._subscriptions.get(topic_filter)
+        if sessions is not None:
+            sessions.pop(session, None)
+            if not sessions:
+                self._subscriptions.remove(topic_filter)
+        session.filters.pop(topic_filter, None)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = _Session(self, writer)
+        clean = False
+        try:
+            while True:
+                first = (await reader.readexactly(1))[0]
+                length, shift = 0, 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length) if length else b""
+                kind = first >> 4
+                if kind == PUBLISH:
+                    qos, retain = (first >> 1) & 3, bool(first & 1)
+                    topic, offset = _string(body, 0)
+                    if qos:
+                        packet_id = body[offset:offset + 2]
+                        offset += 2
+                        writer.write(_packet((PUBACK if qos == 1 else PUBREC) << 4, packet_id))
+                    self.publish(topic, body[offset:], qos, retain)
+                elif kind == PUBREL:
+                    writer.write(_packet(PUBCOMP << 4, body[:2]))
+                elif kind == PUBREC:
+                    writer.write(_packet((PUBREL << 4) | 2, body[:2]))
+                elif kind in (PUBACK, PUBCOMP):
+                    pass
+                elif kind == CONNECT:
+                    self._connect(session, body)
+                    writer.write(_packet(CONNACK << 4, b"\x00\x00"))
+                elif kind == SUBSCRIBE:
+                    offset, granted, added = 2, bytearray(), TopicTrie()
+                    while offset < len(body):
+                        topic_filter, offset = _string(body, offset)
+                        qos = min(body[offset] & 3, 2)
+                        offset += 1
+                        try:
+                            added.insert(topic_filter, qos)
+                        except ValueError:
+                            granted.append(0x80)
+                            continue
+                        self._subscribe(session, topic_filter, qos)
+                        granted.append(qos)
+                    writer.write(_packet(SUBACK << 4, body[:2] + bytes(granted)))
+                    for topic, (payload, qos) in self._retained.items():
+                        matched = added.match(topic)
+                        if matched:
+                            sub_qos = max(q for _f, q in matched)
+                            session.deliver(topic, payload, min(qos, sub_qos), retain=True)
+                elif kind == UNSUBSCRIBE:
+                    offset = 2
+                    while offset < len(body):
+                        topic_filter, offset = _string(body, offset)
+                        self._unsubscribe(session, topic_filter)
+                    writer.write(_packet(UNSUBACK << 4, body[:2]))
+                elif kind == PINGREQ:
+                    writer.write(_packet(PINGRESP << 4, b""))
+                elif kind == DISCONNECT:
+                    clean = True
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for topic_filter in list(session.filters):
+                self._unsubscribe(session, topic_filter)
+            if self._sessions.get(session.client_id) is session:
+                del self._sessions[session.client_id]
+            if not clean and session.will is not None:
+                self.publish(*session.will)
+            writer.close()
+
+    def _connect(self, session: _Session, body: bytes):
+        _protocol, offset = _string(body, 0)
+        flags = body[offset + 1]
+        offset += 4   # level, flags, keep-alive
+        session.client_id, offset = _string(body, offset)
+        if flags & 0x04:
+            will_topic, offset = _string(body, offset)
+            (size,) = struct.unpack_from("!H", body, offset)
+            will_payload = body[offset + 2:offset + 2 + size]
+            session.will = (will_topic, will_payload, (flags >> 3) & 3, bool(flags & 0x20))
+        previous = self._sessions.get(session.client_id)
+        if previous is not None and session.client_id:
+            # Same client id: the older connection is taken over
+            previous.writer.close()
+        self._sessions[session.client_id] = session
+        logger.debug("Client %r connected", session.client_id)
+
+
+async def serve(host: str = "127.0.0.1", port: int = 1883, ready=None):
+    broker = LocalBroker()
+    server = await asyncio.start_server(broker.handle, host, port)
+    actual = server.sockets[0].getsockname()[1]
+    logger.info("Local broker listening on %s:%d", host, actual)
+    if ready is not None:
+        ready(actual)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883, help="0 picks a free port")
+    parser.add_argument("--print-port", action="store_true", help="print the bound port on stdout")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+    try:
+        asyncio.run(serve(args.host, args.port,
+                          (lambda port: print(port, flush=True)) if args.print_port else None))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,77 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Hashable
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# Per-message debug log modes:
+#   off     – never emitted (aggregated stats lines only)
+#   sampled – 1 in `sample_every` messages plus the first `first_per_key` per topic per second
+#   full    – every message (the original behaviour)
+MODES = ("off", "sampled", "full")
+
+LOG_FORMAT = "%(asctime)s %(name)s %(levelname)s: %(message)s"
+
+
+class SampledLogger:
+    """
+    Sampling front end for per-message DEBUG logging on hot paths.
+
+    Call it as slog(key, fmt, *args) with %-style arguments; nothing is
+    formatted unless the line is emitted. `key` (usually the topic) drives the
+    first-K-per-second sampling. Defaults come from SENSOR_FRAME_LOG,
+    SENSOR_LOG_SAMPLE_EVERY and SENSOR_LOG_FIRST_PER_KEY.
+    """
+    def __init__(
+        self,
+        target: logging.Logger,
+        mode: str = None,
+        sample_every: int = None,
+        first_per_key: int = None
+    ):
+        self.logger = target
+        self.mode = (mode or os.environ.get("SENSOR_FRAME_LOG", "sampled")).strip().lower()
+        if self.mode not in MODES:
+            logger.warning("Unknown frame log mode '%s'; using sampled", self.mode)
+            self.mode = "sampled"
+        self.sample_every = (int(os.environ.get("SENSOR_LOG_SAMPLE_EVERY", 1000))
+                             if sample_every is None else sample_every)
+        self.first_per_key = (int(os.environ.get("SENSOR_LOG_FIRST_PER_KEY", 3))
+                              if first_per_key is None else first_per_key)
+        self.seen = 0
+        self.emitted = 0
+        self._second = 0
+        self._per_key: Dict[Hashable, int] = {}
+
+    def __call__(self, key: Hashable, fmt: str, *args: Any):
+        self.seen += 1
+        if self.mode == "off" or not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        if self.mode == "sampled" and not self._sample(key):
+            return
+        self.emitted += 1
+        self.logger.debug(fmt, *args)
+
+    def _sample(self, key: Hashable) -> bool:
+        if self.sample_every and (self.seen - 1) % self.sample_every == 0:
+            return True
+        if self.first_per_key:
+            now = int(time.monotonic())
+            if now != self._second:
+                self._second = now
+                self._per_key.clear()
+            count = self._per_key.get(key, 0)
+            if count < self.first_per_key:
+                self._per_key[key] = count + 1
+                return True
+        return False
+
+
+def configure_logging():
+    """
+    Root logger setup; level from SENSOR_LOG_LEVEL (default INFO).
+    """
+    level = os.environ.get("SENSOR_LOG_LEVEL", "INFO").strip().upper()
+    logging.basicConfig(level=getattr(logging, level, logging.INFO), format=LOG_FORMAT)
@@ -1,25 +1,96 @@
 # sensor_app/main.py
-import sys, logging
-from PySide6.QtWidgets import QApplication
+import time
+STARTED = time.perf_counter()
 
+import os, sys, logging
+
+# Only what ingest needs is imported up front: MQTT connects and samples are
+# staged while PySide6 and pyqtgraph load and the window is built. With
+# SENSOR_INGEST=process the spawned ingest process also re-imports this
+# module, so it must not pull in Qt.
 from mqtt_client import MQTTClient
 from data_buffer import CircularBuffer
-from ui import MainWindow
+from storage import SampleStore
+from decoders import parse_decoder_map
+from staging import TopicRouter
+from topic_trie import is_wildcard
+from log_sampling import configure_logging
+
+# Level from SENSOR_LOG_LEVEL (default INFO); per-message lines from SENSOR_FRAME_LOG
+configure_logging()
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+
+def startup(step: str):
+    # Startup milestones (bench_startup.py reads these)
+    logger.info("Startup: %s after %.1f ms", step, (time.perf_counter() - STARTED) * 1000)
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s %(name)s %(levelname)s: %(message)s"
-)
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # Comma-separated topics; wildcard filters (sensor/#, +/temperature) add a
+    # plot for each matching topic as it first publishes
+    topics = os.environ.get("SENSOR_TOPICS", "sensor/temperature,sensor/humidity,sensor/co2")
+    topics = [t.strip() for t in topics.split(",") if t.strip()]
+    maxlen = int(os.environ.get("SENSOR_BUFFER_LEN", 1000))
+    exact = [t for t in topics if not is_wildcard(t)]
+    subscriptions = [t for t in topics if is_wildcard(t)]
 
-    topics = ["sensor/temperature", "sensor/humidity", "sensor/co2"]
-    buffers = {t: CircularBuffer(maxlen=1000) for t in topics}
-    mqtt = MQTTClient(broker="localhost", port=1883)
+    # Persistent history (SQLite); SENSOR_DB="" keeps data in memory only
+    db_path = os.environ.get("SENSOR_DB", "sensor_data.db")
+    decoder_specs = os.environ.get("SENSOR_DECODERS", "")
+    process_ingest = os.environ.get("SENSOR_INGEST", "thread") == "process"
+
+    if process_ingest:
+        # MQTT, decoding, buffering and the store writer run in their own
+        # process; this one maps its shared buffers and only draws
+        from ingest_process import IngestConfig, IngestProcess
+        ingest = IngestProcess(IngestConfig(
+            "localhost", 1883, exact, subscriptions, decoder_specs, maxlen, db_path
+        ))
+        ingest.start()
+        store = SampleStore(db_path) if db_path else None   # history queries only
+    else:
+        buffers = {t: CircularBuffer(maxlen=maxlen) for t in exact}
+        mqtt = MQTTClient(broker="localhost", port=1883)
+        store = SampleStore(db_path) if db_path else None
+        if store is not None:
+            store.start()
+
+        # Per-topic payload formats, e.g. SENSOR_DECODERS="sensor/co2=numeric;sensor/raw=struct:<d"
+        for topic_filter, decoder in parse_decoder_map(decoder_specs).items():
+            mqtt.set_decoder(topic_filter, decoder)
+        # Handlers only stage samples, so they can run before the window exists
+        router = TopicRouter(buffers)
+        for topic in [*exact, *subscriptions]:
+            mqtt.register_handler(topic, router)
+        mqtt.connect()
+    startup("ingest started")
+
+    from PySide6.QtWidgets import QApplication
+    from ui import MainWindow
+    from resample import dew_point
+    startup("GUI modules loaded")
+
+    app = QApplication(sys.argv)
+    if process_ingest:
+        app.aboutToQuit.connect(ingest.stop)
+        if store is not None:
+            app.aboutToQuit.connect(store.close)
+        window = MainWindow(None, {}, store, buffer_len=maxlen, ingest=ingest)
+    else:
+        if store is not None:
+            app.aboutToQuit.connect(store.close)
+        window = MainWindow(mqtt, buffers, store, subscriptions=subscriptions,
+                            buffer_len=maxlen, router=router)
 
-    window = MainWindow(mqtt, buffers)
-    mqtt.connect()
+    # Aligned views on a shared time grid (SENSOR_ALIGN_STEP, SENSOR_ALIGN_MODE):
+    # dew point from temperature and humidity, and humidity against temperature
+    if "sensor/temperature" in exact and "sensor/humidity" in exact:
+        window.plot_view.add_derived("dew point", dew_point, ["sensor/temperature", "sensor/humidity"])
+        window.plot_view.add_scatter("sensor/temperature", "sensor/humidity")
 
     window.show()
+    startup("window shown")
     sys.exit(app.exec())
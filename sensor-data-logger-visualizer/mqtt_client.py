@@ -1,9 +1,20 @@
-import json
 import logging
 import paho.mqtt.client as mqtt
-from typing import Callable, Dict
+from typing import Callable, Dict, Tuple
+
+from decoders import Decoded, Decoder, JsonDecoder
+from log_sampling import SampledLogger
+from topic_trie import TopicTrie, specificity, validate_filter
 
 logger = logging.getLogger(__name__)
+slog = SampledLogger(logger)
+
+# Handlers receive the concrete topic, so one wildcard handler can serve many
+Handler = Callable[[str, Decoded], None]
+
+# Resolved topics kept before the cache is reset (bounds memory when
+# publishers use unique topic names)
+RESOLVED_CACHE_SIZE = 65536
 
 class MQTTClient:
     def __init__(
@@ -32,9 +43,19 @@ class MQTTClient:
         self._broker = broker
         self._port = port
 
-        # Handlers and QoS settings
-        self._handlers: Dict[str, Callable[[float], None]] = {}
+        # Handlers and decoders by topic filter (wildcards allowed), QoS settings
+        self._handlers = TopicTrie()
+        self._decoders = TopicTrie()
         self._qos_map: Dict[str, int] = qos_map or {}
+        self._default_decoder: Decoder = JsonDecoder("value")
+        # Concrete topic -> (decoder, handlers); replaced whenever a filter changes
+        self._resolved: Dict[str, Tuple[Decoder, Tuple[Handler, ...]]] = {}
+
+        # Counters for the aggregated stats line (see MainWindow)
+        self.received = 0
+        self.errors = 0        # handler exceptions
+        self.bad_payloads = 0  # payloads the topic's decoder rejected
+        self.unhandled = 0
 
         logger.debug(
             "MQTTClient initialized (broker=%s:%d, id=%s)",
@@ -44,37 +65,69 @@ class MQTTClient:
     def register_handler(
         self,
         topic: str,
-        handler: Callable[[float], None],
-        qos: int = 0
+        handler: Handler,
+        qos: int = 0,
+        decoder: Decoder = None
     ):
         """
-        Register a callback for a topic, storing its desired QoS level.
+        Register handler(topic, value) for a topic or wildcard filter
+        ('sensor/#', '+/temperature'), storing its desired QoS level and,
+        optionally, its payload decoder (see set_decoder()).
+        Subscribes right away if already connected.
         """
         if not callable(handler):
             logger.error("Handler for topic '%s' is not callable", topic)
             return
-        self._handlers[topic] = handler
+        try:
+            validate_filter(topic)
+        except ValueError as e:
+            logger.error("Cannot register handler: %s", e)
+            return
+        self._handlers.insert(topic, handler)
         self._qos_map[topic] = qos
+        if decoder is not None:
+            self._decoders.insert(topic, decoder)
+        self._resolved = {}
         logger.debug(
             "Registered handler for '%s' with QoS %d", topic, qos
         )
+        if self._client.is_connected():
+            self._client.subscribe(topic, qos=qos)
+
+    def set_decoder(self, topic: str, decoder: Decoder):
+        """
+        Payload decoder for a topic or wildcard filter (see decoders.py). The
+        most specific matching filter wins; the default is JSON field 'value'.
+        """
+        validate_filter(topic)
+        self._decoders.insert(topic, decoder)
+        self._resolved = {}
+
+    def _resolve(self, topic: str) -> Tuple[Decoder, Tuple[Handler, ...]]:
+        """
+        Decoder and handlers for a concrete topic, most specific filter
+        first. A handler registered under several matching filters (e.g.
+        'sensor/co2' and 'sensor/#') is called once.
+        """
+        handlers = []
+        for _filter, handler in sorted(self._handlers.match(topic), key=lambda m: specificity(m[0])):
+            if handler not in handlers:
+                handlers.append(handler)
+        decoders = sorted(self._decoders.match(topic), key=lambda m: specificity(m[0]))
+        decoder = decoders[0][1] if decoders else self._default_decoder
+        return decoder, tuple(handlers)
 
     def connect(self):
         """
-        Connect to the MQTT broker, publish ONLINE status, and start the network loop.
+        Start the network loop and connect to the MQTT broker from it, so
+        the caller does not wait for the TCP handshake and CONNACK (or for a
+        broker that is down; the loop keeps retrying). ONLINE status is
+        published once connected.
         """
         logger.info(
             "Connecting to MQTT broker %s:%d", self._broker, self._port
         )
-        self._client.connect(self._broker, self._port)
-
-        # Announce online status (retained)
-        self._client.publish(
-            "sensor/logger/status",
-            payload="ONLINE",
-            qos=1,
-            retain=True
-        )
+        self._client.connect_async(self._broker, self._port)
 
         # Start background network loop
         self._client.loop_start()
@@ -98,11 +151,19 @@ class MQTTClient:
 
     def _on_connect(self, client, userdata, flags, rc):
         """
-        Called on successful connection: subscribe to all registered topics.
+        Called on successful connection: announce ONLINE status and subscribe
+        to all registered topics.
         """
         logger.info(
             "Connected (rc=%d). Subscribing to topics: %s", rc,
-            list(self._handlers.keys())
+            list(self._qos_map.keys())
+        )
+        # Announce online status (retained)
+        client.publish(
+            "sensor/logger/status",
+            payload="ONLINE",
+            qos=1,
+            retain=True
         )
         for topic, qos in self._qos_map.items():
             client.subscribe(topic, qos=qos)
@@ -112,24 +173,48 @@ class MQTTClient:
 
     def _on_message(self, client, userdata, msg):
         """
-        Called when a PUBLISH arrives: parse JSON and invoke handler.
+        Called when a PUBLISH arrives: decode with the topic's decoder and
+        invoke its handlers. Undecodable payloads are counted, not turned into 0.
         """
+        topic = msg.topic
+        self.received += 1
+        resolved = self._resolved.get(topic)
+        if resolved is None:
+            # Fill the dict we looked in: a concurrent register_handler()
+            # swaps in a fresh one, so a stale result is never kept
+            cache = self._resolved
+            if len(cache) >= RESOLVED_CACHE_SIZE:
+                cache.clear()
+            resolved = cache[topic] = self._resolve(topic)
+        decoder, handlers = resolved
+        if not handlers:
+            # Warn once per 1000 so an unexpected topic cannot flood the log
+            self.unhandled += 1
+            if self.unhandled % 1000 == 1:
+                logger.warning(
+                    "No handler registered for topic '%s' (%d unhandled so far)",
+                    topic, self.unhandled
+                )
+            return
         try:
-            payload = msg.payload.decode('utf-8')
-            data = json.loads(payload)
-            value = float(data.get('value', 0))
-            logger.debug(
-                "Received message on '%s': %s", msg.topic, value
-            )
-
-            handler = self._handlers.get(msg.topic)
-            if handler:
-                handler(value)
-            else:
+            value = decoder(msg.payload)
+        except Exception as e:
+            # Any decoder failure is a bad payload: letting it reach paho
+            # would stop its network loop and with it all ingest
+            self.bad_payloads += 1
+            if self.bad_payloads % 1000 == 1:
                 logger.warning(
-                    "No handler registered for topic '%s'", msg.topic
+                    "Bad payload on '%s': %s (%d bad so far)", topic, e, self.bad_payloads
                 )
-        except Exception:
-            logger.exception(
-                "Error processing message on '%s'", msg.topic
-            )
+            return
+        slog(topic, "Received message on '%s': %s", topic, value)
+        for handler in handlers:
+            try:
+                handler(topic, value)
+            except Exception:
+                self.errors += 1
+                if self.errors % 1000 == 1:
+                    logger.exception(
+                        "Error processing message on '%s' (%d errors so far)",
+                        topic, self.errors
+                    )
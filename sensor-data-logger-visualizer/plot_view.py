@@ -1,21 +1,117 @@
 import logging
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog
+import math
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QScrollArea, QPushButton, QFileDialog, QComboBox,
+    QCheckBox, QProgressDialog, QMessageBox
+)
+from PySide6.QtCore import Qt, QThread, Signal
+import numpy as np
 import pyqtgraph as pg
 from data_buffer import CircularBuffer
-import pandas as pd
+from decimate import Decimator, minmax_decimate
+from rolling_stats import RollingStats
+from resample import Resampler
+from storage import SampleStore
+from log_sampling import SampledLogger
+
+if TYPE_CHECKING:
+    # Loaded on the first export, not at startup
+    from export import Source
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
+slog = SampledLogger(logger)
+
+# Points drawn per pixel column of the plot (min + max)
+POINTS_PER_PIXEL = 2
+
+# History choices offered when a SampleStore is attached: (label, seconds)
+HISTORY_WINDOWS = [("Live", 0), ("Last 1 h", 3600), ("Last 6 h", 6 * 3600), ("Last 24 h", 24 * 3600)]
+
+# Plot grid layout: plots per row, and the height below which the grid scrolls
+PLOT_COLUMNS = 3
+PLOT_MIN_HEIGHT = 200
+
+# Rolling statistics window (seconds of sample time) and readout refresh period
+STATS_WINDOW = float(os.environ.get("SENSOR_STATS_WINDOW", 60))
+STATS_REFRESH_S = 0.25
+
+# Shared time grid for aligned plots (scatter, derived values): bin width in
+# seconds, resampling mode (last, mean or linear) and span kept
+ALIGN_STEP = float(os.environ.get("SENSOR_ALIGN_STEP", 1.0))
+ALIGN_MODE = os.environ.get("SENSOR_ALIGN_MODE", "mean")
+ALIGN_WINDOW = 600.0
+
+class ExportThread(QThread):
+    """
+    Runs export_merged() off the GUI thread. Progress is reported in
+    permille; cancel() stops it at the next block. The connection the
+    export opened on `store` is closed when it ends.
+    """
+    progress = Signal(int)
+    finished_ok = Signal(int)
+    cancelled = Signal()
+    failed = Signal(str)
+
+    def __init__(self, sources: list["Source"], path: str, fmt: str,
+                 store: Optional[SampleStore] = None, parent=None):
+        super().__init__(parent)
+        self._sources = sources
+        self._store = store
+        self._path = path
+        self._fmt = fmt
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _report(self, done: int, total: int):
+        self.progress.emit(min(1000, done * 1000 // max(total, 1)))
+
+    def run(self):
+        from export import ExportCancelled, export_merged
+        try:
+            rows = export_merged(self._sources, self._path, self._fmt,
+                                 progress=self._report, cancel=self._cancel)
+        except ExportCancelled:
+            logger.info("PlotView: Export to %s cancelled", self._path)
+            self.cancelled.emit()
+        except Exception as e:
+            logger.exception("PlotView: Export to %s failed", self._path)
+            self.failed.emit(str(e))
+        else:
+            self.finished_ok.emit(rows)
+        finally:
+            if self._store is not None:
+                self._store.close_connection()
+
 
 class PlotView(QWidget):
     """
     A QWidget that renders real-time plots using pyqtgraph
-    for each sensor topic in its own subwindow and provides CSV export,
-    with debug logging.
+    for each sensor topic in its own subwindow and provides CSV export.
     """
-    def __init__(self, buffers: dict[str, CircularBuffer]):
+    def __init__(self, buffers: dict[str, CircularBuffer], store: Optional[SampleStore] = None):
         super().__init__()
         self.buffers = buffers
+        self.store = store
+        self._history: Optional[tuple[float, float]] = None   # (start, end) while showing stored data
+        self._refreshes = 0
+        self._refresh_since = time.monotonic()
+        # Buffer version last drawn per topic; -1 forces the first draw
+        self._drawn: dict[str, int] = {topic: -1 for topic in buffers}
+        self._decimators: dict[str, Decimator] = {topic: Decimator() for topic in buffers}
+        # Fed only with samples new since the last refresh (never a rescan)
+        self._stats: dict[str, RollingStats] = {topic: RollingStats(STATS_WINDOW) for topic in buffers}
+        self._stats_shown = 0.0
+        # Aligned plots: name -> (x column or None for time, y column, curve)
+        self._resampler: Optional[Resampler] = None
+        self._aligned: dict[str, tuple[Optional[str], str, pg.PlotDataItem]] = {}
+        self._force_redraw = False
         logger.debug("PlotView: Initializing with buffers: %s", list(self.buffers.keys()))
         self._setup_ui()
         self._setup_plots()
@@ -25,68 +121,309 @@ class PlotView(QWidget):
         logger.debug("PlotView: Setting up UI components")
         # Container layouts
         self.main_layout = QVBoxLayout(self)
-        self.plots_layout = QHBoxLayout()
+        self.plots_layout = QGridLayout()
+        plots = QWidget()
+        plots.setLayout(self.plots_layout)
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(plots)
 
         # Export button
-        self.export_btn = QPushButton("Export to CSV")
-        self.export_btn.clicked.connect(self._export_csv)
+        self.export_btn = QPushButton("Export…")
+        self.export_btn.clicked.connect(self._export)
+        self._export_thread: Optional[ExportThread] = None
+
+        # Live / stored-history selector
+        self.history_box = QComboBox()
+        for label, _seconds in HISTORY_WINDOWS:
+            self.history_box.addItem(label)
+        self.history_box.currentIndexChanged.connect(self._on_history_selected)
+        self.history_box.setVisible(self.store is not None)
 
         # Add subwindow slot for each topic
         self.plot_widgets: dict[str, pg.PlotWidget] = {}
         for topic in self.buffers.keys():
-            pw = pg.PlotWidget(title=topic)
-            pw.setLabel('bottom', 'Time', units='s')
-            pw.setLabel('left', 'Value')
-            pw.addLegend()
-            self.plots_layout.addWidget(pw)
-            self.plot_widgets[topic] = pw
+            self._add_plot_widget(topic)
 
         # Assemble layouts
-        self.main_layout.addLayout(self.plots_layout)
+        self.main_layout.addWidget(scroll)
         btn_layout = QHBoxLayout()
+        btn_layout.addWidget(self.history_box)
+        self.stats_box = QCheckBox(f"Stats (last {STATS_WINDOW:g} s)")
+        self.stats_box.setChecked(True)
+        self.stats_box.toggled.connect(self._on_stats_toggled)
+        btn_layout.addWidget(self.stats_box)
         btn_layout.addStretch()
         btn_layout.addWidget(self.export_btn)
         self.main_layout.addLayout(btn_layout)
         logger.debug("PlotView: UI components added to layout")
 
+    def _new_plot_widget(self, title: str) -> pg.PlotWidget:
+        index = self.plots_layout.count()
+        pw = pg.PlotWidget(title=title)
+        pw.setLabel('bottom', 'Time', units='s')
+        pw.setLabel('left', 'Value')
+        pw.addLegend()
+        pw.setMinimumHeight(PLOT_MIN_HEIGHT)
+        self.plots_layout.addWidget(pw, index // PLOT_COLUMNS, index % PLOT_COLUMNS)
+        return pw
+
+    def _add_plot_widget(self, topic: str) -> pg.PlotWidget:
+        pw = self._new_plot_widget(topic)
+        self.plot_widgets[topic] = pw
+        return pw
+
+    def _aligner(self) -> Resampler:
+        if self._resampler is None:
+            self._resampler = Resampler([], ALIGN_STEP, ALIGN_WINDOW, ALIGN_MODE)
+        return self._resampler
+
+    def add_derived(self, name: str, fn, inputs: list[str]):
+        """
+        Plot fn(*inputs) computed on the shared time grid, e.g. dew point
+        from temperature and humidity. Inputs may be topics that have no
+        buffer yet.
+        """
+        self._aligner().add_derived(name, fn, inputs)
+        pw = self._new_plot_widget(f"{name} ({ALIGN_MODE}, {ALIGN_STEP:g} s grid)")
+        curve = pw.plot([], [], name=name, pen=pg.mkPen(color="w", width=2))
+        self._aligned[name] = (None, name, curve)
+        logger.debug("PlotView: Added derived plot %s from %s", name, inputs)
+
+    def add_scatter(self, x_topic: str, y_topic: str):
+        """
+        Plot y_topic against x_topic, paired on the shared time grid.
+        """
+        aligner = self._aligner()
+        aligner.add_topic(x_topic)
+        aligner.add_topic(y_topic)
+        pw = self._new_plot_widget(f"{y_topic} vs {x_topic}")
+        pw.setLabel('bottom', x_topic)
+        pw.setLabel('left', y_topic)
+        curve = pw.plot([], [], pen=None, symbol='o', symbolSize=4, symbolPen=None,
+                        symbolBrush=pg.mkBrush(100, 180, 255, 160))
+        self._aligned[f"{y_topic} vs {x_topic}"] = (x_topic, y_topic, curve)
+        logger.debug("PlotView: Added scatter plot %s vs %s", y_topic, x_topic)
+
+    def _update_aligned(self):
+        """
+        Feed the resampler only the new samples and redraw aligned plots
+        if any bin changed.
+        """
+        if self._resampler is None or not self._resampler.update(self.buffers):
+            return
+        grid, columns = self._resampler.frame()
+        if not len(grid):
+            return
+        for x_name, y_name, curve in self._aligned.values():
+            y = columns[y_name]
+            if x_name is None:
+                ok = ~np.isnan(y)
+                curve.setData(grid[ok] - grid[0], y[ok])
+            else:
+                x = columns[x_name]
+                ok = ~(np.isnan(x) | np.isnan(y))
+                curve.setData(x[ok], y[ok])
+
+    def _add_curve(self, topic: str):
+        idx = len(self.curves)
+        color = pg.intColor(idx, hues=max(PLOT_COLUMNS, len(self.plot_widgets)))
+        pen = pg.mkPen(color=color, width=2)
+        pw = self.plot_widgets[topic]
+        self.curves[topic] = pw.plot([], [], name=topic, pen=pen)
+        # Rolling mean (dashed) and min/max (dotted) overlays
+        lines = []
+        for style in (Qt.DashLine, Qt.DotLine, Qt.DotLine):
+            line = pg.InfiniteLine(angle=0, movable=False, pen=pg.mkPen(color=color, width=1, style=style))
+            line.setVisible(False)
+            pw.addItem(line)
+            lines.append(line)
+        self._overlays[topic] = lines
+
     def _setup_plots(self):
         logger.debug("PlotView: Initializing plot curves for each subwindow")
         # Create a data curve for each topic in its widget
         self.curves: dict[str, pg.PlotDataItem] = {}
-        for idx, (topic, pw) in enumerate(self.plot_widgets.items()):
-            color = pg.intColor(idx, hues=len(self.plot_widgets))
-            pen = pg.mkPen(color=color, width=2)
-            curve = pw.plot([], [], name=topic, pen=pen)
-            self.curves[topic] = curve
+        self._overlays: dict[str, list[pg.InfiniteLine]] = {}
+        for topic in self.plot_widgets:
+            self._add_curve(topic)
         logger.debug("PlotView: Plot curves configured for topics: %s", list(self.curves.keys()))
 
-    def update_plot(self):
-        logger.debug("PlotView: Updating plot data for each subwindow")
+    def add_topic(self, topic: str):
+        """
+        Add a plot for a topic that was inserted into `buffers` after
+        construction (e.g. discovered through a wildcard subscription).
+        """
+        if topic in self.plot_widgets:
+            return
+        self._drawn[topic] = -1
+        self._decimators[topic] = Decimator()
+        self._stats[topic] = RollingStats(STATS_WINDOW)
+        self._add_plot_widget(topic)
+        self._add_curve(topic)
+        self._force_redraw = True
+        logger.debug("PlotView: Added plot for topic %s", topic)
+
+    def update_plot(self) -> int:
+        """
+        Redraw only the curves whose buffer changed since the last draw.
+        Returns the number of new samples seen across all topics. While
+        history is shown, only a pending redraw (resize, new topic) reloads it.
+        """
+        force, self._force_redraw = self._force_redraw, False
+        if self._history is not None:
+            if force:
+                self.show_window(*self._history)
+            return 0
+        new_samples = 0
         for topic, buf in self.buffers.items():
-            times, values = buf.get_series()
-            logger.debug("PlotView: Retrieved %d points for topic %s", len(times), topic)
-            if times and values:
-                t0 = times[0]
-                rel = [t - t0 for t in times]
-                self.curves[topic].setData(rel, values)
-        logger.debug("PlotView: Plot curves updated")
-
-    def _export_csv(self):
-        logger.debug("PlotView: Export CSV triggered")
-        path, _ = QFileDialog.getSaveFileName(
-            self, "Save Data to CSV", filter="CSV Files (*.csv)"
+            version = buf.version
+            drawn = self._drawn[topic]
+            if version == drawn and not force:
+                continue
+            new_samples += version - max(drawn, 0)
+            self._drawn[topic] = version
+            decimator = self._decimators[topic]
+            decimator.target = max(100, POINTS_PER_PIXEL * self.plot_widgets[topic].width())
+            times, values = decimator.series(buf)
+            slog(topic, "PlotView: Retrieved %d points for topic %s", len(times), topic)
+            if len(times):
+                self.curves[topic].setData(times - times[0], values)
+            self._stats[topic].follow(buf)
+        if new_samples:
+            self._update_aligned()
+            self._refreshes += 1
+        now = time.monotonic()
+        if now - self._stats_shown >= STATS_REFRESH_S and self.stats_box.isChecked():
+            self._stats_shown = now
+            self._show_stats()
+        return new_samples
+
+    def _show_stats(self):
+        """
+        Rolling statistics as a readout in each plot title, plus mean and
+        min/max lines. O(1) per topic apart from the quantile bucket walk.
+        """
+        for topic, stats in self._stats.items():
+            if not len(stats):
+                continue
+            s = stats.summary()
+            self.plot_widgets[topic].setTitle(
+                f"{topic}<br><span style='font-size:8pt'>mean {s.mean:.4g} ± {s.std:.3g} · "
+                f"min {s.min:.4g} · max {s.max:.4g} · p50 {s.p50:.4g} · p95 {s.p95:.4g} · "
+                f"p99 {s.p99:.4g} (n={s.count})</span>"
+            )
+            for line, value in zip(self._overlays[topic], (s.mean, s.min, s.max)):
+                line.setValue(value)
+                line.setVisible(not math.isnan(value))
+
+    def _on_stats_toggled(self, checked: bool):
+        if checked and self._history is None:
+            self._show_stats()
+        else:
+            self._hide_stats()
+
+    def _hide_stats(self):
+        for topic, pw in self.plot_widgets.items():
+            pw.setTitle(topic)
+            for line in self._overlays[topic]:
+                line.setVisible(False)
+
+    def show_window(self, t_start: float, t_end: float):
+        """
+        Freeze live updates and draw [t_start, t_end) from the SampleStore,
+        decimated to the widget width.
+        """
+        if self.store is None:
+            logger.warning("PlotView: no sample store attached; cannot load history")
+            return
+        self._history = (t_start, t_end)
+        self._force_redraw = False
+        # The rolling statistics describe the live window only
+        self._hide_stats()
+        started = time.perf_counter()
+        points = 0
+        for topic, curve in self.curves.items():
+            times, values = self.store.query(topic, t_start, t_end)
+            target = max(100, POINTS_PER_PIXEL * self.plot_widgets[topic].width())
+            times, values = minmax_decimate(times, values, target)
+            curve.setData(times - t_start, values)
+            points += len(times)
+        logger.info("PlotView: Loaded history %.0f s window (%d points drawn) in %.1f ms",
+                    t_end - t_start, points, (time.perf_counter() - started) * 1e3)
+
+    def show_live(self):
+        """
+        Return to the live ring-buffer view.
+        """
+        self._history = None
+        self._force_redraw = True
+        self._stats_shown = 0.0
+
+    def _on_history_selected(self, index: int):
+        seconds = HISTORY_WINDOWS[index][1]
+        if not seconds:
+            self.show_live()
+        else:
+            now = time.time()
+            self.show_window(now - seconds, now)
+
+    def resizeEvent(self, event):
+        # The point budget follows the widget width: redraw (or re-query the
+        # shown history) once on the next tick, not on every resize event
+        super().resizeEvent(event)
+        self._force_redraw = True
+
+    def take_refresh_rate(self) -> float:
+        """
+        Plot refreshes (ticks that redrew at least one curve) per second
+        since the previous call.
+        """
+        now = time.monotonic()
+        rate = self._refreshes / max(now - self._refresh_since, 1e-9)
+        self._refreshes, self._refresh_since = 0, now
+        return rate
+
+    def _export_sources(self) -> list["Source"]:
+        """
+        The shown history window streamed from the store, or else the live
+        ring buffers.
+        """
+        from export import Source
+        if self._history is not None and self.store is not None:
+            t_start, t_end = self._history
+            return [Source.from_store(topic, self.store, t_start, t_end) for topic in self.buffers]
+        return [Source.from_buffer(topic, buf) for topic, buf in self.buffers.items()]
+
+    def _export(self):
+        logger.debug("PlotView: Export triggered")
+        if self._export_thread is not None:
+            return
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export Data", filter="CSV Files (*.csv);;Parquet Files (*.parquet)"
         )
         if not path:
             logger.debug("PlotView: Export cancelled by user")
             return
-        dfs = []
-        for topic, buf in self.buffers.items():
-            times, values = buf.get_series()
-            logger.debug("PlotView: Adding %d records for topic %s to CSV DataFrame", len(times), topic)
-            dfs.append(pd.DataFrame({
-                "timestamp": times,
-                topic: values
-            }))
-        combined = pd.concat(dfs, axis=1)
-        combined.to_csv(path, index=False)
-        logger.info("PlotView: Data exported to CSV at %s", path)
+        fmt = "parquet" if path.endswith(".parquet") or "Parquet" in selected else "csv"
+
+        dialog = QProgressDialog(f"Exporting to {path}…", "Cancel", 0, 1000, self)
+        dialog.setMinimumDuration(300)
+        thread = ExportThread(self._export_sources(), path, fmt, self.store, self)
+        thread.progress.connect(dialog.setValue)
+        dialog.canceled.connect(thread.cancel)
+
+        def finish(message: Optional[str] = None):
+            dialog.reset()
+            self._export_thread = None
+            self.export_btn.setEnabled(True)
+            if message is not None:
+                QMessageBox.warning(self, "Export failed", message)
+
+        thread.finished_ok.connect(lambda rows: finish())
+        thread.cancelled.connect(finish)
+        thread.failed.connect(finish)
+        thread.finished.connect(thread.deleteLater)
+        self._export_thread = thread
+        self.export_btn.setEnabled(False)
+        thread.start()
@@ -0,0 +1,270 @@
+import logging
+import math
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+MODES = ("last", "mean", "linear")
+
+# Frame: shared grid timestamps and one aligned column per topic
+Frame = Tuple[np.ndarray, Dict[str, np.ndarray]]
+
+
+def resample(times: np.ndarray, values: np.ndarray, grid: np.ndarray, mode: str = "last") -> np.ndarray:
+    """
+    One series onto `grid` (evenly spaced bin starts, ascending), vectorised:
+
+        last    last sample in [grid[i], grid[i] + step), carried forward
+                over empty bins (the as-of value at the end of the bin)
+        mean    mean of the samples in [grid[i], grid[i] + step); NaN if none
+        linear  linear interpolation at each grid time; NaN outside the data
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown resampling mode '{mode}'")
+    out = np.full(len(grid), np.nan)
+    if not len(times) or not len(grid):
+        return out
+    step = grid[1] - grid[0] if len(grid) > 1 else math.inf
+    if mode == "last":
+        idx = np.searchsorted(times, grid + step, side="left") - 1
+        ok = idx >= 0
+        out[ok] = values[idx[ok]]
+    elif mode == "mean":
+        bins = np.floor((times - grid[0]) / step).astype(np.int64)
+        ok = (bins >= 0) & (bins < len(grid))
+        counts = np.bincount(bins[ok], minlength=len(grid))
+        sums = np.bincount(bins[ok], weights=values[ok], minlength=len(grid))
+        np.divide(sums, counts, out=out, where=counts > 0)
+    else:
+        out = np.interp(grid, times, values, left=np.nan, right=np.nan)
+    return out
+
+
+def dew_point(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """
+    Dew point (°C) from temperature (°C) and relative humidity (%), Magnus
+    formula; NaN where either input is missing or humidity is not positive.
+    """
+    a, b = 17.62, 243.12
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gamma = np.log(humidity / 100.0) + a * temperature / (b + temperature)
+        return b * gamma / (a - gamma)
+
+
+class _Column:
+    """
+    One topic on the shared grid: a ring of `capacity` bins addressed by
+    absolute bin number (floor(t / step)), plus the samples of bins that are
+    not final yet. New samples only recompute bins from the oldest open one.
+    """
+    def __init__(self, capacity: int, step: float, mode: str):
+        self.step = step
+        self.mode = mode
+        self.values = np.full(capacity, np.nan)
+        self.newest = None    # newest bin written
+        self.tail_t = np.empty(0)
+        self.tail_v = np.empty(0)
+        self.seen = 0         # CircularBuffer version consumed
+        self.late = 0         # samples older than the open bins, skipped
+
+    def _write(self, first: int, values: np.ndarray):
+        cap = len(self.values)
+        if len(values) > cap:
+            first += len(values) - cap
+            values = values[-cap:]
+        idx = np.arange(first, first + len(values)) % cap
+        self.values[idx] = values
+        self.newest = first + len(values) - 1 if self.newest is None else max(self.newest, first + len(values) - 1)
+
+    def _prior(self, b: int) -> float:
+        """
+        Stored value of bin b, or NaN if it was never written or overwritten.
+        """
+        if self.newest is None or b > self.newest or b <= self.newest - len(self.values):
+            return math.nan
+        return self.values[b % len(self.values)]
+
+    def add(self, times: np.ndarray, values: np.ndarray) -> Optional[int]:
+        """
+        Add samples; returns the oldest bin that changed. Samples older than
+        the newest one already added are skipped and counted in `late`.
+        """
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+        if len(self.tail_t):
+            keep = times >= self.tail_t[-1]
+            if not keep.all():
+                self.late += int((~keep).sum())
+                times, values = times[keep], values[keep]
+            times = np.concatenate((self.tail_t, times))
+            values = np.concatenate((self.tail_v, values))
+        if not len(times):
+            return None
+        step = self.step
+        cap = len(self.values)
+
+        if self.mode == "linear":
+            # Grid points between the first and last sample are final; bins
+            # that fall out of the ring anyway are never materialised
+            lo = int(math.ceil(times[0] / step))
+            hi = int(math.floor(times[-1] / step))
+            start = lo if self.newest is None else min(lo, self.newest + 1)
+            start = max(start, max(lo, hi) - cap + 1)
+            if self.newest is not None and start < lo:
+                self._write(start, np.full(lo - start, np.nan))
+            if hi >= lo:
+                lo = max(lo, hi - cap + 1)
+                self._write(lo, np.interp(np.arange(lo, hi + 1) * step, times, values))
+            self.tail_t, self.tail_v = times[-1:], values[-1:]
+            return start
+
+        bins = np.floor(times / step).astype(np.int64)
+        first, last = int(bins[0]), int(bins[-1])
+        # Gaps since the previous write are filled too, but only as far back
+        # as the ring reaches, so a jump in time cannot allocate every bin
+        start = first if self.newest is None else min(first, self.newest + 1)
+        start = max(start, last - cap + 1)
+        span = last - start + 1
+        if self.mode == "mean":
+            ok = bins >= start
+            counts = np.bincount(bins[ok] - start, minlength=span)
+            sums = np.bincount(bins[ok] - start, weights=values[ok], minlength=span)
+            out = np.full(span, np.nan)
+            np.divide(sums, counts, out=out, where=counts > 0)
+        else:
+            # As-of: last sample in or before each bin, else the bin before
+            ends = np.searchsorted(bins, np.arange(start, last + 1), side="right") - 1
+            out = np.where(ends >= 0, values[np.maximum(ends, 0)], self._prior(start - 1))
+        self._write(start, out)
+        # The newest bin stays open until a sample past it arrives
+        open_from = int(np.searchsorted(bins, last, side="left"))
+        self.tail_t, self.tail_v = times[open_from:], values[open_from:]
+        return start
+
+    def read(self, first: int, last: int) -> np.ndarray:
+        """
+        Bins first..last; bins never written or already overwritten are NaN,
+        and in 'last' mode bins after the newest repeat its value.
+        """
+        cap = len(self.values)
+        absolute = np.arange(first, last + 1)
+        out = self.values[absolute % cap]
+        if self.newest is None:
+            return np.full(len(absolute), np.nan)
+        out[(absolute <= self.newest - cap) | (absolute > self.newest)] = np.nan
+        if self.mode == "last" and last > self.newest >= first - 1:
+            out[absolute > self.newest] = self.values[self.newest % cap]
+        return out
+
+
+class Resampler:
+    """
+    Incremental alignment of several topics onto one time grid of `step`
+    seconds, keeping the last `window` seconds. update() feeds each
+    column only the samples appended to its CircularBuffer since the last
+    call, and only re-evaluates bins from the oldest one still open, so
+    keeping an aligned frame current costs O(new samples), not O(window).
+
+    Derived columns (e.g. dew point from temperature and humidity) are
+    vectorised functions of other columns, recomputed for changed bins only.
+    """
+    def __init__(self, topics: Sequence[str], step: float = 1.0, window: float = 600.0, mode: str = "last"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown resampling mode '{mode}'")
+        if step <= 0:
+            raise ValueError("step must be positive")
+        self.step = step
+        self.mode = mode
+        self.capacity = max(2, int(math.ceil(window / step)))
+        self._columns: Dict[str, _Column] = {t: _Column(self.capacity, step, mode) for t in topics}
+        self._derived: Dict[str, Tuple[Callable[..., np.ndarray], Tuple[str, ...], np.ndarray]] = {}
+        self._dirty: Optional[int] = None   # oldest changed bin since the last derive
+        self.newest: Optional[int] = None
+        self.version = 0                    # bumped whenever the frame changes
+
+    @property
+    def topics(self) -> list:
+        return list(self._columns)
+
+    def add_topic(self, topic: str):
+        if topic not in self._columns:
+            self._columns[topic] = _Column(self.capacity, self.step, self.mode)
+
+    def add_derived(self, name: str, fn: Callable[..., np.ndarray], inputs: Sequence[str]):
+        """
+        A column computed as fn(*input_columns) on the aligned grid.
+        """
+        for topic in inputs:
+            self.add_topic(topic)
+        self._derived[name] = (fn, tuple(inputs), np.full(self.capacity, np.nan))
+        self._dirty = self.newest - self.capacity + 1 if self.newest is not None else None
+
+    def add(self, topic: str, times: np.ndarray, values: np.ndarray):
+        """
+        Feed time-ordered samples of one topic directly.
+        """
+        changed = self._columns[topic].add(np.asarray(times, dtype=np.float64),
+                                           np.asarray(values, dtype=np.float64))
+        if changed is None:
+            return
+        newest = self._columns[topic].newest
+        self.newest = newest if self.newest is None else max(self.newest, newest)
+        self._dirty = changed if self._dirty is None else min(self._dirty, changed)
+        self.version += 1
+
+    def update(self, buffers: Dict[str, CircularBuffer]) -> bool:
+        """
+        Pull the samples appended since the previous call from each topic's
+        buffer (one snapshot of just those). Returns True if anything changed.
+        """
+        before = self.version
+        for topic, column in self._columns.items():
+            buf = buffers.get(topic)
+            if buf is None or buf.version == column.seen:
+                continue
+            version, times, values = buf.snapshot(buf.version - column.seen + 1024)
+            fresh = min(len(times), version - column.seen)
+            column.seen = version
+            if fresh > 0:
+                self.add(topic, times[-fresh:], values[-fresh:])
+        return self.version != before
+
+    def _derive(self):
+        if self._dirty is None or self.newest is None or not self._derived:
+            return
+        first = max(self._dirty, self.newest - self.capacity + 1)
+        idx = np.arange(first, self.newest + 1) % self.capacity
+        for fn, inputs, out in self._derived.values():
+            out[idx] = fn(*(self._columns[t].read(first, self.newest) for t in inputs))
+        self._dirty = None
+
+    def frame(self, topics: Optional[Sequence[str]] = None) -> Frame:
+        """
+        The aligned window: grid timestamps (bin starts) and one column per
+        topic and derived name (all of them by default).
+        """
+        if self.newest is None:
+            return np.empty(0), {}
+        self._derive()
+        first = self.newest - self.capacity + 1
+        names = topics if topics is not None else [*self._columns, *self._derived]
+        columns = {}
+        for name in names:
+            if name in self._derived:
+                idx = np.arange(first, self.newest + 1) % self.capacity
+                columns[name] = self._derived[name][2][idx]
+            else:
+                columns[name] = self._columns[name].read(first, self.newest)
+        grid = np.arange(first, self.newest + 1) * self.step
+        # Leading bins before any topic had data are dropped
+        filled = np.zeros(len(grid), dtype=bool)
+        for values in columns.values():
+            filled |= ~np.isnan(values)
+        start = int(np.argmax(filled)) if filled.any() else len(grid)
+        return grid[start:], {name: values[start:] for name, values in columns.items()}
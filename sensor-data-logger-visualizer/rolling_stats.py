@@ -0,0 +1,293 @@
+import logging
+import math
+from collections import deque
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# The running mean/M2 are recomputed exactly from the window after this many
+# removals per sample in it, so floating-point drift from removals stays bounded
+RESYNC_AFTER = 4
+
+# Values closer to zero than this share the sketch's zero bucket
+SKETCH_MIN_VALUE = 1e-9
+
+
+class Summary(NamedTuple):
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    p50: float
+    p95: float
+    p99: float
+
+
+class _Extremes:
+    """
+    Sliding-window max (or min, with sign=-1) via a monotonic deque of
+    (timestamp, value) candidates. A batch contributes only its suffix
+    maxima, found with one reversed np.maximum.accumulate, so each sample
+    is pushed and popped at most once.
+    """
+    def __init__(self, sign: float):
+        self.sign = sign
+        self._items: deque = deque()
+
+    def push(self, times: np.ndarray, values: np.ndarray):
+        v = values * self.sign
+        # Candidates: samples not exceeded by any later sample of the batch
+        later = np.maximum.accumulate(v[::-1])[::-1]
+        keep = np.empty(len(v), dtype=bool)
+        keep[-1] = True
+        keep[:-1] = v[:-1] > later[1:]
+        items = self._items
+        top = later[0]
+        while items and items[-1][1] <= top:
+            items.pop()
+        items.extend(zip(times[keep].tolist(), v[keep].tolist()))
+
+    def expire(self, cutoff: float):
+        items = self._items
+        while items and items[0][0] < cutoff:
+            items.popleft()
+
+    def value(self) -> float:
+        return self._items[0][1] * self.sign if self._items else math.nan
+
+    def clear(self):
+        self._items.clear()
+
+
+class _Store:
+    """
+    Dense bucket counts of one sign of the sketch, grown as keys appear.
+    """
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys: np.ndarray, sign: int):
+        if not len(keys):
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        if not len(self.counts):
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+        elif lo < self.offset or hi >= self.offset + len(self.counts):
+            new_lo = min(lo, self.offset)
+            new_hi = max(hi, self.offset + len(self.counts) - 1)
+            grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            start = self.offset - new_lo
+            grown[start:start + len(self.counts)] = self.counts
+            self.offset, self.counts = new_lo, grown
+        idx = keys - self.offset
+        self.counts += sign * np.bincount(idx, minlength=len(self.counts))[:len(self.counts)]
+
+
+class QuantileSketch:
+    """
+    DDSketch-style quantile sketch with deletions: values fall into
+    logarithmic buckets, so every quantile is within `relative_accuracy` of
+    a true sample value. Adding or removing a sample is one bucket count
+    update (vectorised per batch); a query walks the buckets, whose number
+    depends on the value range, not on the sample count.
+    """
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive = _Store()
+        self._negative = _Store()
+        self._zero = 0
+        self.count = 0
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _update(self, values: np.ndarray, sign: int):
+        pos = values > SKETCH_MIN_VALUE
+        neg = values < -SKETCH_MIN_VALUE
+        self._positive.add(self._keys(values[pos]), sign)
+        self._negative.add(self._keys(-values[neg]), sign)
+        self._zero += sign * int(len(values) - pos.sum() - neg.sum())
+        self.count += sign * len(values)
+
+    def add(self, values: np.ndarray):
+        self._update(values[~np.isnan(values)], 1)
+
+    def remove(self, values: np.ndarray):
+        self._update(values[~np.isnan(values)], -1)
+
+    def _value(self, key: int) -> float:
+        # Midpoint (in relative terms) of bucket (gamma^(key-1), gamma^key]
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        if self.count <= 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        neg = self._negative.counts[::-1]
+        cum = np.cumsum(neg)
+        if len(cum) and rank < cum[-1]:
+            i = int(np.searchsorted(cum, rank, side="right"))
+            return -self._value(self._negative.offset + len(neg) - 1 - i)
+        rank -= cum[-1] if len(cum) else 0
+        if rank < self._zero:
+            return 0.0
+        rank -= self._zero
+        cum = np.cumsum(self._positive.counts)
+        i = min(int(np.searchsorted(cum, rank, side="right")), len(cum) - 1)
+        return self._value(self._positive.offset + i)
+
+    def clear(self):
+        self.__init__(self.relative_accuracy)
+
+
+class RollingStats:
+    """
+    Statistics over the last `window` seconds of one series (by sample
+    timestamp), updated incrementally as batches arrive:
+
+      mean / std   running Welford mean and M2, merged and un-merged per
+                   batch (Chan et al.), resynchronised from the window now
+                   and then to bound rounding drift
+      min / max    monotonic deques
+      quantiles    QuantileSketch with deletions (±relative_accuracy)
+
+    Every sample is added once and removed once, in amortised O(1). The
+    window itself is kept as a deque of NumPy chunks for the removals.
+    """
+    def __init__(self, window: float = 60.0, relative_accuracy: float = 0.01):
+        self.window = window
+        self._chunks: deque = deque()   # (times, values) in arrival order
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._removed = 0
+        self._max = _Extremes(1.0)
+        self._min = _Extremes(-1.0)
+        self.sketch = QuantileSketch(relative_accuracy)
+        self._seen = 0   # CircularBuffer version consumed by follow()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _moments(values: np.ndarray) -> Tuple[int, float, float]:
+        n = len(values)
+        mean = float(values.mean())
+        return n, mean, float(((values - mean) ** 2).sum())
+
+    def update(self, times: np.ndarray, values: np.ndarray):
+        """
+        Add a time-ordered batch, then expire samples older than the newest
+        timestamp minus `window`. NaN values are skipped.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        ok = ~np.isnan(values)
+        if not ok.all():
+            times, values = times[ok], values[ok]
+        if not len(values):
+            return
+        n_b, mean_b, m2_b = self._moments(values)
+        n = self._count + n_b
+        delta = mean_b - self._mean
+        self._mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * self._count * n_b / n
+        self._count = n
+        self._chunks.append((times, values))
+        self._max.push(times, values)
+        self._min.push(times, values)
+        self.sketch.add(values)
+        self._expire(float(times[-1]) - self.window)
+
+    def _expire(self, cutoff: float):
+        self._max.expire(cutoff)
+        self._min.expire(cutoff)
+        chunks = self._chunks
+        while chunks and chunks[0][0][0] < cutoff:
+            times, values = chunks[0]
+            cut = int(np.searchsorted(times, cutoff, side="left"))
+            gone = values[:cut]
+            if cut < len(times):
+                chunks[0] = (times[cut:], values[cut:])
+            else:
+                chunks.popleft()
+            self._remove(gone)
+
+    def _remove(self, values: np.ndarray):
+        self.sketch.remove(values)
+        n_b = len(values)
+        n = self._count - n_b
+        if n <= 0:
+            self._count, self._mean, self._m2 = 0, 0.0, 0.0
+            return
+        _, mean_b, m2_b = self._moments(values)
+        mean_a = (self._count * self._mean - n_b * mean_b) / n
+        delta = mean_b - mean_a
+        self._m2 = max(0.0, self._m2 - m2_b - delta * delta * n * n_b / self._count)
+        self._mean = mean_a
+        self._count = n
+        self._removed += n_b
+        if self._removed > RESYNC_AFTER * self._count:
+            self._resync()
+
+    def _resync(self):
+        values = np.concatenate([v for _t, v in self._chunks])
+        self._count, self._mean, self._m2 = self._moments(values)
+        self._removed = 0
+
+    def follow(self, buf: CircularBuffer) -> int:
+        """
+        Feed the samples appended to `buf` since the previous call, read
+        with one snapshot of just those samples. Returns how many were new;
+        if more than the buffer holds arrived in between, the overwritten
+        ones are skipped.
+        """
+        new = buf.version - self._seen
+        if new <= 0:
+            return 0
+        version, times, values = buf.snapshot(new + 1024)
+        fresh = min(len(times), version - self._seen)
+        self._seen = version
+        if fresh > 0:
+            self.update(times[-fresh:], values[-fresh:])
+        return fresh
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self._count else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self._count - 1)) if self._count > 1 else math.nan
+
+    @property
+    def min(self) -> float:
+        return self._min.value()
+
+    @property
+    def max(self) -> float:
+        return self._max.value()
+
+    def quantile(self, q: float) -> float:
+        return self.sketch.quantile(q)
+
+    def summary(self) -> Summary:
+        return Summary(self._count, self.mean, self.std, self.min, self.max,
+                       self.quantile(0.5), self.quantile(0.95), self.quantile(0.99))
+
+    def clear(self):
+        self._chunks.clear()
+        self._count, self._mean, self._m2, self._removed = 0, 0.0, 0.0, 0
+        self._max.clear()
+        self._min.clear()
+        self.sketch.clear()
@@ -0,0 +1,195 @@
+import glob
+import logging
+import os
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Tuple, TypeVar
+
+import numpy as np
+
+from data_buffer import CircularBuffer
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# Segment names start with this prefix and the owning GUI process id
+SEGMENT_PREFIX = "sensorviz"
+
+# Header: int64 slots in front of the sample arrays
+SEQ, HEAD, COUNT, VERSION = range(4)
+HEADER_BYTES = 4 * 8
+
+# Reader attempts before returning a possibly torn copy
+READ_RETRIES = 100
+
+T = TypeVar("T")
+
+
+def segment_size(maxlen: int) -> int:
+    return HEADER_BYTES + 2 * 2 * maxlen * 8
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    # The GUI process unlinks segments itself (a crashed ingest process must
+    # not take its buffers with it), so keep the resource tracker out of it
+    if os.name == "posix":
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+
+def remove_stale_segments():
+    """
+    Unlink segments left in /dev/shm by a GUI process that no longer runs.
+    """
+    for path in glob.glob(f"/dev/shm/{SEGMENT_PREFIX}_*"):
+        try:
+            pid = int(os.path.basename(path).split("_")[1])
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            try:
+                os.unlink(path)
+                logger.info("Removed stale shared buffer %s", path)
+            except OSError:
+                pass
+        except (ValueError, IndexError, PermissionError):
+            pass
+
+
+class SharedRingBuffer(CircularBuffer):
+    """
+    A CircularBuffer whose arrays and head/count/version live in a
+    multiprocessing.shared_memory segment, so the ingest process can write
+    samples that the GUI process reads without copying them through a pipe.
+
+    One process writes (create() or attach(writer=True)); readers attach
+    with NumPy views marked read-only. Writes bump a sequence number to odd
+    before and to even after touching the segment; readers retry a copy
+    until it was taken between two equal, even sequence numbers (a seqlock),
+    so they never see a half-written window and never block the writer.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, maxlen: int, writer: bool):
+        # Storage comes from the segment; CircularBuffer.__init__ is not used
+        if shm.size < segment_size(maxlen):
+            raise ValueError(f"segment {shm.name} too small for maxlen={maxlen}")
+        self._shm = shm
+        self._lock = threading.Lock()
+        self._maxlen = maxlen
+        self.writer = writer
+        self._header = np.ndarray((4,), dtype=np.int64, buffer=shm.buf)
+        self._times = np.ndarray((2 * maxlen,), dtype=np.float64, buffer=shm.buf, offset=HEADER_BYTES)
+        self._values = np.ndarray((2 * maxlen,), dtype=np.float64, buffer=shm.buf,
+                                  offset=HEADER_BYTES + 2 * maxlen * 8)
+        if not writer:
+            for array in (self._header, self._times, self._values):
+                array.flags.writeable = False
+        elif self._header[SEQ] & 1:
+            # The previous writer died mid-write. extend() fills slots from
+            # head on before head and count move, and in a full ring those
+            # are the oldest samples of the window, so any of it may be
+            # overwritten or torn: start over with an empty window
+            self._header[COUNT] = 0
+            self._header[SEQ] += 1
+            logger.warning("SharedRingBuffer %s: previous writer died mid-write; window discarded", shm.name)
+
+    @classmethod
+    def create(cls, name: str, maxlen: int) -> "SharedRingBuffer":
+        shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(maxlen))
+        _untrack(shm)
+        shm.buf[:HEADER_BYTES] = bytes(HEADER_BYTES)
+        logger.debug("SharedRingBuffer %s created with maxlen=%d", name, maxlen)
+        return cls(shm, maxlen, writer=True)
+
+    @classmethod
+    def attach(cls, name: str, maxlen: int, writer: bool = False) -> "SharedRingBuffer":
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        return cls(shm, maxlen, writer)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    # CircularBuffer keeps these as attributes; here they are header slots
+    @property
+    def _head(self) -> int:
+        return int(self._header[HEAD])
+
+    @_head.setter
+    def _head(self, value: int):
+        self._header[HEAD] = value
+
+    @property
+    def _count(self) -> int:
+        return int(self._header[COUNT])
+
+    @_count.setter
+    def _count(self, value: int):
+        self._header[COUNT] = value
+
+    @property
+    def _version(self) -> int:
+        return int(self._header[VERSION])
+
+    @_version.setter
+    def _version(self, value: int):
+        self._header[VERSION] = value
+
+    # ——— Writer ————————————————————————————————————————————————————
+    def append(self, timestamp: float, value: float):
+        self._header[SEQ] += 1
+        try:
+            super().append(timestamp, value)
+        finally:
+            self._header[SEQ] += 1
+
+    def extend(self, timestamps, values):
+        self._header[SEQ] += 1
+        try:
+            super().extend(timestamps, values)
+        finally:
+            self._header[SEQ] += 1
+
+    # ——— Readers ———————————————————————————————————————————————————
+    def _consistent(self, read: Callable[[], T]) -> T:
+        header = self._header
+        for _ in range(READ_RETRIES):
+            seq = int(header[SEQ])
+            if seq & 1:
+                time.sleep(0)
+                continue
+            result = read()
+            if int(header[SEQ]) == seq:
+                return result
+        logger.warning("SharedRingBuffer %s: writer kept it busy; returning an unchecked copy", self.name)
+        return read()
+
+    def get_series(self, last_n: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        return self._consistent(lambda: CircularBuffer.get_series(self, last_n))
+
+    def snapshot(self, last_n: int = None) -> Tuple[int, np.ndarray, np.ndarray]:
+        return self._consistent(lambda: CircularBuffer.snapshot(self, last_n))
+
+    def snapshot_oldest(self, first_n: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        return self._consistent(lambda: CircularBuffer.snapshot_oldest(self, first_n))
+
+    def get_range(self, t_start: float, t_end: float) -> Tuple[np.ndarray, np.ndarray]:
+        return self._consistent(lambda: CircularBuffer.get_range(self, t_start, t_end))
+
+    def close(self):
+        """
+        Drop the NumPy views and unmap the segment (it stays for other processes).
+        """
+        self._header = self._times = self._values = None
+        try:
+            self._shm.close()
+        except BufferError:
+            logger.warning("SharedRingBuffer %s still has exported views; leaving it mapped", self.name)
+
+    def unlink(self):
+        if os.name == "posix":
+            # SharedMemory.unlink() unregisters the name again
+            resource_tracker.register(self._shm._name, "shared_memory")
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,82 +1,311 @@
-import time
+#!/usr/bin/env python3
+"""
+Sensor load generator. With no options it behaves like the original
+simulator: sensor/temperature, sensor/humidity and sensor/co2 once per
+second at QoS 0, 1 and 2 with {"value": <float>} payloads.
+
+For saturation tests it scales to thousands of topics (--topics), a per
+topic message rate (--rate), several payload formats (--format, --batch),
+a QoS mix (--qos) and square-wave bursts (--burst-every/-len/-factor),
+spread over several worker processes (--workers), each with its own MQTT
+connection. Every --report seconds it prints the achieved msgs/s and the
+publish-ack latency percentiles (publish() call to on_publish: PUBACK for
+QoS 1, PUBCOMP for QoS 2, socket write for QoS 0).
+"""
+
+import argparse
 import json
-import random
 import logging
+import multiprocessing
+import os
+import queue
+import random
+import struct
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
 import paho.mqtt.client as mqtt
 
 logger = logging.getLogger(__name__)
 
-if __name__ == '__main__':
-    # — Configure logging —
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s %(name)s %(levelname)s: %(message)s'
-    )
-
-    # — MQTT setup —
-    broker = 'localhost'
-    port   = 1883
-
-    # Topics and their QoS levels
-    qos_map = {
-        'sensor/temperature': 0,
-        'sensor/humidity':    1,
-        'sensor/co2':         2,
-    }
-
-    client = mqtt.Client(
-        client_id="simulator",
-        clean_session=True
-    )
-
-    # Last Will & Testament: notify if the simulator goes offline unexpectedly
-    client.will_set(
-        'sensor/logger/status',
-        payload='OFFLINE',
-        qos=1,
-        retain=True
-    )
-
-    client.connect(broker, port)
-    client.loop_start()
-
-    # Announce online status
-    client.publish(
-        'sensor/logger/status',
-        payload='ONLINE',
-        qos=1,
-        retain=True
-    )
-
-    logger.info("Simulator started publishing to %s:%s", broker, port)
+KINDS = {
+    "temperature": (20.0, 30.0),
+    "humidity": (30.0, 70.0),
+    "co2": (400.0, 600.0),
+}
+
+# Payload formats and the visualizer decoder spec (SENSOR_DECODERS) for each
+FORMATS = {
+    "json": "json:value",
+    "json-ts": "json-batch:.",
+    "numeric": "numeric",
+    "struct": "struct:<d",
+    "json-batch": "json-batch",
+    "binary-batch": "binary-batch",
+}
+
+# Worker pacing: messages due are published in slices of this many seconds
+TICK = 0.005
+
+STATUS_TOPIC = "sensor/logger/status"
+
+
+def topic_names(count: int, prefix: str) -> List[Tuple[str, str]]:
+    """
+    (topic, kind) pairs: the three classic topics, or
+    <prefix>/node0000/temperature, <prefix>/node0000/humidity, ... beyond that.
+    """
+    kinds = list(KINDS)
+    if count <= len(kinds):
+        return [(f"{prefix}/{kind}", kind) for kind in kinds[:count]]
+    return [(f"{prefix}/node{i // len(kinds):04d}/{kinds[i % len(kinds)]}", kinds[i % len(kinds)])
+            for i in range(count)]
+
+
+def make_payload(fmt: str, kind: str, batch: int) -> bytes:
+    lo, hi = KINDS[kind]
+    now = time.time()
+    if fmt == "json":
+        return json.dumps({"value": round(random.uniform(lo, hi), 2)}).encode()
+    if fmt == "json-ts":
+        return json.dumps({"ts": now, "value": round(random.uniform(lo, hi), 2)}).encode()
+    if fmt == "numeric":
+        return f"{random.uniform(lo, hi):.2f}".encode()
+    if fmt == "struct":
+        return struct.pack("<d", random.uniform(lo, hi))
+    # Batches: `batch` samples spread over the last 10 ms
+    times = now - np.linspace(0.01, 0, batch)
+    values = np.random.uniform(lo, hi, batch).round(2)
+    if fmt == "json-batch":
+        return json.dumps({"samples": np.column_stack((times, values)).tolist()}).encode()
+    return np.column_stack((times, values)).astype("<f8").tobytes()
+
+
+def burst_factor(elapsed: float, args) -> float:
+    if not args.burst_every:
+        return 1.0
+    return args.burst_factor if elapsed % args.burst_every < args.burst_len else 1.0
+
+
+class Worker:
+    """
+    One MQTT connection publishing a shard of the topics. Latency is paired
+    up without locks: publish() and on_publish both setdefault() the message
+    id in one dict, and whichever comes second finds the other's time.
+    """
+    def __init__(self, index: int, topics: List[Tuple[str, str, int]], args, results):
+        self.index = index
+        self.topics = topics
+        self.args = args
+        self.results = results
+        self.pending: Dict[int, tuple] = {}
+        self.latencies: Dict[int, List[float]] = {0: [], 1: [], 2: []}
+        self.sent = 0
+        self.acked = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+        self.client = mqtt.Client(client_id=f"simulator-{os.getpid()}-{index}", clean_session=True)
+        self.client.max_inflight_messages_set(args.inflight)
+        self.client.on_publish = self._on_publish
+        if index == 0:
+            # Last Will & Testament: notify if the simulator goes offline unexpectedly
+            self.client.will_set(STATUS_TOPIC, payload="OFFLINE", qos=1, retain=True)
 
+    def _on_publish(self, client, userdata, mid):
+        now = time.perf_counter()
+        other = self.pending.setdefault(mid, (None, now))
+        if other[0] is not None:
+            del self.pending[mid]
+            self.latencies[other[0]].append(now - other[1])
+            self.acked += 1
+
+    def _publish(self, topic: str, kind: str, qos: int):
+        payload = make_payload(self.args.format, kind, self.args.batch)
+        started = time.perf_counter()
+        info = self.client.publish(topic, payload, qos=qos)
+        # Without a connection paho queues QoS 1/2 messages for the reconnect
+        # but drops QoS 0 ones, which then never see on_publish
+        if info.rc != mqtt.MQTT_ERR_SUCCESS and (info.rc != mqtt.MQTT_ERR_NO_CONN or qos == 0):
+            self.errors += 1
+            return
+        self.sent += 1
+        other = self.pending.setdefault(info.mid, (qos, started))
+        if other[0] is None:
+            del self.pending[info.mid]
+            self.latencies[qos].append(other[1] - started)
+            self.acked += 1
+
+    def _report(self):
+        latencies, self.latencies = self.latencies, {0: [], 1: [], 2: []}
+        self.results.put((self.index, self.sent, self.acked, self.errors, time.monotonic() - self.started,
+                          {qos: np.array(values) for qos, values in latencies.items() if values}))
+
+    def run(self, stop):
+        args = self.args
+        self.client.connect(args.broker, args.port)
+        self.client.loop_start()
+        if self.index == 0:
+            self.client.publish(STATUS_TOPIC, payload="ONLINE", qos=1, retain=True)
+        started = self.started = time.monotonic()
+        next_report = started + args.report
+        due = 0.0     # messages owed so far
+        cursor = 0    # next topic, round robin
+        rate = len(self.topics) * args.rate
+        last = started
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                if args.duration and now - started >= args.duration:
+                    break
+                current = rate * burst_factor(now - started, args)
+                due += current * (now - last)
+                last = now
+                # At most one second of debt when publishing falls behind
+                due = min(due, current)
+                while due >= 1:
+                    topic, kind, qos = self.topics[cursor]
+                    cursor = (cursor + 1) % len(self.topics)
+                    self._publish(topic, kind, qos)
+                    due -= 1
+                if now >= next_report:
+                    next_report += args.report
+                    self._report()
+                time.sleep(max(0.0, TICK - (time.monotonic() - now)))
+        finally:
+            # Let outstanding acks arrive before the final report (entries
+            # with qos None are acks of the untracked status messages)
+            deadline = time.monotonic() + 2.0
+            while (any(qos is not None for qos, _t in list(self.pending.values()))
+                   and time.monotonic() < deadline):
+                time.sleep(0.01)
+            if self.index == 0:
+                self.client.publish(STATUS_TOPIC, payload="OFFLINE", qos=1, retain=True).wait_for_publish(2.0)
+            self._report()
+            self.client.loop_stop()
+            self.client.disconnect()
+
+
+def run_worker(index, topics, args, results, stop):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
     try:
-        while True:
-            for topic, qos in qos_map.items():
-                # Generate a random value based on topic
-                if topic.endswith('temperature'):
-                    value = round(random.uniform(20.0, 30.0), 2)
-                elif topic.endswith('humidity'):
-                    value = round(random.uniform(30.0, 70.0), 2)
-                else:  # CO2
-                    value = round(random.uniform(400.0, 600.0), 2)
-
-                payload = json.dumps({'value': value})
-                client.publish(topic, payload, qos=qos)
-                logger.debug("Published %s to %s @ QoS %d", value, topic, qos)
-
-            time.sleep(1)
+        Worker(index, topics, args, results).run(stop)
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        logger.exception("Worker %d failed", index)
+        results.put((index, None, None, None, None, None))
+
+
+def percentiles(values: np.ndarray) -> str:
+    if not len(values):
+        return f"{'-':>8} {'-':>8} {'-':>8}"
+    p50, p99, p999 = np.percentile(values, (50, 99, 99.9)) * 1000
+    return f"{p50:>8.2f} {p99:>8.2f} {p999:>8.2f}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--topics", type=int, default=3, help="topic count (3 gives the classic topics)")
+    parser.add_argument("--prefix", default="sensor", help="topic prefix")
+    parser.add_argument("--rate", type=float, default=1.0, help="messages per second per topic")
+    parser.add_argument("--format", choices=FORMATS, default="json", help="payload format")
+    parser.add_argument("--batch", type=int, default=10, help="samples per message for the batch formats")
+    parser.add_argument("--qos", default="0,1,2", help="QoS levels assigned to topics in turn")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="seconds between burst starts (0: off)")
+    parser.add_argument("--burst-len", type=float, default=1.0, help="burst length in seconds")
+    parser.add_argument("--burst-factor", type=float, default=10.0, help="rate multiplier during bursts")
+    parser.add_argument("--workers", type=int, default=1, help="publishing processes")
+    parser.add_argument("--inflight", type=int, default=1000, help="unacknowledged QoS 1/2 messages per worker")
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds to run (0: until Ctrl+C)")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between reports")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+
+    levels = [int(q) for q in args.qos.split(",")]
+    topics = [(topic, kind, levels[i % len(levels)])
+              for i, (topic, kind) in enumerate(topic_names(args.topics, args.prefix))]
+    workers = max(1, min(args.workers, len(topics)))
+    shards = [topics[i::workers] for i in range(workers)]
+
+    target = len(topics) * args.rate
+    if args.burst_every:
+        # Average over a burst cycle
+        target *= 1 + (args.burst_factor - 1) * min(args.burst_len, args.burst_every) / args.burst_every
+    logger.info("Publishing %d topics at %g msg/s each (%g msg/s, %s, QoS %s) from %d workers to %s:%s",
+                len(topics), args.rate, target, args.format, args.qos, workers, args.broker, args.port)
+    if args.burst_every:
+        logger.info("Bursts of %g s at %g× every %g s", args.burst_len, args.burst_factor, args.burst_every)
+    logger.info("Visualizer: SENSOR_TOPICS='%s/#' SENSOR_DECODERS='%s/#=%s'",
+                args.prefix, args.prefix, FORMATS[args.format])
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    stop = ctx.Event()
+    procs = [ctx.Process(target=run_worker, args=(i, shard, args, results, stop), daemon=True)
+             for i, shard in enumerate(shards)]
+    for proc in procs:
+        proc.start()
 
+    # Per worker: cumulative (sent, acked, errors, seconds active) from its
+    # latest report; a line is printed once every worker has reported again
+    counters = {i: (0, 0, 0, 0.0) for i in range(workers)}
+    fresh = set()
+    window: Dict[int, List[np.ndarray]] = {0: [], 1: [], 2: []}
+    total: Dict[int, List[np.ndarray]] = {0: [], 1: [], 2: []}
+    printed = (0, 0, 0.0)
+    print(f"\n{'t s':>6} {'sent/s':>9} {'acked/s':>9} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8}")
+
+    def totals():
+        return (sum(c[0] for c in counters.values()), sum(c[1] for c in counters.values()),
+                sum(c[2] for c in counters.values()), max(c[3] for c in counters.values()))
+
+    def take(block: bool) -> bool:
+        global window, printed
+        try:
+            index, sent, acked, errors, active, latencies = results.get(timeout=0.5 if block else 0)
+        except queue.Empty:
+            return False
+        if sent is None:
+            fresh.add(index)
+            return True
+        counters[index] = (sent, acked, errors, active)
+        fresh.add(index)
+        for qos, values in latencies.items():
+            window[qos].append(values)
+            total[qos].append(values)
+        if len(fresh) == workers:
+            fresh.clear()
+            sent, acked, errors, active = totals()
+            span = max(active - printed[2], 1e-9)
+            merged = np.concatenate([v for values in window.values() for v in values] or [np.empty(0)])
+            print(f"{active:>6.0f} {(sent - printed[0]) / span:>9.0f} {(acked - printed[1]) / span:>9.0f} "
+                  f"{errors:>7} {percentiles(merged)}", flush=True)
+            printed = (sent, acked, active)
+            window = {0: [], 1: [], 2: []}
+        return True
+
+    try:
+        while any(proc.is_alive() for proc in procs):
+            take(True)
     except KeyboardInterrupt:
         logger.info("Stopping simulator…")
-    finally:
-        # Clean shutdown
-        client.publish(
-            'sensor/logger/status',
-            payload='OFFLINE',
-            qos=1,
-            retain=True
-        )
-        client.loop_stop()
-        client.disconnect()
-        logger.info("Simulator stopped")
+        stop.set()
+    for proc in procs:
+        proc.join()
+    while take(False):
+        pass
+
+    sent, acked, errors, active = totals()
+    print(f"\n{sent} messages in {active:.1f} s: {sent / max(active, 1e-9):.0f} msg/s "
+          f"(target {target:g}), {acked} acknowledged, {errors} errors")
+    print(f"{'QoS':>4} {'messages':>9} {'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'max ms':>8}")
+    for qos, values in total.items():
+        if values:
+            merged = np.concatenate(values)
+            print(f"{qos:>4} {len(merged):>9} {percentiles(merged)} {merged.max() * 1000:>8.2f}")
+    logger.info("Simulator stopped")
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from decoders import Decoded, Samples
+from log_sampling import SampledLogger
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+slog = SampledLogger(logger)
+
+# Cap on topics discovered through wildcard subscriptions
+MAX_TOPICS = int(os.environ.get("SENSOR_MAX_TOPICS", 256))
+
+
+class StagingQueue:
+    """
+    Single-producer/single-consumer hand-off of samples for one topic.
+
+    The producer (the paho network thread) only appends to a deque; the
+    consumer (the GUI thread) pops everything queued in one drain() per
+    frame and writes it to the CircularBuffer with a single extend(). No
+    lock is shared between the two: deque.append() and popleft() are
+    atomic, and each counter is written by one side only.
+
+    At most `capacity` entries (single samples or batches) are held; further
+    puts are dropped and counted, so a stalled consumer cannot exhaust memory.
+    """
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self._items: deque = deque()
+        self.dropped = 0    # producer side, in samples
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, timestamp: float, value: float):
+        if len(self._items) >= self.capacity:
+            self._dropped(1)
+            return
+        self._items.append((timestamp, value))
+
+    def put_many(self, timestamps: np.ndarray, values: np.ndarray):
+        """
+        Queue a whole batch as one entry.
+        """
+        if len(self._items) >= self.capacity:
+            self._dropped(len(values))
+            return
+        self._items.append(Samples(timestamps, values))
+
+    def _dropped(self, count: int):
+        before = self.dropped
+        self.dropped += count
+        if before // 10000 != self.dropped // 10000 or not before:
+            logger.warning("Staging queue full: %d samples dropped so far", self.dropped)
+
+    def drain(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Everything queued so far as (times, values) arrays in arrival order,
+        or None if the queue is empty. Consumer side only.
+        """
+        n = len(self._items)
+        if not n:
+            return None
+        popleft = self._items.popleft
+        items = [popleft() for _ in range(n)]
+        if not any(type(item) is Samples for item in items):
+            block = np.array(items, dtype=np.float64)
+            return block[:, 0], block[:, 1]
+        # Mixed single samples and batches: convert runs of singles at once
+        times, values, singles = [], [], []
+        for item in items:
+            if type(item) is Samples:
+                if singles:
+                    block = np.array(singles, dtype=np.float64)
+                    times.append(block[:, 0])
+                    values.append(block[:, 1])
+                    singles = []
+                times.append(np.asarray(item.times, dtype=np.float64))
+                values.append(np.asarray(item.values, dtype=np.float64))
+            else:
+                singles.append(item)
+        if singles:
+            block = np.array(singles, dtype=np.float64)
+            times.append(block[:, 0])
+            values.append(block[:, 1])
+        return np.concatenate(times), np.concatenate(values)
+
+
+class TopicRouter:
+    """
+    The MQTT handler side of ingest: stages each decoded message into its
+    topic's StagingQueue. Multi-channel payloads go to one queue per
+    "<topic>/<channel>". Topics seen for the first time (through wildcard
+    subscriptions or new channels) get a queue on the spot, up to
+    `max_topics`, and are reported to the consumer by take_discovered().
+    """
+    def __init__(self, topics: Iterable[str] = (), max_topics: int = MAX_TOPICS):
+        self.max_topics = max_topics
+        self._routes: dict[str, StagingQueue] = {topic: StagingQueue() for topic in topics}
+        self._discovered: List[str] = []
+        self._lock = threading.Lock()
+        self._over_limit = False
+        self.first_sample: Optional[float] = None   # time.time() of the first staged sample
+
+    def __call__(self, topic: str, value: Decoded):
+        """
+        MQTTClient handler (network thread).
+        """
+        if isinstance(value, dict):
+            for channel, channel_value in value.items():
+                self._stage(f"{topic}/{channel}", channel_value)
+        else:
+            self._stage(topic, value)
+
+    def queue(self, topic: str) -> StagingQueue:
+        return self._routes[topic]
+
+    def take_discovered(self) -> List[str]:
+        """
+        Topics discovered since the previous call (consumer side).
+        """
+        if not self._discovered:
+            return []
+        with self._lock:
+            topics, self._discovered = self._discovered, []
+        return topics
+
+    def _discover(self, topic: str) -> Optional[StagingQueue]:
+        with self._lock:
+            staging = self._routes.get(topic)
+            if staging is not None:
+                return staging
+            if len(self._routes) >= self.max_topics:
+                if not self._over_limit:
+                    self._over_limit = True
+                    logger.warning("%d topics reached (SENSOR_MAX_TOPICS); "
+                                   "ignoring new topics such as %s", self.max_topics, topic)
+                return None
+            staging = StagingQueue()
+            self._routes[topic] = staging
+            self._discovered.append(topic)
+        logger.info("New topic %s", topic)
+        return staging
+
+    def _stage(self, topic: str, value):
+        """
+        Stage one value stamped on arrival, or a Samples batch with its own
+        timestamps.
+        """
+        staging = self._routes.get(topic)
+        if staging is None:
+            staging = self._discover(topic)
+            if staging is None:
+                return
+        if self.first_sample is None:
+            # Startup milestone (bench_startup.py waits for this line)
+            self.first_sample = time.time()
+            logger.info("First sample staged (topic %s)", topic)
+        if isinstance(value, Samples):
+            staging.put_many(value.times, value.values)
+            slog(topic, "Staged %d samples for topic %s", len(value.values), topic)
+        else:
+            ts = time.time()
+            staging.put(ts, value)
+            slog(topic, "Staged value %s for topic %s at %s", value, topic, ts)
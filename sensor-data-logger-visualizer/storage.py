@@ -0,0 +1,352 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# Samples are stored as columnar chunks: one row per (topic, batch) holding
+# the timestamps and values as raw float64 arrays. A 24 h range then costs a
+# few hundred BLOB reads instead of one Python tuple per sample.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    topic_id INTEGER NOT NULL,
+    t_start  REAL    NOT NULL,
+    t_end    REAL    NOT NULL,
+    count    INTEGER NOT NULL,
+    times    BLOB    NOT NULL,
+    vals     BLOB    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_topic_end ON chunks (topic_id, t_end);
+"""
+
+# Small chunks (low-rate topics flush a few samples per batch) older than
+# COMPACT_AFTER seconds are merged into chunks of up to CHUNK_TARGET samples
+CHUNK_TARGET = 65536
+COMPACT_AFTER = 60.0
+COMPACT_INTERVAL = 60.0
+
+
+def _sorted(times: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if len(times) > 1 and np.any(times[1:] < times[:-1]):
+        order = np.argsort(times, kind="stable")
+        return times[order], values[order]
+    return times, values
+
+
+class SampleStore:
+    """
+    Persistent (topic, timestamp, value) store in SQLite.
+
+    add() only enqueues and never touches the disk, so it is safe to call
+    from the paho network thread. A writer thread commits queued samples in
+    batches of up to `batch_size`, at least every `flush_interval` seconds,
+    as one chunk per topic, and periodically compacts small chunks. The
+    database runs in WAL mode, so queries from the GUI thread neither block
+    on nor block the writer. Samples that do not fit in the queue are
+    dropped and counted.
+    """
+    def __init__(
+        self,
+        path: str,
+        queue_size: int = 100000,
+        batch_size: int = 20000,
+        flush_interval: float = 1.0
+    ):
+        self.path = path
+        self._queue: "queue.Queue[Tuple[str, float, float]]" = queue.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._topic_ids: Dict[str, int] = {}
+        self._local = threading.local()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.compacted = 0
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        for topic_id, name in conn.execute("SELECT id, name FROM topics"):
+            self._topic_ids[name] = topic_id
+        logger.debug("SampleStore opened %s (%d topics)", path, len(self._topic_ids))
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        One connection per thread (sqlite3 connections are not shared).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ——— Ingest ———————————————————————————————————————————————————
+    def add(self, topic: str, timestamp: float, value: float):
+        try:
+            self._queue.put_nowait((topic, timestamp, value))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 10000 == 1:
+                logger.warning("SampleStore queue full: %d samples dropped so far", self.dropped)
+
+    def add_many(self, topic: str, timestamps: np.ndarray, values: np.ndarray):
+        """
+        Enqueue a whole batch as one queue item.
+        """
+        try:
+            self._queue.put_nowait((topic, timestamps, values))
+        except queue.Full:
+            self.dropped += len(values)
+            logger.warning("SampleStore queue full: dropped a batch of %d samples (%d so far)",
+                           len(values), self.dropped)
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sample-store", daemon=True)
+        self._thread.start()
+        logger.info("SampleStore writing to %s", self.path)
+
+    def close(self, timeout: float = 5.0):
+        """
+        Flush everything queued and stop the writer thread (if started), then
+        close the calling thread's query connection.
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout)
+            self._thread = None
+            logger.info("SampleStore closed (%d written, %d dropped)", self.written, self.dropped)
+        self.close_connection()
+
+    def close_connection(self):
+        """
+        Close the calling thread's connection, if it opened one.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _topic_id(self, conn: sqlite3.Connection, topic: str) -> int:
+        topic_id = self._topic_ids.get(topic)
+        if topic_id is None:
+            conn.execute("INSERT OR IGNORE INTO topics (name) VALUES (?)", (topic,))
+            topic_id = conn.execute("SELECT id FROM topics WHERE name = ?", (topic,)).fetchone()[0]
+            self._topic_ids[topic] = topic_id
+        return topic_id
+
+    @staticmethod
+    def _chunk_row(topic_id: int, times: np.ndarray, values: np.ndarray) -> tuple:
+        return (topic_id, float(times[0]), float(times[-1]), len(times),
+                times.tobytes(), values.tobytes())
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[str, float, float]]):
+        per_topic: Dict[str, Tuple[list, list]] = defaultdict(lambda: ([], []))
+        count = 0
+        for topic, ts, value in batch:
+            times, values = per_topic[topic]
+            if isinstance(value, np.ndarray):
+                times.extend(ts.tolist())
+                values.extend(value.tolist())
+                count += len(value)
+            else:
+                times.append(ts)
+                values.append(value)
+                count += 1
+        conn.execute("BEGIN")
+        try:
+            rows = []
+            for topic, (times, values) in per_topic.items():
+                t, v = _sorted(np.array(times, dtype=np.float64), np.array(values, dtype=np.float64))
+                rows.append(self._chunk_row(self._topic_id(conn, topic), t, v))
+            conn.executemany(
+                "INSERT INTO chunks (topic_id, t_start, t_end, count, times, vals) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.written += count
+        self.batches += 1
+
+    def compact(self, older_than: float = COMPACT_AFTER):
+        """
+        Merge runs of small chunks ending more than `older_than` seconds ago
+        into chunks of up to CHUNK_TARGET samples.
+        """
+        conn = self._connect()
+        cutoff = time.time() - older_than
+        for topic_id in list(self._topic_ids.values()):
+            rows = conn.execute(
+                "SELECT rowid, count, times, vals FROM chunks "
+                "WHERE topic_id = ? AND t_end < ? AND count < ? ORDER BY t_start",
+                (topic_id, cutoff, CHUNK_TARGET // 2)
+            ).fetchall()
+            groups, group, size = [], [], 0
+            for row in rows:
+                if group and size + row[1] > CHUNK_TARGET:
+                    groups.append(group)
+                    group, size = [], 0
+                group.append(row)
+                size += row[1]
+            groups.append(group)
+            groups = [g for g in groups if len(g) > 1]
+            if not groups:
+                continue
+            conn.execute("BEGIN")
+            try:
+                for group in groups:
+                    t, v = _sorted(np.concatenate([np.frombuffer(r[2]) for r in group]),
+                                   np.concatenate([np.frombuffer(r[3]) for r in group]))
+                    conn.executemany("DELETE FROM chunks WHERE rowid = ?", [(r[0],) for r in group])
+                    conn.execute(
+                        "INSERT INTO chunks (topic_id, t_start, t_end, count, times, vals) VALUES (?, ?, ?, ?, ?, ?)",
+                        self._chunk_row(topic_id, t, v)
+                    )
+                    self.compacted += len(group)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _run(self):
+        conn = self._connect()
+        last_compact = time.monotonic()
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = []
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size and not self._stop_event.is_set():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                # Drain whatever is already queued without waiting per item
+                while len(batch) < self._batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            if self._stop_event.is_set():
+                # Shutting down: take everything left without waiting
+                while len(batch) < self._batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            if batch:
+                try:
+                    self._write(conn, batch)
+                except Exception:
+                    logger.exception("SampleStore: failed to write %d samples", len(batch))
+            if time.monotonic() - last_compact >= COMPACT_INTERVAL:
+                last_compact = time.monotonic()
+                try:
+                    self.compact()
+                except Exception:
+                    logger.exception("SampleStore: compaction failed")
+        self.close_connection()
+
+    # ——— Queries ——————————————————————————————————————————————————
+    def topics(self) -> List[str]:
+        return [name for (name,) in self._connect().execute("SELECT name FROM topics ORDER BY name")]
+
+    def query(self, topic: str, t_start: float, t_end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Samples of `topic` with t_start <= ts < t_end, ordered by time, as
+        float64 arrays. Chunks are found through the (topic_id, t_end) index.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT id FROM topics WHERE name = ?", (topic,)).fetchone()
+        if row is None:
+            return np.empty(0), np.empty(0)
+        chunks = conn.execute(
+            "SELECT times, vals FROM chunks WHERE topic_id = ? AND t_end >= ? AND t_start < ? ORDER BY t_start",
+            (row[0], t_start, t_end)
+        ).fetchall()
+        if not chunks:
+            return np.empty(0), np.empty(0)
+        times, values = _sorted(np.concatenate([np.frombuffer(c[0]) for c in chunks]),
+                                np.concatenate([np.frombuffer(c[1]) for c in chunks]))
+        lo = int(np.searchsorted(times, t_start, side="left"))
+        hi = int(np.searchsorted(times, t_end, side="left"))
+        return times[lo:hi], values[lo:hi]
+
+    def iter_range(
+        self,
+        topic: str,
+        t_start: float,
+        t_end: float,
+        chunk_rows: int = 50000
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Like query(), but yields time-ordered blocks of roughly `chunk_rows`
+        samples, so arbitrarily long windows can be streamed in flat memory.
+        Samples are only released once no later chunk (by t_start) can
+        still contain an earlier timestamp.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT id FROM topics WHERE name = ?", (topic,)).fetchone()
+        if row is None:
+            return
+        cur = conn.execute(
+            "SELECT t_start, times, vals FROM chunks WHERE topic_id = ? AND t_end >= ? AND t_start < ? "
+            "ORDER BY t_start",
+            (row[0], t_start, t_end)
+        )
+        times, values = np.empty(0), np.empty(0)
+        for chunk_start, tb, vb in cur:
+            if len(times) >= chunk_rows:
+                times, values = _sorted(times, values)
+                cut = int(np.searchsorted(times, chunk_start, side="left"))
+                if cut:
+                    yield times[:cut], values[:cut]
+                    times, values = times[cut:], values[cut:]
+            t, v = np.frombuffer(tb), np.frombuffer(vb)
+            keep = (t >= t_start) & (t < t_end)
+            times = np.concatenate((times, t[keep]))
+            values = np.concatenate((values, v[keep]))
+        if len(times):
+            yield _sorted(times, values)
+
+    def count(self, topic: str, t_start: float, t_end: float) -> int:
+        """
+        Upper bound on the samples of `topic` in [t_start, t_end) (whole
+        chunks overlapping the window), for progress reporting.
+        """
+        row = self._connect().execute(
+            "SELECT SUM(count) FROM chunks JOIN topics ON topics.id = chunks.topic_id "
+            "WHERE topics.name = ? AND t_end >= ? AND t_start < ?", (topic, t_start, t_end)
+        ).fetchone()
+        return row[0] or 0
+
+    def time_range(self, topic: str) -> Optional[Tuple[float, float]]:
+        """
+        (first, last) timestamp stored for `topic`, or None.
+        """
+        row = self._connect().execute(
+            "SELECT MIN(t_start), MAX(t_end) FROM chunks JOIN topics ON topics.id = chunks.topic_id "
+            "WHERE topics.name = ?", (topic,)
+        ).fetchone()
+        return None if row[0] is None else (row[0], row[1])
@@ -0,0 +1,36 @@
+import numpy as np
+
+from data_buffer import CircularBuffer
+from decimate import Decimator
+
+
+def test_decimated_extremes_match_buffer():
+    rng = np.random.default_rng(1)
+    buf = CircularBuffer(maxlen=50000)
+    decimator = Decimator(target=1000)
+    t = 0
+    # Fill past capacity in uneven steps, so the oldest bin is partly
+    # overwritten at most checks
+    for step in rng.integers(1, 5000, size=60):
+        buf.extend(np.arange(t, t + step, dtype=np.float64), rng.normal(size=step))
+        t += step
+        times, values = decimator.series(buf)
+        raw_t, raw_v = buf.get_series()
+        assert values.min() == raw_v.min()
+        assert values.max() == raw_v.max()
+        assert times[0] == raw_t[0]
+        assert np.all(np.diff(times) >= 0)
+
+
+def test_extremes_in_oldest_partial_bin_are_kept():
+    buf = CircularBuffer(maxlen=10000)
+    decimator = Decimator(target=200)
+    values = np.zeros(10000 + 37)
+    values[37 + 1] = 100.0     # second-oldest sample once the ring wraps
+    values[37 + 2] = -100.0
+    buf.extend(np.arange(10000.0), values[:10000])
+    decimator.series(buf)
+    buf.extend(np.arange(10000.0, 10037.0), values[10000:])
+    times, out = decimator.series(buf)
+    assert out.max() == 100.0 and out.min() == -100.0
+    assert times[0] == 37.0
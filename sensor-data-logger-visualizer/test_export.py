@@ -0,0 +1,37 @@
+import numpy as np
+
+from export import Source, merge_asof
+
+
+def _source(name, blocks):
+    blocks = [(np.asarray(t, dtype=np.float64), np.asarray(v, dtype=np.float64)) for t, v in blocks]
+    return Source(name, iter(blocks), sum(len(t) for t, _v in blocks))
+
+
+def _merge(sources):
+    stamps, rows = [], []
+    for block_stamps, columns, _consumed in merge_asof(sources):
+        stamps.append(block_stamps)
+        rows.append(columns)
+    return np.concatenate(stamps), np.concatenate(rows)
+
+
+def test_chunk_boundary_splitting_equal_timestamps():
+    # 'a' repeats t=2 across its chunk boundary; 'b' ends its first chunk later
+    a = _source("a", [([0, 1, 2], [0, 1, 2]), ([2, 3], [20, 3])])
+    b = _source("b", [([0.5, 2.5], [5, 25]), ([4], [40])])
+    stamps, columns = _merge([a, b])
+    assert list(stamps) == [0, 0.5, 1, 2, 2.5, 3, 4]
+    # As-of value at t=2 is the later of the two equal-time samples
+    assert columns[3, 0] == 20
+
+
+def test_rows_are_unique_and_sorted_for_random_chunking():
+    rng = np.random.default_rng(3)
+    times = np.sort(rng.integers(0, 100, size=300)).astype(np.float64)
+    cuts = np.sort(rng.choice(np.arange(1, 300), size=20, replace=False))
+    blocks = [(t, t) for t in np.split(times, cuts)]
+    other = np.arange(0.5, 100, 7.0)
+    stamps, _columns = _merge([_source("a", blocks), _source("b", [(other, other)])])
+    assert np.all(np.diff(stamps) > 0)
+    assert len(stamps) == len(np.unique(np.concatenate((times, other))))
@@ -0,0 +1,26 @@
+import logging
+
+from log_sampling import SampledLogger
+
+
+def _slog(sample_every: int) -> SampledLogger:
+    target = logging.getLogger(f"test.log_sampling.{sample_every}")
+    target.setLevel(logging.DEBUG)
+    target.propagate = False
+    # first_per_key=0: only the 1-in-N sampling decides
+    return SampledLogger(target, mode="sampled", sample_every=sample_every, first_per_key=0)
+
+
+def test_sample_every_one_logs_every_message():
+    slog = _slog(1)
+    for i in range(10):
+        slog("sensor/t", "message %d", i)
+    assert slog.emitted == 10
+
+
+def test_sample_every_n_logs_first_and_every_nth():
+    slog = _slog(4)
+    for i in range(10):
+        slog("sensor/t", "message %d", i)
+    # Messages 1, 5 and 9
+    assert slog.emitted == 3
@@ -0,0 +1,145 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("children", "filter", "value")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.filter: Optional[str] = None   # set while a filter ends at this node
+        self.value: Any = None
+
+
+def validate_filter(topic_filter: str):
+    """
+    Raise ValueError unless `topic_filter` is a valid MQTT subscription:
+    '+' and '#' occupy a whole level and '#' only the last one.
+    """
+    if not topic_filter:
+        raise ValueError("Empty topic filter")
+    levels = topic_filter.split("/")
+    for i, level in enumerate(levels):
+        if ("+" in level or "#" in level) and len(level) > 1:
+            raise ValueError(f"Wildcard must occupy a whole level in '{topic_filter}'")
+        if level == "#" and i != len(levels) - 1:
+            raise ValueError(f"'#' must be the last level in '{topic_filter}'")
+
+
+def is_wildcard(topic_filter: str) -> bool:
+    return "+" in topic_filter or "#" in topic_filter
+
+
+def specificity(topic_filter: str) -> Tuple[int, int, int]:
+    """
+    Sort key: exact filters first, then fewer '+' levels, then longer filters.
+    """
+    return (topic_filter.endswith("#"), topic_filter.count("+"), -topic_filter.count("/"))
+
+
+class TopicTrie:
+    """
+    MQTT topic filters ('sensor/+/temperature', 'sensor/#') mapped to values,
+    one level per node. match() walks the topic's levels once, following the
+    literal, '+' and '#' children, so its cost depends on the topic depth and
+    the wildcards along that path, not on how many filters are registered.
+    """
+    def __init__(self):
+        self._root = _Node()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, topic_filter: str) -> bool:
+        node = self._find(topic_filter)
+        return node is not None and node.filter is not None
+
+    def insert(self, topic_filter: str, value: Any):
+        """
+        Map `topic_filter` to `value`, replacing any previous value.
+        """
+        validate_filter(topic_filter)
+        node = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.setdefault(level, _Node())
+        if node.filter is None:
+            self._count += 1
+        node.filter = topic_filter
+        node.value = value
+
+    def remove(self, topic_filter: str) -> bool:
+        """
+        Drop `topic_filter` and prune the emptied branch. Returns False if it
+        was not registered.
+        """
+        path = [self._root]
+        for level in topic_filter.split("/"):
+            node = path[-1].children.get(level)
+            if node is None:
+                return False
+            path.append(node)
+        if path[-1].filter is None:
+            return False
+        path[-1].filter = path[-1].value = None
+        self._count -= 1
+        for level, parent, node in zip(reversed(topic_filter.split("/")),
+                                       reversed(path[:-1]), reversed(path[1:])):
+            if node.children or node.filter is not None:
+                break
+            del parent.children[level]
+        return True
+
+    def get(self, topic_filter: str, default: Any = None) -> Any:
+        node = self._find(topic_filter)
+        return default if node is None or node.filter is None else node.value
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.filter is not None:
+                yield node.filter, node.value
+            stack.extend(node.children.values())
+
+    def match(self, topic: str) -> List[Tuple[str, Any]]:
+        """
+        All (filter, value) pairs whose filter matches the concrete `topic`.
+        Per MQTT, wildcards in the first level do not match '$SYS/...' topics,
+        and 'a/#' also matches 'a'.
+        """
+        matches = []
+        nodes = [self._root]
+        levels = topic.split("/")
+        for depth, level in enumerate(levels):
+            wild = depth or not level.startswith("$")
+            following = []
+            for node in nodes:
+                children = node.children
+                child = children.get(level)
+                if child is not None:
+                    following.append(child)
+                if wild:
+                    child = children.get("+")
+                    if child is not None:
+                        following.append(child)
+                    child = children.get("#")
+                    if child is not None:
+                        matches.append((child.filter, child.value))
+            nodes = following
+            if not nodes:
+                return matches
+        for node in nodes:
+            if node.filter is not None:
+                matches.append((node.filter, node.value))
+            child = node.children.get("#")
+            if child is not None:
+                matches.append((child.filter, child.value))
+        return matches
+
+    def _find(self, topic_filter: str) -> Optional[_Node]:
+        node = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.get(level)
+            if node is None:
+                return None
+        return node
@@ -1,40 +1,191 @@
 import logging
+import os
 import time
+from typing import TYPE_CHECKING, Iterable, Optional
 from PySide6.QtWidgets import QMainWindow
-from PySide6.QtCore import QTimer
+from PySide6.QtCore import QEvent, QTimer
 from mqtt_client import MQTTClient
 from data_buffer import CircularBuffer
 from plot_view import PlotView
+from storage import SampleStore
+from decoders import Decoder
+from staging import StagingQueue, TopicRouter
+from log_sampling import SampledLogger
+
+if TYPE_CHECKING:
+    # multiprocessing and shared_memory are only loaded in process mode
+    from ingest_process import IngestProcess
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
+slog = SampledLogger(logger)
+
+# Plot refresh interval bounds (ms): never faster than ~60 fps, never slower
+# than MAX while visible, HIDDEN while minimized or hidden.
+REFRESH_MIN_MS = 16
+REFRESH_MAX_MS = 250
+REFRESH_HIDDEN_MS = 1000
 
 class MainWindow(QMainWindow):
     """
     Main application window: sets up the plot view, timer, and MQTT handlers, with debug logging.
+
+    `buffers` are the topics plotted from the start; `subscriptions` are
+    extra (wildcard) filters whose matching topics get a buffer of
+    `buffer_len` samples and a plot when they first publish.
+
+    With `ingest` (an IngestProcess), MQTT, decoding and buffering run in
+    that process; `buffers` then holds its shared buffers, mapped read-only,
+    and mqtt_client is None.
+
+    With `router`, MQTT is already wired to that TopicRouter (and usually
+    connected, so samples staged while the window was built are drained on
+    the first tick); otherwise the handlers are registered here.
     """
-    def __init__(self, mqtt_client: MQTTClient, buffers: dict[str, CircularBuffer]):
+    def __init__(
+        self,
+        mqtt_client: Optional[MQTTClient],
+        buffers: dict[str, CircularBuffer],
+        store: Optional[SampleStore] = None,
+        decoders: Optional[dict[str, Decoder]] = None,
+        subscriptions: Iterable[str] = (),
+        buffer_len: int = 1000,
+        ingest: Optional["IngestProcess"] = None,
+        router: Optional[TopicRouter] = None
+    ):
         super().__init__()
         logger.debug("MainWindow: Initializing")
         self.setWindowTitle("Sensor Data Logger & Visualizer")
         self.resize(800, 400)    # width=1200px, height=600px
         self.buffers = buffers
-        self.plot_view = PlotView(self.buffers)
+        self.mqtt_client = mqtt_client
+        self.store = store
+        self.ingest = ingest
+        # The MQTT thread only enqueues into per-topic staging queues
+        # (the router); the GUI thread drains them into the buffers once per
+        # tick. Topics discovered on the MQTT thread get their buffer and
+        # plot when the GUI thread adopts them.
+        self._router = router if router is not None else TopicRouter(buffers if ingest is None else ())
+        self._staging: dict[str, StagingQueue] = {
+            topic: self._router.queue(topic) for topic in buffers if ingest is None
+        }
+        self._buffer_len = buffer_len
+        self.plot_view = PlotView(self.buffers, store)
         self.setCentralWidget(self.plot_view)
 
+        # Refresh timer; its interval follows the incoming data rate
+        self._rate = 0.0      # smoothed new samples per second
+        self._last_tick = time.monotonic()
         self.timer = QTimer(self)
-        self.timer.setInterval(10)
-        self.timer.timeout.connect(self.plot_view.update_plot)
+        self.timer.setInterval(REFRESH_MIN_MS)
+        self.timer.timeout.connect(self._tick)
         self.timer.start()
-        logger.debug("MainWindow: Timer started with 500ms interval")
+        logger.debug("MainWindow: Timer started with %dms interval", self.timer.interval())
 
-        for topic in self.buffers.keys():
-            mqtt_client.register_handler(topic, self._make_handler(topic))
+        # One aggregated stats line instead of a debug line per sample
+        self._stats_received = 0
+        self._stats_last = time.monotonic()
+        stats_interval = float(os.environ.get("SENSOR_LOG_STATS_INTERVAL", 10))
+        self.stats_timer = QTimer(self)
+        if stats_interval > 0:
+            self.stats_timer.setInterval(int(stats_interval * 1000))
+            self.stats_timer.timeout.connect(self._log_stats)
+            self.stats_timer.start()
+
+        if mqtt_client is None or router is not None:
+            return
+        # Decoders may be keyed by exact topic or by wildcard filter
+        for topic_filter, decoder in (decoders or {}).items():
+            mqtt_client.set_decoder(topic_filter, decoder)
+        for topic in [*self.buffers.keys(), *subscriptions]:
+            mqtt_client.register_handler(topic, self._router)
             logger.debug("MainWindow: Registered handler for topic %s", topic)
 
-    def _make_handler(self, topic: str):
-        def handler(value: float):
-            ts = time.time()
-            self.buffers[topic].append(ts, value)
-            logger.debug("MainWindow: Buffered value %s for topic %s at %s", value, topic, ts)
-        return handler
\ No newline at end of file
+    def _adopt_discovered(self):
+        """
+        Create buffers and plots for topics discovered since the last tick
+        (GUI thread): local ones from the router, or shared buffers mapped
+        from the ingest process.
+        """
+        if self.ingest is not None:
+            for topic in self.ingest.poll():
+                self.buffers[topic] = self.ingest.buffers[topic]
+                self.plot_view.add_topic(topic)
+            return
+        for topic in self._router.take_discovered():
+            self.buffers[topic] = CircularBuffer(maxlen=self._buffer_len)
+            self._staging[topic] = self._router.queue(topic)
+            self.plot_view.add_topic(topic)
+
+    def _drain(self) -> int:
+        """
+        Move everything staged into the buffers (one extend() per topic) and
+        the store (one add_many() per topic). Returns the samples moved.
+        """
+        moved = 0
+        for topic, staging in self._staging.items():
+            batch = staging.drain()
+            if batch is None:
+                continue
+            times, values = batch
+            self.buffers[topic].extend(times, values)
+            if self.store is not None:
+                self.store.add_many(topic, times, values)
+            moved += len(times)
+        return moved
+
+    def _tick(self):
+        """
+        Refresh changed curves, then retune the timer: one refresh per new
+        sample up to ~60 fps, at least every REFRESH_MAX_MS while visible, and
+        REFRESH_HIDDEN_MS while the window is hidden or minimized.
+        """
+        now = time.monotonic()
+        elapsed = max(now - self._last_tick, 1e-3)
+        self._last_tick = now
+        self._adopt_discovered()
+        self._drain()
+        if not self.isVisible() or self.isMinimized():
+            interval = REFRESH_HIDDEN_MS
+        else:
+            new_samples = self.plot_view.update_plot()
+            self._rate = 0.8 * self._rate + 0.2 * (new_samples / elapsed)
+            interval = (REFRESH_MAX_MS if self._rate <= 0
+                        else int(min(REFRESH_MAX_MS, max(REFRESH_MIN_MS, 1000.0 / self._rate))))
+        if interval != self.timer.interval():
+            self.timer.setInterval(interval)
+
+    def changeEvent(self, event):
+        # Catch up immediately when restored instead of waiting a hidden tick
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange and not self.isMinimized():
+            self.timer.setInterval(REFRESH_MIN_MS)
+
+    def _log_stats(self):
+        # Same counters whether MQTT runs here or in the ingest process
+        counters = self.ingest if self.ingest is not None else self.mqtt_client
+        now = time.monotonic()
+        received = counters.received
+        rate = (received - self._stats_received) / max(now - self._stats_last, 1e-9)
+        self._stats_received, self._stats_last = received, now
+        staging_dropped = (self.ingest.staging_dropped if self.ingest is not None
+                           else sum(s.dropped for s in self._staging.values()))
+        logger.info(
+            "Ingest: %.1f msg/s (total %d, bad payloads %d, errors %d, unhandled %d, staging dropped %d), "
+            "plot refresh %.1f/s (timer %dms)",
+            rate, received, counters.bad_payloads, counters.errors, counters.unhandled, staging_dropped,
+            self.plot_view.take_refresh_rate(), self.timer.interval()
+        )
+        if self.ingest is not None:
+            if self.ingest.store_stats:
+                stats = self.ingest.store_stats
+                logger.info(
+                    "Store: %d written in %d batches, %d queued, %d dropped (ingest process, %d restarts)",
+                    stats["store_written"], stats["store_batches"], stats["store_queued"],
+                    stats["store_dropped"], self.ingest.restarts
+                )
+        elif self.store is not None:
+            logger.info(
+                "Store: %d written in %d batches, %d queued, %d dropped",
+                self.store.written, self.store.batches, self.store.queue_depth(), self.store.dropped
+            )
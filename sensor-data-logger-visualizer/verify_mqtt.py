@@ -1,14 +1,40 @@
 #!/usr/bin/env python3
 """
+check (default):
 1. Tests TCP connectivity to the broker.
 2. Enables Paho-MQTT’s debug logging (CONNECT, SUBACK, etc).
 3. Subscribes to all sensor topics (sensor/#) and prints incoming messages.
+
+bench: latency and throughput suite. Publishes sequenced, timestamped probes
+at --rate per second for each --qos and measures latency percentiles
+(p50/p99/p999), loss, reordering and duplicates per component:
+
+  broker      probe → broker → probe (round trip)
+  gateway     can/in → mqtt-can gateway → CAN echo node → gateway → can/out
+              (round trip, mqtt-can/test/latency_echo.py)
+  visualizer  probe → broker → MQTTClient/TopicRouter (staged) → CircularBuffer
+              (buffered on a 16 ms GUI-like tick; one way)
+  climate     home/temperature → control_node.py → home/heater_command
+              (round trip)
+
+By default everything runs against local_broker.py, started on a free port,
+so results are comparable between versions on any Linux box; --broker
+host:port uses a real broker instead. --json FILE appends the results.
 """
 
+import argparse
+import collections
+import os
 import socket
+import subprocess
 import sys
 import logging
 import json
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
 import paho.mqtt.client as mqtt
 
 BROKER_HOST = 'localhost'
@@ -52,6 +78,405 @@ def on_message(client, userdata, msg):
     except Exception as e:
         print(f"[!] Error processing incoming message: {e}")
 
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+COMPONENTS = ("broker", "gateway", "visualizer", "climate")
+
+PROBE_TOPIC = 'probe/latency'
+GATEWAY_IN, GATEWAY_OUT = 0x7A0, 0x7A1           # latency_echo.py defaults
+WARMUP_SEQ = 1 << 63                               # gateway warm-up frames
+CLIMATE_PROBES = ((18.0, "HEATER_ON"), (22.5, "STANDBY"), (27.0, "HEATER_OFF"))
+READY_TIMEOUT = 20.0   # seconds for a component to answer its first probe
+DRAIN_TIMEOUT = 2.0    # seconds to wait for stragglers after the last probe
+VISUALIZER_TICK = 0.016  # like the GUI refresh timer at full rate
+VERBOSE = False
+
+
+class ProbeStats:
+    """
+    Send time per sequence number; each arrival adds a latency sample, or
+    counts as a duplicate, and counts as reordered when a higher sequence
+    number arrived before it.
+    """
+    def __init__(self):
+        self.sent = {}
+        self.latencies = []
+        self.seen = set()
+        self.duplicates = 0
+        self.reordered = 0
+        self.highest = -1
+        self.first_sent = None
+        self.last_arrival = None
+
+    def send(self, seq: int, t: float):
+        if self.first_sent is None:
+            self.first_sent = t
+        self.sent[seq] = t
+
+    def arrive(self, seq: int, t: float):
+        if seq in self.seen:
+            self.duplicates += 1
+            return
+        sent = self.sent.get(seq)
+        if sent is None:
+            return
+        self.seen.add(seq)
+        self.latencies.append(t - sent)
+        if seq < self.highest:
+            self.reordered += 1
+        self.highest = max(self.highest, seq)
+        self.last_arrival = t
+
+    def complete(self) -> bool:
+        return len(self.seen) >= len(self.sent)
+
+    def result(self, component: str, qos: int, rate: float) -> dict:
+        lat = np.array(self.latencies) * 1000
+        span = (self.last_arrival - self.first_sent) if self.latencies else 0.0
+        p50, p99, p999 = np.percentile(lat, (50, 99, 99.9)) if len(lat) else (np.nan,) * 3
+        return {
+            "component": component, "qos": qos, "rate": rate,
+            "sent": len(self.sent), "received": len(self.seen),
+            "lost": len(self.sent) - len(self.seen),
+            "reordered": self.reordered, "duplicates": self.duplicates,
+            "msgs_per_s": len(self.seen) / span if span > 0 else 0.0,
+            "p50_ms": float(p50), "p99_ms": float(p99), "p999_ms": float(p999),
+            "max_ms": float(lat.max()) if len(lat) else float("nan"),
+        }
+
+
+def probe_client(name: str, host: str, port: int, on_message=None, subscribe=None, qos: int = 0) -> mqtt.Client:
+    """
+    Connected paho client with its network loop running; returns once the
+    optional subscription is acknowledged.
+    """
+    ready = threading.Event()
+    client = mqtt.Client(client_id=f"{name}-{os.getpid()}", clean_session=True)
+    if on_message is not None:
+        client.on_message = on_message
+    if subscribe is None:
+        client.on_connect = lambda c, u, f, rc: ready.set()
+    else:
+        client.on_connect = lambda c, u, f, rc: c.subscribe(subscribe, qos=qos)
+        client.on_subscribe = lambda c, u, mid, granted: ready.set()
+    client.connect(host, port, keepalive=60)
+    client.loop_start()
+    if not ready.wait(CONNECT_TIMEOUT):
+        raise TimeoutError(f"{name}: no CONNACK/SUBACK from {host}:{port}")
+    return client
+
+
+def close_client(client: mqtt.Client):
+    client.disconnect()
+    client.loop_stop()
+
+
+def pace(rate: float, duration: float, send: Callable[[int], None]):
+    """
+    Call send(seq) for seq = 0, 1, ... at `rate` per second for `duration` seconds.
+    """
+    started = time.monotonic()
+    seq = 0
+    while True:
+        elapsed = time.monotonic() - started
+        if elapsed >= duration:
+            return
+        while seq < (elapsed * rate) + 1:
+            send(seq)
+            seq += 1
+        time.sleep(max(0.0, seq / rate - (time.monotonic() - started)))
+
+
+def settle(stats: ProbeStats):
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while not stats.complete() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def warm_up(send: Callable[[], None], ready: threading.Event, name: str) -> bool:
+    deadline = time.monotonic() + READY_TIMEOUT
+    while not ready.wait(0.1):
+        if time.monotonic() > deadline:
+            print(f"[✘] {name}: no answer to warm-up probes within {READY_TIMEOUT:.0f} s")
+            return False
+        send()
+    return True
+
+
+class Target:
+    """
+    Component under test in its own process; stdin closing tells it to stop,
+    or, with reads_stdin=False, terminate(). Output lines are collected by a
+    reader thread.
+    """
+    def __init__(self, name: str, argv: List[str], cwd: str, env: Optional[dict] = None,
+                 reads_stdin: bool = True):
+        self.name = name
+        self.reads_stdin = reads_stdin
+        self.lines: List[str] = []
+        self._log = open(os.devnull, "w") if not VERBOSE else None
+        self.proc = subprocess.Popen(argv, cwd=cwd, env=dict(os.environ, **(env or {})),
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=self._log, text=True)
+        self.ready = threading.Event()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            if line.strip() == "ready":
+                self.ready.set()
+            else:
+                self.lines.append(line)
+
+    def stop(self, timeout: float = 10.0) -> List[str]:
+        if not self.reads_stdin:
+            self.proc.terminate()
+            self.proc.wait()
+        else:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout)
+            except (subprocess.TimeoutExpired, BrokenPipeError):
+                self.proc.terminate()
+                self.proc.wait()
+        if self._log is not None:
+            self._log.close()
+        return self.lines
+
+
+def bench_broker(host: str, port: int, qos: int, rate: float, duration: float) -> List[dict]:
+    stats = ProbeStats()
+    sub = probe_client("probe-sub", host, port, subscribe=PROBE_TOPIC, qos=qos,
+                       on_message=lambda c, u, m: stats.arrive(json.loads(m.payload)["seq"], time.time()))
+    pub = probe_client("probe-pub", host, port)
+
+    def send(seq):
+        now = time.time()
+        stats.send(seq, now)
+        pub.publish(PROBE_TOPIC, json.dumps({"seq": seq, "ts": now, "value": seq}), qos=qos)
+
+    pace(rate, duration, send)
+    settle(stats)
+    close_client(pub)
+    close_client(sub)
+    return [stats.result("broker", qos, rate)]
+
+
+def bench_gateway(host: str, port: int, qos: int, rate: float, duration: float) -> List[dict]:
+    stats = ProbeStats()
+    ready = threading.Event()
+
+    def on_message(client, userdata, msg):
+        seq = int.from_bytes(bytes.fromhex(msg.payload.decode()), "little")
+        if seq >= WARMUP_SEQ:
+            ready.set()
+        else:
+            stats.arrive(seq, time.time())
+
+    target = Target("gateway", [sys.executable, os.path.join("test", "latency_echo.py"),
+                                "--broker", host, "--port", str(port)],
+                    cwd=os.path.join(REPO_ROOT, "mqtt-can"))
+    sub = probe_client("probe-can-sub", host, port, subscribe=f"can/out/0x{GATEWAY_OUT:x}",
+                       qos=qos, on_message=on_message)
+    pub = probe_client("probe-can-pub", host, port)
+    topic = f"can/in/0x{GATEWAY_IN:X}"
+    results = []
+    if warm_up(lambda: pub.publish(topic, WARMUP_SEQ.to_bytes(8, "little").hex(), qos=qos), ready, "gateway"):
+        time.sleep(0.2)
+
+        def send(seq):
+            stats.send(seq, time.time())
+            pub.publish(topic, seq.to_bytes(8, "little").hex(), qos=qos)
+
+        pace(rate, duration, send)
+        settle(stats)
+        results.append(stats.result("gateway", qos, rate))
+    close_client(pub)
+    close_client(sub)
+    target.stop()
+    return results
+
+
+def bench_visualizer(host: str, port: int, qos: int, rate: float, duration: float) -> List[dict]:
+    target = Target("visualizer", [sys.executable, "verify_mqtt.py", "visualizer-target",
+                                   "--broker", host, "--port", str(port), "--qos", str(qos)], cwd=HERE)
+    pub = probe_client("probe-viz-pub", host, port)
+    sent = {}
+    results = []
+    if warm_up(lambda: pub.publish(PROBE_TOPIC, json.dumps({"value": -1}), qos=qos), target.ready, "visualizer"):
+        time.sleep(0.2)
+
+        def send(seq):
+            now = time.time()
+            sent[seq] = now
+            pub.publish(PROBE_TOPIC, json.dumps({"seq": seq, "ts": now, "value": seq}), qos=qos)
+
+        pace(rate, duration, send)
+        time.sleep(DRAIN_TIMEOUT)
+    close_client(pub)
+    lines = target.stop()
+    if sent and lines:
+        record = json.loads(lines[-1])
+        for stage in ("staged", "buffered"):
+            stats = ProbeStats()
+            for seq, t in sent.items():
+                stats.send(seq, t)
+            for seq, t in zip(record["seq"], record[stage]):
+                stats.arrive(int(seq), t)
+            results.append(stats.result(f"visualizer {stage}", qos, rate))
+    return results
+
+
+def bench_climate(host: str, port: int, qos: int, rate: float, duration: float) -> List[dict]:
+    """
+    Commands carry no sequence number: they are paired with temperatures in
+    order, and a command other than the one expected for the oldest open
+    temperature is counted as reordered.
+    """
+    stats = ProbeStats()
+    ready = threading.Event()
+    pending = collections.deque()
+    started = threading.Event()
+
+    def on_message(client, userdata, msg):
+        now = time.time()
+        if not started.is_set():
+            ready.set()
+            return
+        if not pending:
+            stats.duplicates += 1
+            return
+        seq, expected = pending.popleft()
+        stats.arrive(seq, now)
+        if msg.payload.decode() != expected:
+            stats.reordered += 1
+
+    target = Target("climate", [sys.executable, "control_node.py"], cwd=os.path.join(REPO_ROOT, "climate-control"),
+                    env={"MQTT_BROKER": host, "MQTT_PORT": str(port)}, reads_stdin=False)
+    sub = probe_client("probe-climate-sub", host, port, subscribe="home/heater_command",
+                       qos=qos, on_message=on_message)
+    pub = probe_client("probe-climate-pub", host, port)
+    results = []
+    if warm_up(lambda: pub.publish("home/temperature", "22.5", qos=qos), ready, "climate"):
+        time.sleep(0.5)
+        started.set()
+
+        def send(seq):
+            temperature, expected = CLIMATE_PROBES[seq % len(CLIMATE_PROBES)]
+            pending.append((seq, expected))
+            stats.send(seq, time.time())
+            pub.publish("home/temperature", str(temperature), qos=qos)
+
+        pace(rate, duration, send)
+        settle(stats)
+        results.append(stats.result("climate", qos, rate))
+    close_client(pub)
+    close_client(sub)
+    target.stop()
+    return results
+
+
+def visualizer_target(args):
+    """
+    The visualizer's ingest path without the GUI: MQTTClient → TopicRouter
+    staging → CircularBuffer, drained every VISUALIZER_TICK like the GUI
+    timer. Prints "ready" at the first sample, and on stdin EOF one JSON
+    line with each probe's sequence number, staging time and buffering time.
+    """
+    from data_buffer import CircularBuffer
+    from mqtt_client import MQTTClient
+    from staging import TopicRouter
+
+    logging.basicConfig(level=logging.WARNING)
+    client = MQTTClient(broker=args.broker, port=args.port)
+    router = TopicRouter([PROBE_TOPIC])
+    buffer = CircularBuffer(maxlen=1_000_000)
+    client.register_handler(PROBE_TOPIC, router, qos=args.qos)
+    client.connect()
+
+    stop = threading.Event()
+    threading.Thread(target=lambda: (sys.stdin.read(), stop.set()), daemon=True).start()
+    staging = router.queue(PROBE_TOPIC)
+    seqs, staged, buffered = [], [], []
+    ready = False
+
+    def drain():
+        nonlocal ready
+        batch = staging.drain()
+        if batch is None:
+            return
+        times, values = batch
+        buffer.extend(times, values)
+        now = time.time()
+        probes = values >= 0
+        seqs.extend(values[probes].astype(int).tolist())
+        staged.extend(times[probes].tolist())
+        buffered.extend([now] * int(probes.sum()))
+        if not ready:
+            ready = True
+            print("ready", flush=True)
+
+    while not stop.wait(VISUALIZER_TICK):
+        drain()
+    time.sleep(0.5)
+    drain()
+    client.disconnect()
+    print(json.dumps({"seq": seqs, "staged": staged, "buffered": buffered}), flush=True)
+
+
+def start_local_broker() -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, "local_broker.py", "--port", "0", "--print-port"], cwd=HERE,
+                            stdout=subprocess.PIPE, stderr=None if VERBOSE else subprocess.DEVNULL, text=True)
+    proc.port = int(proc.stdout.readline())
+    return proc
+
+
+def git_version() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench(args):
+    broker = None
+    if args.broker == "local":
+        broker = start_local_broker()
+        host, port = "127.0.0.1", broker.port
+        print(f"[✔] Local broker stand-in on port {port}")
+    else:
+        host, _, port = args.broker.partition(":")
+        port = int(port or BROKER_PORT)
+        if not test_tcp_connect(host, port):
+            sys.exit(1)
+
+    benches = {"broker": bench_broker, "gateway": bench_gateway,
+               "visualizer": bench_visualizer, "climate": bench_climate}
+    results = []
+    try:
+        for name in args.components.split(","):
+            for qos in (int(q) for q in args.qos.split(",")):
+                print(f"[→] {name}: QoS {qos}, {args.rate:g} probes/s for {args.duration:g} s")
+                results.extend(benches[name](host, port, qos, args.rate, args.duration))
+    finally:
+        if broker is not None:
+            broker.terminate()
+            broker.wait()
+
+    print(f"\n{'component':<20} {'qos':>3} {'sent':>7} {'recv':>7} {'lost':>6} {'reord':>6} {'dup':>5} "
+          f"{'msg/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'max ms':>8}")
+    for r in results:
+        print(f"{r['component']:<20} {r['qos']:>3} {r['sent']:>7} {r['received']:>7} {r['lost']:>6} "
+              f"{r['reordered']:>6} {r['duplicates']:>5} {r['msgs_per_s']:>8.0f} {r['p50_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['p999_ms']:>8.2f} {r['max_ms']:>8.2f}")
+    if args.json:
+        with open(args.json, "a") as f:
+            f.write(json.dumps({"time": time.time(), "version": git_version(), "broker": args.broker,
+                                "rate": args.rate, "duration": args.duration, "results": results}) + "\n")
+
+
 def main():
     # 1) Test raw TCP connectivity
     test_tcp_connect(BROKER_HOST, BROKER_PORT)
@@ -80,5 +505,29 @@ def main():
         print(f"[✘] Failed to connect/loop: {e}")
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="MQTT connectivity check and latency/throughput suite")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("check", help="TCP and MQTT connectivity, print sensor/# messages (default)")
+    bench_args = commands.add_parser("bench", help="latency, loss and throughput per component")
+    bench_args.add_argument("--broker", default="local", help="'local' (stand-in on a free port) or host[:port]")
+    bench_args.add_argument("--components", default=",".join(COMPONENTS), help=f"subset of {','.join(COMPONENTS)}")
+    bench_args.add_argument("--rate", type=float, default=200.0, help="probes per second")
+    bench_args.add_argument("--qos", default="0,1", help="QoS levels to run, e.g. 0,1,2")
+    bench_args.add_argument("--duration", type=float, default=10.0, help="seconds per component and QoS")
+    bench_args.add_argument("--json", metavar="FILE", help="append the results as one JSON line")
+    bench_args.add_argument("--verbose", action="store_true", help="show broker and component logs")
+    target_args = commands.add_parser("visualizer-target", help=argparse.SUPPRESS)
+    target_args.add_argument("--broker", default=BROKER_HOST)
+    target_args.add_argument("--port", type=int, default=BROKER_PORT)
+    target_args.add_argument("--qos", type=int, default=0)
+    args = parser.parse_args()
+
+    VERBOSE = getattr(args, "verbose", False)
+    if args.command == "bench":
+        bench(args)
+    elif args.command == "visualizer-target":
+        visualizer_target(args)
+    else:
+        main()